@@ -0,0 +1,91 @@
+"""Move child photos to the content-addressed photo store
+
+Revision ID: 534575455d99
+Revises: 9cf54e89fea7
+Create Date: 2026-10-18 09:12:31.204518
+
+"""
+import base64
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.photo_store import detect_content_type, get_photo_store
+
+
+# revision identifiers, used by Alembic.
+revision: str = '534575455d99'
+down_revision: Union[str, None] = '9cf54e89fea7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Photos are moved a few rows at a time so the migration never holds many in memory
+BATCH_SIZE = 100
+
+child_health_records = sa.table(
+    'child_health_records',
+    sa.column('id', sa.Integer),
+    sa.column('photo_data', sa.Text),
+    sa.column('photo_hash', sa.String),
+    sa.column('photo_content_type', sa.String),
+)
+
+
+def _ids_in_batches(connection, condition):
+    ids = [row.id for row in connection.execute(
+        sa.select(child_health_records.c.id).where(condition).order_by(child_health_records.c.id)
+    )]
+    for start in range(0, len(ids), BATCH_SIZE):
+        yield ids[start:start + BATCH_SIZE]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('child_health_records', sa.Column('photo_hash', sa.String(length=64), nullable=True))
+    op.add_column('child_health_records', sa.Column('photo_content_type', sa.String(), nullable=True))
+
+    connection = op.get_bind()
+    store = get_photo_store()
+    for ids in _ids_in_batches(connection, child_health_records.c.photo_data.isnot(None)):
+        rows = connection.execute(
+            sa.select(child_health_records.c.id, child_health_records.c.photo_data)
+            .where(child_health_records.c.id.in_(ids))
+        )
+        for row in rows.fetchall():
+            image_bytes = base64.b64decode(row.photo_data)
+            connection.execute(
+                child_health_records.update()
+                .where(child_health_records.c.id == row.id)
+                .values(
+                    photo_hash=store.put(image_bytes),
+                    photo_content_type=detect_content_type(image_bytes)
+                )
+            )
+
+    op.drop_column('child_health_records', 'photo_data')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.add_column('child_health_records', sa.Column('photo_data', sa.Text(), nullable=True))
+
+    # Photos stay in the store; the rows get their base64 copies back
+    connection = op.get_bind()
+    store = get_photo_store()
+    for ids in _ids_in_batches(connection, child_health_records.c.photo_hash.isnot(None)):
+        rows = connection.execute(
+            sa.select(child_health_records.c.id, child_health_records.c.photo_hash)
+            .where(child_health_records.c.id.in_(ids))
+        )
+        for row in rows.fetchall():
+            if not store.exists(row.photo_hash):
+                continue
+            connection.execute(
+                child_health_records.update()
+                .where(child_health_records.c.id == row.id)
+                .values(photo_data=base64.b64encode(store.get(row.photo_hash)).decode('utf-8'))
+            )
+
+    op.drop_column('child_health_records', 'photo_content_type')
+    op.drop_column('child_health_records', 'photo_hash')
@@ -0,0 +1,51 @@
+"""Add indexes for the child record listing filters and name search
+
+Revision ID: e4a91d2c6b07
+Revises: c7e1f04a9b3d
+Create Date: 2026-10-18 15:02:47.390114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4a91d2c6b07'
+down_revision: Union[str, None] = 'c7e1f04a9b3d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Name, columns
+BTREE_INDEXES = (
+    ('ix_child_health_records_predicted_class_id', ['predicted_class', 'id']),
+    ('ix_child_health_records_predicted_class_created_at', ['predicted_class', 'created_at']),
+    ('ix_child_health_records_created_at', ['created_at']),
+)
+NAME_INDEX = 'ix_child_health_records_name'
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, columns in BTREE_INDEXES:
+        op.create_index(name, 'child_health_records', columns, unique=False)
+
+    if op.get_bind().dialect.name == 'postgresql':
+        # Trigram index so ILIKE '%term%' searches do not scan the table; pg_trgm
+        # is a trusted extension, so the database owner can create it
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        op.create_index(
+            NAME_INDEX, 'child_health_records', ['name'], unique=False,
+            postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}
+        )
+    else:
+        op.create_index(NAME_INDEX, 'child_health_records', ['name'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # pg_trgm is left installed; other objects may depend on it
+    op.drop_index(NAME_INDEX, table_name='child_health_records')
+    for name, _ in reversed(BTREE_INDEXES):
+        op.drop_index(name, table_name='child_health_records')
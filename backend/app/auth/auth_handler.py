@@ -1,12 +1,19 @@
+import asyncio
+import hashlib
 import jwt
+import threading
 import time
-from typing import Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
 from datetime import datetime, timedelta
 from passlib.context import CryptContext
 from fastapi import HTTPException, Security, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
 import os
+from app.config import AUTH_HASH_WORKERS, BCRYPT_ROUNDS, TOKEN_CACHE_SIZE
+from app.utils.cache import LRUCache
+from app.utils.metrics import metrics
 
 # Configuration
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here")  # Change in production
@@ -14,8 +21,78 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 REFRESH_TOKEN_EXPIRE_DAYS = 7
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing context; hashes made with another cost count as needing an update
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+PASSWORD_HASH_SECONDS = metrics.histogram(
+    "nutriguard_password_hash_seconds",
+    "Time spent hashing or verifying a password, by operation (hash or verify)",
+    labelnames=("operation",)
+)
+PASSWORD_HASH_WAIT_SECONDS = metrics.histogram(
+    "nutriguard_password_hash_wait_seconds",
+    "Time password jobs spend queued before an auth worker picks them up"
+)
+
+# bcrypt releases the GIL, so these threads hash in parallel without holding up
+# the event loop or the threadpool that serves database work
+auth_executor = ThreadPoolExecutor(max_workers=AUTH_HASH_WORKERS, thread_name_prefix="auth")
+
+async def _run_password_job(operation: str, func, *args):
+    submitted_at = time.perf_counter()
+
+    def job():
+        started_at = time.perf_counter()
+        PASSWORD_HASH_WAIT_SECONDS.observe(started_at - submitted_at)
+        try:
+            return func(*args)
+        finally:
+            PASSWORD_HASH_SECONDS.observe(time.perf_counter() - started_at, operation=operation)
+
+    return await asyncio.get_running_loop().run_in_executor(auth_executor, job)
+
+def token_digest(token: str) -> str:
+    """SHA-256 of a token, so the cache and denylist never hold usable tokens"""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class TokenDenylist:
+    """
+    Digests of revoked tokens, each kept until the token would have expired anyway.
+
+    The list lives in the process, so with several workers a logout takes
+    effect on the worker that handled it.
+    """
+
+    def __init__(self, clock=time.time):
+        self._clock = clock
+        # digest -> exp of the revoked token
+        self._entries: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, digest: str) -> bool:
+        return digest in self._entries
+
+    def add(self, digest: str, expires_at: float):
+        now = self._clock()
+        with self._lock:
+            # Logouts are rare, so dropping entries past their exp here keeps the list small
+            for expired in [d for d, exp in self._entries.items() if exp <= now]:
+                del self._entries[expired]
+            if expires_at > now:
+                self._entries[digest] = expires_at
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Verified claims by token digest; entries are checked against their exp on every hit
+token_cache = LRUCache("jwt", TOKEN_CACHE_SIZE)
+token_denylist = TokenDenylist()
 
 # Security bearer scheme for JWT
 security = HTTPBearer()
@@ -41,6 +118,21 @@ class AuthHandler:
     def verify_password(self, plain_password: str, hashed_password: str) -> bool:
         """Verify a plain password against a hashed password"""
         return pwd_context.verify(plain_password, hashed_password)
+
+    async def hash_password(self, password: str) -> str:
+        """Hash a password for storing, on an auth worker thread"""
+        return await _run_password_job("hash", pwd_context.hash, password)
+
+    async def verify_and_update_password(self, plain_password: str,
+                                         hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """
+        Verify a password on an auth worker thread
+
+        Returns:
+            Tuple of (whether it matches, a new hash to store when the stored
+            one was made with a different cost, otherwise None)
+        """
+        return await _run_password_job("verify", pwd_context.verify_and_update, plain_password, hashed_password)
         
     def encode_token(self, user_id: str, role: str = "user") -> Dict[str, str]:
         """Create access and refresh tokens"""
@@ -73,14 +165,43 @@ class AuthHandler:
         }
         
     def decode_token(self, token: str) -> Dict:
-        """Decode a JWT token"""
+        """
+        Decode a JWT token
+
+        The signature is verified once per token; afterwards its claims come
+        from token_cache until the token's exp, unless it has been revoked.
+        """
+        digest = token_digest(token)
+        if digest in token_denylist:
+            raise HTTPException(status_code=401, detail='Token has been revoked')
+
+        cached = token_cache.get(digest)
+        if cached is not None:
+            if cached['exp'] > time.time():
+                return dict(cached)
+            token_cache.discard(digest)
+
         try:
             payload = jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
-            return payload
         except jwt.ExpiredSignatureError:
             raise HTTPException(status_code=401, detail='Token has expired')
         except jwt.InvalidTokenError:
             raise HTTPException(status_code=401, detail='Invalid token')
+        # Tokens without an exp would never leave the cache, so only expiring ones are kept
+        if isinstance(payload.get('exp'), (int, float)):
+            token_cache.put(digest, payload)
+        return dict(payload)
+
+    def revoke_token(self, token: str):
+        """Reject a token from now until it expires, e.g. on logout"""
+        try:
+            payload = jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
+        except jwt.InvalidTokenError:
+            # Expired or forged tokens are rejected anyway
+            return
+        digest = token_digest(token)
+        token_denylist.add(digest, payload.get('exp', float('inf')))
+        token_cache.discard(digest)
             
     def refresh_access_token(self, refresh_token: str) -> Dict:
         """Create a new access token using a refresh token"""
@@ -4,4 +4,71 @@ import os
 APP_ROOT = os.path.dirname(os.path.dirname(__file__))
 
 # Path to model files
-MODEL_FILES_DIR = os.path.join(APP_ROOT, "model_files")
\ No newline at end of file
+MODEL_FILES_DIR = os.path.join(APP_ROOT, "model_files")
+
+# Maximum number of children accepted by a single batch prediction request
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "1000"))
+
+# Inference engine: "native" uses the library's predict_proba, "flat" uses the
+# array-backed tree evaluator in app.models.ml_model
+INFERENCE_ENGINE = os.getenv("INFERENCE_ENGINE", "native")
+
+# WHO Child Growth Standards LMS tables used to compute z-scores server-side
+WHO_GROWTH_DIR = os.path.join(MODEL_FILES_DIR, "who_growth")
+
+# Node arrays exported by scripts/export_model_arrays.py; the flat engine
+# memory-maps them so all worker processes share one copy of the trees
+MODEL_ARRAYS_DIR = os.getenv("MODEL_ARRAYS_DIR", os.path.join(MODEL_FILES_DIR, "flat_model"))
+
+# Worker threads that run model inference off the event loop, and how many
+# jobs may wait for them before new requests are turned away with 503
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", str(min(4, os.cpu_count() or 1))))
+INFERENCE_QUEUE_SIZE = int(os.getenv("INFERENCE_QUEUE_SIZE", "64"))
+
+# Micro-batching of concurrent /api/predict calls: rows arriving within the
+# window (or until the batch is full) are scored together in one model call
+INFERENCE_BATCH_WINDOW_MS = float(os.getenv("INFERENCE_BATCH_WINDOW_MS", "2"))
+INFERENCE_MAX_BATCH_SIZE = int(os.getenv("INFERENCE_MAX_BATCH_SIZE", "32"))
+
+# Predictions for repeated feature vectors are served from an in-process LRU
+# cache; features are rounded to PREDICTION_CACHE_DECIMALS places for the key.
+# Set PREDICTION_CACHE_SIZE to 0 to disable it.
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "10000"))
+PREDICTION_CACHE_TTL = float(os.getenv("PREDICTION_CACHE_TTL", "3600"))
+PREDICTION_CACHE_DECIMALS = int(os.getenv("PREDICTION_CACHE_DECIMALS", "4"))
+
+# Offline-sync uploads: most records accepted per upload, and how many are
+# scored and committed together
+SYNC_MAX_RECORDS = int(os.getenv("SYNC_MAX_RECORDS", "5000"))
+SYNC_COMMIT_CHUNK_SIZE = int(os.getenv("SYNC_COMMIT_CHUNK_SIZE", "200"))
+
+# Child photos live in a content-addressed store; "local" keeps them under
+# PHOTO_STORE_DIR, or name a custom backend as "package.module:ClassName"
+PHOTO_STORE_BACKEND = os.getenv("PHOTO_STORE_BACKEND", "local")
+PHOTO_STORE_DIR = os.getenv("PHOTO_STORE_DIR", os.path.join(APP_ROOT, "photo_store"))
+
+# How long browsers may reuse a child photo before revalidating it (seconds)
+IMAGE_CACHE_MAX_AGE = int(os.getenv("IMAGE_CACHE_MAX_AGE", "86400"))
+
+# Idempotency-Key replays: a key returns its first response for this long (seconds),
+# and a claim whose request never finished is given up after the pending timeout
+IDEMPOTENCY_KEY_TTL = int(os.getenv("IDEMPOTENCY_KEY_TTL", "86400"))
+IDEMPOTENCY_PENDING_TIMEOUT = int(os.getenv("IDEMPOTENCY_PENDING_TIMEOUT", "60"))
+
+# bcrypt cost for new password hashes (each step doubles the time). Stored hashes
+# with a different cost are rehashed the next time their user logs in.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# Worker threads that hash and verify passwords off the event loop
+AUTH_HASH_WORKERS = int(os.getenv("AUTH_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# Decoded access/refresh tokens kept in memory so repeat requests skip signature
+# verification; each entry lives until its token's exp. 0 disables the cache.
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+
+# Request profiling. Admins profile a single request by sending an X-Profile
+# header with their token; PROFILE_REQUEST_RATE also profiles that fraction of
+# all requests (0 disables, 0.01 is one in a hundred). Stacks are sampled every
+# PROFILE_SAMPLE_INTERVAL_MS and saved to PROFILE_DIR as collapsed stacks.
+PROFILE_REQUEST_RATE = float(os.getenv("PROFILE_REQUEST_RATE", "0"))
+PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "5"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(APP_ROOT, "profiles"))
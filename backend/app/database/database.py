@@ -1,9 +1,13 @@
 from sqlalchemy import create_engine, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
 import os
 from dotenv import load_dotenv
 import logging
+from app.database.pool import InstrumentedQueuePool, export_pool_occupancy, instrument_pool
+from app.database.query_stats import track_commits, track_queries
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -19,19 +23,185 @@ if not DATABASE_URL:
     logger.error("DATABASE_URL environment variable is not set!")
     raise ValueError("DATABASE_URL environment variable is not set!")
 
-# Initialize SQLAlchemy components
-try:
-    engine = create_engine(DATABASE_URL, echo=False, pool_pre_ping=True)
-    # Test the connection
-    with engine.connect() as connection:
-        connection.execute(text("SELECT 1"))
-    logger.info("Successfully connected to the database.")
-except Exception as e:
-    logger.error(f"Failed to connect to the database: {str(e)}")
-    raise
+# Optional read replica for GET requests. Replication lag means a record may
+# not be readable here for a moment after it was written to DATABASE_URL.
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL") or None
+
+# Connection pool sizing. Each worker process has a sync and an async engine,
+# so it can hold up to DB_POOL_SIZE + DB_MAX_OVERFLOW + DB_ASYNC_POOL_SIZE +
+# DB_ASYNC_MAX_OVERFLOW connections (45 with the defaults) to the primary, and
+# as many again to the replica when one is set. Keep that times the number of
+# workers below the database's connection limit.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+# The async engine only serves the hot read routes
+DB_ASYNC_POOL_SIZE = int(os.getenv("DB_ASYNC_POOL_SIZE", "5"))
+DB_ASYNC_MAX_OVERFLOW = int(os.getenv("DB_ASYNC_MAX_OVERFLOW", "10"))
+# Seconds before a pooled connection is replaced, and to wait for a free one
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Server-side statement timeout in milliseconds (PostgreSQL only); 0 disables it
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))
+
+def engine_options(database_url: str) -> dict:
+    """Keyword arguments for create_engine, including the pool settings above"""
+    options = {"echo": False, "pool_pre_ping": True}
+    connect_args = {}
+    if database_url.startswith("sqlite"):
+        # Sessions are handed between the event loop and worker threads, which SQLite refuses by default
+        connect_args["check_same_thread"] = False
+        if ":memory:" in database_url or database_url in ("sqlite://", "sqlite:///"):
+            # An in-memory database lives in a single connection; leave SQLAlchemy's pool choice alone
+            options["connect_args"] = connect_args
+            return options
+    elif database_url.startswith("postgresql") and DB_STATEMENT_TIMEOUT_MS > 0:
+        connect_args["options"] = f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"
+
+    options.update(
+        connect_args=connect_args,
+        poolclass=InstrumentedQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_timeout=DB_POOL_TIMEOUT
+    )
+    return options
+
+# Initialize SQLAlchemy components; the first connection is opened (and checked)
+# by the app's startup hook rather than at import time
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+instrument_pool(engine)
+export_pool_occupancy(engine)
+track_queries(engine)
+
+replica_engine = None
+if DATABASE_REPLICA_URL:
+    replica_engine = create_engine(DATABASE_REPLICA_URL, **engine_options(DATABASE_REPLICA_URL))
+    instrument_pool(replica_engine)
+    track_queries(replica_engine)
+track_commits()
+
+def ping_database() -> bool:
+    """Check that a pooled connection can reach the database"""
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+        return True
+    except Exception as e:
+        logger.warning(f"Database ping failed: {str(e)}")
+        return False
 
 # Create a session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Sessions for reads that may be served by the replica
+ReadSessionLocal = (
+    sessionmaker(autocommit=False, autoflush=False, bind=replica_engine) if replica_engine is not None
+    else SessionLocal
+)
+
+# Requests with these methods only read, so their sessions may use the replica
+READ_METHODS = ("GET", "HEAD")
+
+async def get_db(request: Request):
+    """
+    Dependency that yields the request's Session.
+
+    A Session only checks a connection out of the pool when it first runs a
+    query, so handing one to a route that ends up not using it costs nothing;
+    closing it goes through the threadpool only if a connection was taken.
+    """
+    session = (ReadSessionLocal if request.method in READ_METHODS else SessionLocal)()
+    try:
+        yield session
+    finally:
+        if session.in_transaction():
+            # Returning the connection rolls back on the server, which blocks
+            await run_in_threadpool(session.close)
+        else:
+            session.close()
+
+# Async drivers for the same databases; Alembic and the write paths keep the sync engine
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def async_database_url(database_url: str) -> str:
+    """The DATABASE_URL rewritten for its asyncio driver"""
+    scheme, separator, rest = database_url.partition("://")
+    if scheme not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {scheme!r} databases")
+    return ASYNC_DRIVERS[scheme] + separator + rest
+
+def async_engine_options(database_url: str) -> dict:
+    """Keyword arguments for create_async_engine, mirroring engine_options with the async pool sizes"""
+    options = engine_options(database_url)
+    options.pop("poolclass", None)
+    if "pool_size" in options:
+        options.update(pool_size=DB_ASYNC_POOL_SIZE, max_overflow=DB_ASYNC_MAX_OVERFLOW)
+    connect_args = options.get("connect_args", {})
+    # asyncpg takes server settings instead of libpq's "options" string
+    statement_options = connect_args.pop("options", None)
+    if statement_options:
+        connect_args["server_settings"] = {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}
+    if database_url.startswith("sqlite"):
+        # aiosqlite runs each connection on its own thread; keep SQLAlchemy's default pool for it
+        for key in ("pool_size", "max_overflow", "pool_recycle", "pool_timeout"):
+            options.pop(key, None)
+        connect_args.pop("check_same_thread", None)
+    options["connect_args"] = connect_args
+    return options
+
+# The async engine is created on first use so the sync-only tools (Alembic,
+# scripts) never need the async drivers installed
+async_engine = None
+AsyncSessionLocal = None
+async_replica_engine = None
+AsyncReadSessionLocal = None
+
+def _create_async_engine(database_url: str):
+    from sqlalchemy.ext.asyncio import create_async_engine
+    created = create_async_engine(async_database_url(database_url), **async_engine_options(database_url))
+    instrument_pool(created.sync_engine)
+    track_queries(created.sync_engine)
+    return created
+
+def get_async_engine():
+    """Get or create the async engine (and the replica's, when one is configured)"""
+    global async_engine, AsyncSessionLocal, async_replica_engine, AsyncReadSessionLocal
+    if async_engine is None:
+        from sqlalchemy.ext.asyncio import AsyncSession
+        async_engine = _create_async_engine(DATABASE_URL)
+        AsyncSessionLocal = sessionmaker(
+            async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+        )
+        AsyncReadSessionLocal = AsyncSessionLocal
+        if DATABASE_REPLICA_URL:
+            async_replica_engine = _create_async_engine(DATABASE_REPLICA_URL)
+            AsyncReadSessionLocal = sessionmaker(
+                async_replica_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+            )
+    return async_engine
+
+async def get_async_db(request: Request):
+    """Dependency that yields an AsyncSession for read routes that must not block the event loop"""
+    get_async_engine()
+    session_factory = AsyncReadSessionLocal if request.method in READ_METHODS else AsyncSessionLocal
+    async with session_factory() as session:
+        yield session
+
+async def dispose_async_engine():
+    """Close the async engines' pooled connections"""
+    global async_engine, AsyncSessionLocal, async_replica_engine, AsyncReadSessionLocal
+    for created in (async_engine, async_replica_engine):
+        if created is not None:
+            await created.dispose()
+    async_engine = None
+    AsyncSessionLocal = None
+    async_replica_engine = None
+    AsyncReadSessionLocal = None
 
 # Base class for all models
 Base = declarative_base()
@@ -39,3 +209,5 @@ Base = declarative_base()
 # Import models so that they are registered with SQLAlchemy metadata
 # Ensure the import path is correct relative to where database.py is used
 from app.models.child_health_record import ChildHealthRecord
+from app.models.idempotency_key import IdempotencyKey
+from app.models.child_record_stats import ChildRecordStats
@@ -0,0 +1,75 @@
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+from app.utils.metrics import metrics
+
+POOL_CHECKOUT_WAIT_SECONDS = metrics.histogram(
+    "nutriguard_db_pool_checkout_wait_seconds",
+    "Time spent waiting for a connection from the pool"
+)
+POOL_TIMEOUTS = metrics.counter(
+    "nutriguard_db_pool_timeouts_total",
+    "Checkouts that gave up after pool_timeout because every connection was busy"
+)
+POOL_CONNECTIONS_OPENED = metrics.counter(
+    "nutriguard_db_pool_connections_opened_total",
+    "New database connections opened by the pool"
+)
+POOL_INVALIDATIONS = metrics.counter(
+    "nutriguard_db_pool_invalidations_total",
+    "Pooled connections discarded as broken, by kind (hard or soft)",
+    labelnames=("kind",)
+)
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited and how often it timed out"""
+
+    def _do_get(self):
+        started_at = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            POOL_TIMEOUTS.inc()
+            raise
+        finally:
+            POOL_CHECKOUT_WAIT_SECONDS.observe(time.perf_counter() - started_at)
+
+
+def instrument_pool(engine: Engine):
+    """Count the engine's pool events on /metrics"""
+    pool = engine.pool
+
+    @event.listens_for(pool, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        POOL_CONNECTIONS_OPENED.inc()
+
+    @event.listens_for(pool, "invalidate")
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        POOL_INVALIDATIONS.inc(kind="hard")
+
+    @event.listens_for(pool, "soft_invalidate")
+    def on_soft_invalidate(dbapi_connection, connection_record, exception):
+        POOL_INVALIDATIONS.inc(kind="soft")
+
+
+def export_pool_occupancy(engine: Engine):
+    """Report the engine's pool size, checkouts and overflow on /metrics"""
+    pool = engine.pool
+    if isinstance(pool, QueuePool):
+        metrics.gauge(
+            "nutriguard_db_pool_size",
+            "Connections the pool keeps open"
+        ).set_function(pool.size)
+        metrics.gauge(
+            "nutriguard_db_pool_checked_out",
+            "Connections currently checked out of the pool"
+        ).set_function(pool.checkedout)
+        metrics.gauge(
+            "nutriguard_db_pool_overflow",
+            "Connections open beyond pool_size (negative while the pool is not yet full)"
+        ).set_function(pool.overflow)
@@ -0,0 +1,128 @@
+import contextvars
+import time
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.utils.metrics import metrics
+
+QUERIES_PER_REQUEST = metrics.histogram(
+    "nutriguard_db_queries_per_request",
+    "SQL statements executed while handling one request",
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200)
+)
+DB_SECONDS_PER_REQUEST = metrics.histogram(
+    "nutriguard_db_seconds_per_request",
+    "Time one request spent waiting on SQL statements"
+)
+DB_COMMIT_SECONDS = metrics.histogram(
+    "nutriguard_db_commit_seconds",
+    "Time a session commit took, including flushing pending changes"
+)
+
+
+class QueryStats:
+    """Statements run and time spent in the database on behalf of one request"""
+
+    __slots__ = ("count", "seconds")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def server_timing(self) -> str:
+        """The stats as a Server-Timing header entry"""
+        return f'db;dur={self.seconds * 1000:.1f};desc="{self.count} queries"'
+
+
+# Set by QueryStatsMiddleware for the duration of each request. The object is
+# mutated rather than replaced so threadpool workers and the async driver's
+# greenlets, which run on copies of the context, still add to the same stats.
+_current_stats: "contextvars.ContextVar[Optional[QueryStats]]" = contextvars.ContextVar(
+    "nutriguard_query_stats", default=None
+)
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    """Stats of the request being handled, or None outside a request"""
+    return _current_stats.get()
+
+
+def _record(context):
+    started_at = getattr(context, "_nutriguard_started_at", None)
+    stats = _current_stats.get()
+    if started_at is None or stats is None:
+        return
+    stats.count += 1
+    stats.seconds += time.perf_counter() - started_at
+
+
+def track_queries(engine: Engine):
+    """Add the engine's statements to the current request's QueryStats"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._nutriguard_started_at = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            _record(context)
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(exception_context):
+        # Failed statements (e.g. hitting the statement timeout) are often the slowest ones
+        if exception_context.execution_context is not None:
+            _record(exception_context.execution_context)
+
+
+def track_commits(session_class=Session):
+    """Time every commit of sessions of session_class, which covers AsyncSession's sync sessions too"""
+
+    @event.listens_for(session_class, "before_commit")
+    def before_commit(session):
+        session.info["nutriguard_commit_started_at"] = time.perf_counter()
+
+    @event.listens_for(session_class, "after_commit")
+    def after_commit(session):
+        started_at = session.info.pop("nutriguard_commit_started_at", None)
+        if started_at is not None:
+            DB_COMMIT_SECONDS.observe(time.perf_counter() - started_at)
+
+
+class QueryStatsMiddleware:
+    """
+    ASGI middleware that counts each request's SQL statements and their time.
+
+    The totals are added to the response as a Server-Timing header, which
+    browser dev tools show next to the request, and observed on /metrics.
+    Statements run while a streaming body is sent are not in the header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current_stats.set(stats)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", stats.server_timing().encode("latin-1")))
+                message = dict(message, headers=headers)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_stats.reset(token)
+            QUERIES_PER_REQUEST.observe(stats.count)
+            DB_SECONDS_PER_REQUEST.observe(stats.seconds)
@@ -1,11 +1,22 @@
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse
 import os
 from app.routes.prediction import router as prediction_router
 from app.routes.auth_router import router as auth_router
 from app.routes.allChildren import router as allChildren_router
+from app.routes.sync import router as sync_router
+from app.routes.stats import router as stats_router
+from app.database.database import dispose_async_engine, ping_database
+from app.database.query_stats import QueryStatsMiddleware
+from app.utils.request_metrics import RequestMetricsMiddleware
+from app.utils.profiling import ProfilingMiddleware
+from app.models.ml_model import model_is_loaded, warm_up_model
+from app.utils.batching import inference_batcher
+from app.utils.executor import inference_executor
+from app.utils.metrics import metrics
 import uvicorn
 
 # Create FastAPI app
@@ -31,12 +42,23 @@ app.add_middleware(
     expose_headers=["*"]  # Exposes all headers
 )
 
+# Count each request's SQL statements and report them in a Server-Timing header
+app.add_middleware(QueryStatsMiddleware)
+
+# Request counts, latency and in-flight requests per route template, on /metrics
+app.add_middleware(RequestMetricsMiddleware, routes=app.router.routes)
+
+# Sampled stack profiles of single requests, on an admin's X-Profile header or PROFILE_REQUEST_RATE
+app.add_middleware(ProfilingMiddleware)
+
 # Include routers POST
 app.include_router(prediction_router, prefix="/api", tags=["predictions"])
 app.include_router(auth_router, prefix="/api/auth", tags=["Authentication"])
+app.include_router(sync_router, prefix="/api", tags=["Offline Sync"])
 
 # Include routers GET
 app.include_router(allChildren_router, prefix="/api", tags=["All Children"])
+app.include_router(stats_router, prefix="/api", tags=["Statistics"])
 
 # Health check endpoint
 @app.get("/", tags=["Health"])
@@ -48,12 +70,37 @@ async def root():
         "version": "1.0.0"
     }
 
-# Serve Vite React build files in production
+# Readiness probe for the load balancer: 503 until the model is loaded and the database answers
+@app.get("/ready", tags=["Health"])
+async def ready():
+    checks = {
+        "model": model_is_loaded(),
+        "database": await run_in_threadpool(ping_database)
+    }
+    is_ready = all(checks.values())
+    return JSONResponse({"ready": is_ready, "checks": checks}, status_code=200 if is_ready else 503)
+
+# Metrics endpoint in Prometheus text format
+@app.get("/metrics", tags=["Health"], response_class=PlainTextResponse)
+async def get_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.on_event("startup")
 async def startup_event():
+    # Load and warm the model and open the first pooled connection before taking traffic
+    await run_in_threadpool(warm_up_model)
+    await run_in_threadpool(ping_database)
+    # Serve Vite React build files in production
     if os.path.exists(frontend_build_dir):
         app.mount("/", StaticFiles(directory=frontend_build_dir, html=True), name="frontend")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    # Finish the queued predictions before their worker threads go away
+    await inference_batcher.shutdown()
+    inference_executor.shutdown()
+    await dispose_async_engine()
+
 @app.get("/{full_path:path}", include_in_schema=False)
 async def serve_react_app(full_path: str):
     index_path = os.path.join(frontend_build_dir, "index.html")
@@ -1,4 +1,4 @@
-from sqlalchemy import JSON, Column, Integer, Float, String, DateTime, Text
+from sqlalchemy import JSON, Column, Integer, Float, String, DateTime, Index
 from sqlalchemy.orm import declarative_base
 import datetime
 
@@ -19,9 +19,23 @@ class ChildHealthRecord(Base):
     height_m = Column(Float, nullable=False)
     bmi = Column(Float, nullable=False)
     whr = Column(Float, nullable=False)
-    photo_data = Column(Text, nullable=True)  # Store base64 image data
+    photo_hash = Column(String(64), nullable=True)  # SHA-256 key in the photo store
+    photo_content_type = Column(String, nullable=True)
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
     predicted_class = Column(String, nullable=True)
     confidence = Column(Float, nullable=True)
     class_probabilities = Column(JSON, nullable=True)
 
+
+    __table_args__ = (
+        # Listing filtered by class, newest id first
+        Index("ix_child_health_records_predicted_class_id", "predicted_class", "id"),
+        # Class and date-range filters; also answers per-class counts over a date range from the index alone
+        Index("ix_child_health_records_predicted_class_created_at", "predicted_class", "created_at"),
+        Index("ix_child_health_records_created_at", "created_at"),
+        # Substring search on name: a trigram index on PostgreSQL, a plain one elsewhere
+        Index(
+            "ix_child_health_records_name", "name",
+            postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}
+        ),
+    )
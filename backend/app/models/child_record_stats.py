@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Date, Float, Integer, String
+
+from app.models.child_health_record import Base
+
+class ChildRecordStats(Base):
+    """Running totals of child_health_records per week, class, sex and age band, kept for /api/stats"""
+    __tablename__ = "child_record_stats"
+
+    week_start = Column(Date, primary_key=True)  # Monday of the week the record was created
+    predicted_class = Column(String, primary_key=True)  # "Unknown" for records without a prediction
+    sex = Column(String, primary_key=True)
+    age_band = Column(String, primary_key=True)  # e.g. "12-23" (months), one band per year of age
+    count = Column(Integer, nullable=False, default=0)
+    # Sums rather than means so concurrent inserts can add to them; means are sum / count
+    height_for_age_z_sum = Column(Float, nullable=False, default=0.0)
+    weight_for_height_z_sum = Column(Float, nullable=False, default=0.0)
+    weight_for_age_z_sum = Column(Float, nullable=False, default=0.0)
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String
+import datetime
+
+from app.models.child_health_record import Base
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    key = Column(String(255), primary_key=True)  # Client-chosen Idempotency-Key header
+    request_hash = Column(String(64), nullable=False)  # SHA-256 of the submitted fields and photo
+    # Set in the same transaction that inserts the record; NULL while the first request is in flight
+    record_id = Column(Integer, ForeignKey("child_health_records.id", ondelete="CASCADE"), nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.datetime.utcnow, index=True)
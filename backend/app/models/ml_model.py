@@ -1,26 +1,275 @@
+import hashlib
 import joblib
+import logging
 import pickle
+import shutil
+import tempfile
 import pandas as pd
 import os
 import numpy as np
-from typing import Dict, List, Tuple, Union, Any
-from app.config import MODEL_FILES_DIR
+import threading
+import time
+import json
+from typing import Dict, List, Optional, Tuple, Union, Any
+from app.config import (
+    INFERENCE_ENGINE, MODEL_ARRAYS_DIR, MODEL_FILES_DIR,
+    PREDICTION_CACHE_DECIMALS, PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL
+)
+from app.utils.cache import LRUCache
+from app.utils.metrics import metrics
+
+MODEL_LOAD_SECONDS = metrics.gauge(
+    "nutriguard_model_load_seconds",
+    "Time taken to load the model artifacts and run the warm-up prediction"
+)
+MODEL_INFERENCE_SECONDS = metrics.histogram(
+    "nutriguard_model_inference_seconds",
+    "Time the trees take to score one model call (a single row or a whole batch), by engine",
+    labelnames=("engine",)
+)
+
+# Simplified API field names and the column names the model was trained with
+FIELD_MAPPING = {
+    'height_for_age_z': 'Height-for-age (Mean Z-score)',
+    'weight_for_height_z': 'Weight-for-height (Mean Z-score)',
+    'weight_for_age_z': 'Weight-for-age (Mean Z-score)'
+}
+
+class FlatTreeEnsemble:
+    """
+    Array-backed evaluator for the boosted trees inside the saved classifier.
+
+    Every tree's split feature, threshold, children and leaf value are copied
+    into contiguous NumPy buffers once, and rows are scored by walking all
+    trees level by level with vectorized indexing. The arithmetic follows
+    xgboost's CPU predictor (float32 inputs, trees summed in order), so the
+    margins are bit-identical to the library's.
+    """
+
+    # Node arrays written by save() and memory-mapped back by load()
+    ARRAY_FIELDS = ("feature", "split_feature", "threshold", "children", "default_left", "value", "roots")
+
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray, children: np.ndarray,
+                 default_left: np.ndarray, value: np.ndarray, roots: np.ndarray,
+                 n_classes: int, base_score: float, max_depth: int,
+                 split_feature: Optional[np.ndarray] = None):
+        self.feature = feature
+        self.threshold = threshold
+        # children[2 * node] is the right child and children[2 * node + 1] the left one
+        self.children = children
+        self.default_left = default_left
+        self.value = value
+        # Roots are grouped by class, trees within a class in boosting order
+        self.roots = roots
+        self.n_classes = n_classes
+        self.base_score = np.float32(base_score)
+        self.max_depth = max_depth
+        if len(roots) % n_classes:
+            raise ValueError("Every class must have the same number of trees")
+        self.n_rounds = len(roots) // n_classes
+        # Leaves have feature -1; read column 0 instead and let the self-loop keep them in place
+        self.split_feature = np.where(feature < 0, 0, feature) if split_feature is None else split_feature
+
+    @classmethod
+    def from_booster(cls, booster) -> "FlatTreeEnsemble":
+        """Flatten a multi-class xgboost Booster into contiguous node arrays"""
+        learner = json.loads(booster.save_raw("json"))["learner"]
+        objective = learner["objective"]["name"]
+        if objective not in ("multi:softprob", "multi:softmax"):
+            raise ValueError(f"Unsupported objective for the flat evaluator: {objective}")
+
+        model = learner["gradient_booster"]["model"]
+        feature, threshold, children, default_left, value, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for tree in model["trees"]:
+            if any(tree["split_type"]):
+                raise ValueError("Categorical splits are not supported by the flat evaluator")
+            left_children = np.asarray(tree["left_children"], dtype=np.intp)
+            right_children = np.asarray(tree["right_children"], dtype=np.intp)
+            conditions = np.asarray(tree["split_conditions"], dtype=np.float32)
+            is_leaf = left_children == -1
+            node_ids = np.arange(len(left_children))
+
+            # Leaves point back at themselves so extra traversal steps are no-ops
+            feature.append(np.where(is_leaf, -1, np.asarray(tree["split_indices"], dtype=np.intp)))
+            threshold.append(np.where(is_leaf, np.float32(0), conditions))
+            value.append(np.where(is_leaf, conditions, np.float32(0)))
+            children.append(np.stack([
+                np.where(is_leaf, node_ids, right_children),
+                np.where(is_leaf, node_ids, left_children)
+            ], axis=1).ravel() + offset)
+            default_left.append(np.asarray(tree["default_left"], dtype=bool))
+            roots.append(offset)
+            max_depth = max(max_depth, cls._tree_depth(left_children, right_children))
+            offset += len(left_children)
+
+        tree_class = np.asarray(model["tree_info"])
+        return cls(
+            feature=np.ascontiguousarray(np.concatenate(feature), dtype=np.intp),
+            threshold=np.ascontiguousarray(np.concatenate(threshold), dtype=np.float32),
+            children=np.ascontiguousarray(np.concatenate(children), dtype=np.intp),
+            default_left=np.ascontiguousarray(np.concatenate(default_left)),
+            value=np.ascontiguousarray(np.concatenate(value), dtype=np.float32),
+            roots=np.asarray(roots, dtype=np.intp)[np.argsort(tree_class, kind="stable")],
+            n_classes=int(learner["learner_model_param"]["num_class"]),
+            base_score=float(learner["learner_model_param"]["base_score"]),
+            max_depth=max_depth
+        )
+
+    def save(self, directory: str, source_digest: Optional[str] = None):
+        """
+        Write the node arrays as uncompressed .npy files so load() can memory-map them
+
+        The directory is replaced atomically, so workers starting during an
+        export see either the old arrays or the new ones.
+
+        Args:
+            directory: Where to write the arrays
+            source_digest: SHA-256 of the model file the arrays were built from
+        """
+        parent = os.path.dirname(os.path.abspath(directory))
+        os.makedirs(parent, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(dir=parent, prefix=".tmp-flat-")
+        try:
+            for name in self.ARRAY_FIELDS:
+                np.save(os.path.join(tmp_dir, f"{name}.npy"), np.ascontiguousarray(getattr(self, name)))
+            with open(os.path.join(tmp_dir, "meta.json"), "w") as f:
+                json.dump({
+                    "n_classes": self.n_classes,
+                    "base_score": float(self.base_score),
+                    "max_depth": self.max_depth,
+                    "source_digest": source_digest
+                }, f)
+            if os.path.isdir(directory):
+                old_dir = tempfile.mkdtemp(dir=parent, prefix=".old-flat-")
+                os.replace(directory, os.path.join(old_dir, "arrays"))
+                os.replace(tmp_dir, directory)
+                shutil.rmtree(old_dir, ignore_errors=True)
+            else:
+                os.replace(tmp_dir, directory)
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+    @classmethod
+    def load(cls, directory: str, mmap_mode: Optional[str] = "r") -> "FlatTreeEnsemble":
+        """
+        Open arrays written by save()
+
+        With mmap_mode="r" the arrays are read-only views of the files, so every
+        worker process shares the same page-cache pages instead of its own copy.
+        """
+        with open(os.path.join(directory, "meta.json")) as f:
+            meta = json.load(f)
+        arrays = {
+            name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode)
+            for name in cls.ARRAY_FIELDS
+        }
+        return cls(
+            n_classes=meta["n_classes"],
+            base_score=meta["base_score"],
+            max_depth=meta["max_depth"],
+            **arrays
+        )
+
+    @staticmethod
+    def read_source_digest(directory: str) -> Optional[str]:
+        """Digest of the model file saved arrays came from, or None if there are none"""
+        try:
+            with open(os.path.join(directory, "meta.json")) as f:
+                return json.load(f).get("source_digest")
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _tree_depth(left_children: np.ndarray, right_children: np.ndarray) -> int:
+        """Number of splits on the longest root-to-leaf path"""
+        depth = 0
+        level = [0]
+        while True:
+            level = [c for node in level for c in (left_children[node], right_children[node]) if c != -1]
+            if not level:
+                return depth
+            depth += 1
+
+    def predict_margin(self, X: np.ndarray) -> np.ndarray:
+        """Raw per-class scores before the softmax"""
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n_rows, n_features = X.shape
+        flat_X = X.ravel()
+        row_offsets = (np.arange(n_rows) * n_features)[:, None]
+        has_missing = bool(np.isnan(X).any())
+
+        nodes = np.broadcast_to(self.roots, (n_rows, len(self.roots))).copy()
+        for _ in range(self.max_depth):
+            x = flat_X[row_offsets + self.split_feature[nodes]]
+            go_left = x < self.threshold[nodes]
+            if has_missing:
+                missing = np.isnan(x)
+                go_left[missing] = self.default_left[nodes[missing]]
+            nodes = self.children[2 * nodes + go_left]
+
+        # Prepend the base score and accumulate trees one at a time, in the same order as xgboost
+        scores = np.empty((n_rows, self.n_classes, self.n_rounds + 1), dtype=np.float32)
+        scores[:, :, 0] = self.base_score
+        scores[:, :, 1:] = self.value[nodes].reshape(n_rows, self.n_classes, self.n_rounds)
+        return np.cumsum(scores, axis=2)[:, :, -1]
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """Class probabilities for each row of X"""
+        margin = self.predict_margin(X)
+        # Same softmax as xgboost: float32 exponentials, float64 normalizer
+        exp = np.exp((margin - margin.max(axis=1, keepdims=True)).astype(np.float64)).astype(np.float32)
+        total = np.zeros(exp.shape[0], dtype=np.float64)
+        for k in range(self.n_classes):
+            total += exp[:, k]
+        return exp / total.astype(np.float32)[:, None]
+
+
+def file_digest(path: str) -> str:
+    """SHA-256 of a file, used to tell whether exported arrays match the model file"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
 
 class MalnutritionModel:
-    def __init__(self):
+    def __init__(self, engine: str = INFERENCE_ENGINE, arrays_dir: str = MODEL_ARRAYS_DIR):
         self.model = None
         self.class_names = None
         self.feature_names = None
         self.metadata = None
+        self.engine = engine
+        self.version = None
+        self.arrays_dir = arrays_dir
+        self.flat_model = None
         self._load_model()
         
     def _load_model(self):
         """Load the saved model and associated artifacts"""
         base_path = MODEL_FILES_DIR
-        
-        # Load the model
         model_path = os.path.join(base_path, "malnutrition_rf_model.joblib")
-        self.model = joblib.load(model_path)
+        model_digest = file_digest(model_path)
+
+        if self.engine == "flat":
+            # Memory-map the exported node arrays when they match the model file;
+            # otherwise flatten the trees from the pickled model in this process
+            if FlatTreeEnsemble.read_source_digest(self.arrays_dir) == model_digest:
+                self.flat_model = FlatTreeEnsemble.load(self.arrays_dir)
+            else:
+                logging.warning(
+                    f"No up-to-date model arrays in {self.arrays_dir}; "
+                    "run scripts/export_model_arrays.py to share them between workers"
+                )
+                self.model = joblib.load(model_path)
+                self.flat_model = FlatTreeEnsemble.from_booster(self.model.get_booster())
+        elif self.engine == "native":
+            self.model = joblib.load(model_path)
+        else:
+            raise ValueError(f"Unknown inference engine: {self.engine}")
         
         # Load class names
         with open(os.path.join(base_path, "class_names.pkl"), "rb") as f:
@@ -33,11 +282,67 @@ class MalnutritionModel:
         # Load metadata if it exists
         metadata_path = os.path.join(base_path, "model_metadata.json")
         if os.path.exists(metadata_path):
-            import json
             with open(metadata_path, "r") as f:
                 self.metadata = json.load(f)
+
+        # The artifact's digest makes the version change whenever the model file does
+        metadata = self.metadata or {}
+        release = metadata.get("version") or metadata.get("creation_date") or "unversioned"
+        self.version = f"{release}+{model_digest[:12]}"
+
+        self._build_feature_index()
                 
-                
+    def _build_feature_index(self):
+        """Map every accepted input key to its column in the model's feature order"""
+        self._feature_columns = []
+        for index, name in enumerate(self.feature_names):
+            alias = next((new_key for new_key, old_key in FIELD_MAPPING.items() if old_key == name), None)
+            self._feature_columns.append((index, name, alias))
+        self._row_buffers = threading.local()
+
+    def _feature_row(self, features: Dict[str, Any]) -> np.ndarray:
+        """Write the features into this thread's preallocated float64 row"""
+        row = getattr(self._row_buffers, "row", None)
+        if row is None:
+            row = np.empty((1, len(self.feature_names)), dtype=np.float64)
+            self._row_buffers.row = row
+
+        missing_features = []
+        for index, name, alias in self._feature_columns:
+            # The simplified field name wins when both spellings are sent
+            if alias is not None and alias in features:
+                row[0, index] = features[alias]
+            elif name in features:
+                row[0, index] = features[name]
+            else:
+                missing_features.append(name)
+        if missing_features:
+            raise ValueError(f"Missing required features: {missing_features}")
+        return row
+
+    def _predict_proba(self, feature_matrix: np.ndarray) -> np.ndarray:
+        """Class probabilities from the configured inference engine"""
+        started_at = time.perf_counter()
+        if self.flat_model is not None:
+            probabilities = self.flat_model.predict_proba(feature_matrix)
+        else:
+            probabilities = self.model.predict_proba(feature_matrix)
+        MODEL_INFERENCE_SECONDS.observe(time.perf_counter() - started_at, engine=self.engine)
+        return probabilities
+
+    def _format_result(self, probabilities: np.ndarray, timestamp: str) -> Dict[str, Any]:
+        """Turn one row of class probabilities into a prediction result"""
+        prediction_idx = int(np.argmax(probabilities))
+        return {
+            "predicted_class": self.class_names[prediction_idx],
+            "confidence": float(probabilities[prediction_idx]),
+            "class_probabilities": {
+                self.class_names[i]: float(prob)
+                for i, prob in enumerate(probabilities)
+            },
+            "timestamp": timestamp
+        }
+
     def predict(self, features: Dict[str, Any]) -> Dict[str, Any]:
         
         """
@@ -49,57 +354,49 @@ class MalnutritionModel:
         Returns:
             Dictionary with prediction results
         """
-        # Create a copy of the input features
-        processed_features = features.copy()
-    
-        # Map the simplified field names back to what the model expects
-        field_mapping = {
-            'height_for_age_z': 'Height-for-age (Mean Z-score)',
-            'weight_for_height_z': 'Weight-for-height (Mean Z-score)',
-            'weight_for_age_z': 'Weight-for-age (Mean Z-score)'
-        }
-        
-        # Replace keys in the dictionary
-        for new_key, old_key in field_mapping.items():
-            if new_key in processed_features:
-                processed_features[old_key] = processed_features.pop(new_key)
-        
-        # Convert input to DataFrame with correct feature order
-        input_df = pd.DataFrame([processed_features])
-        
-        # Ensure all required features are present
-        missing_features = [f for f in self.feature_names if f not in input_df.columns]
-        if missing_features:
-            raise ValueError(f"Missing required features: {missing_features}")
-        
-        # Select only the features used by the model in the correct order
-        input_df = input_df[self.feature_names]
-        
-        # Make prediction
-        prediction_idx = self.model.predict(input_df)[0]
-        prediction_class = self.class_names[prediction_idx]
-        
-        # Get prediction probabilities
-        probabilities = self.model.predict_proba(input_df)[0]
-        
-        # Create class probability dictionary
-        class_probabilities = {
-            self.class_names[i]: float(prob) 
-            for i, prob in enumerate(probabilities)
-        }
-        
-        # Return prediction result
-        return {
-            "predicted_class": prediction_class,
-            "confidence": float(max(probabilities)),
-            "class_probabilities": class_probabilities,
-            "timestamp": pd.Timestamp.now().isoformat()
-        }
+        row = self._feature_row(features)
+
+        # One pass over the trees; the predicted class is the argmax of the probabilities
+        probabilities = self._predict_proba(row)[0]
+
+        return self._format_result(probabilities, pd.Timestamp.now().isoformat())
+
+    def predict_batch(self, feature_matrix: np.ndarray) -> List[Dict[str, Any]]:
+        """
+        Make predictions for many children with a single model call
+
+        Args:
+            feature_matrix: 2-D array with one row per child and columns
+                ordered as in feature_names
+
+        Returns:
+            List of prediction result dictionaries, one per row
+        """
+        feature_matrix = np.asarray(feature_matrix, dtype=np.float64)
+        if feature_matrix.ndim != 2 or feature_matrix.shape[1] != len(self.feature_names):
+            raise ValueError(
+                f"Expected a 2-D feature matrix with {len(self.feature_names)} columns, "
+                f"got shape {feature_matrix.shape}"
+            )
+        if feature_matrix.shape[0] == 0:
+            return []
+
+        # Score the whole batch in one pass over the trees
+        probabilities = self._predict_proba(feature_matrix)
+        timestamp = pd.Timestamp.now().isoformat()
+        return [self._format_result(row, timestamp) for row in probabilities]
         
+    def warm_up(self):
+        """Score a dummy row so lazy allocations happen before the first real request"""
+        self.predict_batch(np.zeros((1, len(self.feature_names))))
+        self.predict({name: 0.0 for name in self.feature_names})
+
     def get_model_info(self) -> Dict[str, Any]:
         """Return information about the model"""
         return {
             "model_type": self.metadata.get("model_type", "RandomForest") if self.metadata else "RandomForest",
+            "engine": self.engine,
+            "version": self.version,
             "features": self.feature_names,
             "classes": self.class_names,
             "metadata": self.metadata
@@ -107,14 +404,56 @@ class MalnutritionModel:
 
 # Singleton instance
 model_instance = None
+_model_lock = threading.Lock()
 
 def get_model():
     """Get or create the model singleton"""
     global model_instance
     if model_instance is None:
-        model_instance = MalnutritionModel()
+        # Inference runs on worker threads, so only one of them may load the model
+        with _model_lock:
+            if model_instance is None:
+                model_instance = MalnutritionModel()
     return model_instance
 
+def model_is_loaded() -> bool:
+    """Whether the model singleton has been created"""
+    return model_instance is not None
+
+def warm_up_model() -> "MalnutritionModel":
+    """Load the model singleton and run a warm-up prediction, recording how long it took"""
+    started_at = time.perf_counter()
+    model = get_model()
+    model.warm_up()
+    MODEL_LOAD_SECONDS.set(time.perf_counter() - started_at)
+    return model
+
+# Repeat screenings often send identical measurements; their predictions are reused
+prediction_cache = LRUCache("prediction", PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL or None)
+_cached_model_version = None
+_cache_version_lock = threading.Lock()
+
+def _prediction_cache_key(version: str, features: List) -> Tuple:
+    """The model version plus the rounded features; NaN (missing) becomes None so keys compare equal"""
+    return (version,) + tuple(
+        None if value != value else round(float(value), PREDICTION_CACHE_DECIMALS)
+        for value in features
+    )
+
+def _check_cache_version(model: "MalnutritionModel"):
+    """Drop every cached prediction once a different model has been loaded"""
+    global _cached_model_version
+    if model.version != _cached_model_version:
+        with _cache_version_lock:
+            if model.version != _cached_model_version:
+                prediction_cache.clear()
+                _cached_model_version = model.version
+
+def _copy_prediction(prediction: Tuple[str, float, Dict[str, float]]) -> Tuple[str, float, Dict[str, float]]:
+    # Callers get their own probabilities dict so the cached one cannot be modified
+    predicted_class, confidence, class_probabilities = prediction
+    return predicted_class, confidence, dict(class_probabilities)
+
 def predict_malnutrition(features: List) -> Tuple[str, float, Dict[str, float]]:
     """
     Predict malnutrition class based on input features list
@@ -132,6 +471,11 @@ def predict_malnutrition(features: List) -> Tuple[str, float, Dict[str, float]]:
     try:
         # Get model instance
         model = get_model()
+        _check_cache_version(model)
+        cache_key = _prediction_cache_key(model.version, features)
+        cached = prediction_cache.get(cache_key)
+        if cached is not None:
+            return _copy_prediction(cached)
         
         # Convert features list to dictionary using expected feature names
         feature_names = [
@@ -149,11 +493,52 @@ def predict_malnutrition(features: List) -> Tuple[str, float, Dict[str, float]]:
         predicted_class = result["predicted_class"]
         confidence = result["confidence"]
         class_probabilities = result["class_probabilities"]
-        
-        return predicted_class, confidence, class_probabilities
+
+        prediction_cache.put(cache_key, (predicted_class, confidence, class_probabilities))
+        return _copy_prediction((predicted_class, confidence, class_probabilities))
         
     except Exception as e:
         # Log the error
         import logging
         logging.error(f"Prediction error: {str(e)}")
-        raise RuntimeError(f"Malnutrition prediction failed: {str(e)}")
\ No newline at end of file
+        raise RuntimeError(f"Malnutrition prediction failed: {str(e)}")
+
+def predict_malnutrition_batch(features: List[List]) -> List[Tuple[str, float, Dict[str, float]]]:
+    """
+    Predict malnutrition classes for many children at once
+
+    Args:
+        features: List of feature lists, each in the same order as
+                 predict_malnutrition expects
+
+    Returns:
+        List of (predicted class, confidence, class_probabilities) tuples
+    """
+    try:
+        model = get_model()
+        _check_cache_version(model)
+        keys = [_prediction_cache_key(model.version, row) for row in features]
+        predictions = {}
+        for key in keys:
+            if key not in predictions:
+                cached = prediction_cache.get(key)
+                if cached is not None:
+                    predictions[key] = cached
+
+        # Score only the rows not cached, each distinct row once
+        to_score = {}
+        for key, row in zip(keys, features):
+            if key not in predictions:
+                to_score.setdefault(key, row)
+        if to_score:
+            feature_matrix = np.array(list(to_score.values()), dtype=np.float64).reshape(len(to_score), -1)
+            for key, result in zip(to_score, model.predict_batch(feature_matrix)):
+                prediction = (result["predicted_class"], result["confidence"], result["class_probabilities"])
+                prediction_cache.put(key, prediction)
+                predictions[key] = prediction
+
+        return [_copy_prediction(predictions[key]) for key in keys]
+    except Exception as e:
+        import logging
+        logging.error(f"Batch prediction error: {str(e)}")
+        raise RuntimeError(f"Malnutrition batch prediction failed: {str(e)}")
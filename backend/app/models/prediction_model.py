@@ -1,9 +1,10 @@
 from pydantic import BaseModel, Field, validator, root_validator
 from typing import List, Dict, Optional, Union
+from app.models.zscores import compute_child_zscores
 
 class MalnutritionInput(BaseModel):
     Sex: int = Field(..., ge=0, le=1, description="Gender (0=Female, 1=Male)")
-    Age: float = Field(..., ge=0, le=60, description="Age in months")
+    Age: float = Field(..., ge=0, le=5, description="Age in completed years")
     Height: float = Field(..., gt=0, description="Height in cm")
     Weight: float = Field(..., gt=0, description="Weight in kg")
     height_for_age_z: Optional[float] = Field(None, description="Height for age z-score")
@@ -25,6 +26,16 @@ class MalnutritionInput(BaseModel):
             if "BMI" not in values or values["BMI"] is None:
                 height_m = values["Height"] / 100.0
                 values["BMI"] = values["Weight"] / (height_m ** 2)
+
+            # Fill in any z-score the client did not send from the WHO reference tables
+            zscore_fields = ("height_for_age_z", "weight_for_height_z", "weight_for_age_z")
+            if values.get("Sex") is not None and values.get("Age") is not None and any(
+                values.get(field) is None for field in zscore_fields
+            ):
+                computed = compute_child_zscores(values["Sex"], values["Age"], values["Height"], values["Weight"])
+                for field, score in zip(zscore_fields, computed):
+                    if values.get(field) is None:
+                        values[field] = score
                 
         return values
     
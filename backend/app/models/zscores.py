@@ -0,0 +1,172 @@
+import csv
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from app.config import WHO_GROWTH_DIR
+
+# Reference tables in model_files/who_growth, from the WHO Child Growth Standards
+# (0-5 years). Each has one row per sex (0=Female, 1=Male) and grid point.
+TABLE_NAMES = ("length_for_age", "height_for_age", "weight_for_age", "weight_for_length", "weight_for_height")
+
+# WHO measures children lying down (length) before 24 months and standing (height) after
+STANDING_AGE_MONTHS = 24
+
+MONTHS_PER_YEAR = 12
+
+
+class GrowthTable:
+    """
+    L, M and S parameters of one WHO indicator on a shared, sorted grid.
+
+    The arrays have shape (2, n): one row per sex, one column per grid point
+    (age in months, or length/height in cm). Lookups interpolate linearly
+    between grid points and return NaN outside the grid.
+    """
+
+    def __init__(self, grid: np.ndarray, L: np.ndarray, M: np.ndarray, S: np.ndarray):
+        self.grid = grid
+        self.L = L
+        self.M = M
+        self.S = S
+
+    @classmethod
+    def from_csv(cls, path: str) -> "GrowthTable":
+        with open(path, newline="") as f:
+            reader = csv.reader(f)
+            header = next(reader)
+            rows = np.array([[float(v) for v in row] for row in reader])
+        columns = {name: index for index, name in enumerate(header)}
+        grid_column = rows[:, 1]
+        grid = np.unique(grid_column)
+
+        params = {}
+        for name in ("L", "M", "S"):
+            values = np.full((2, len(grid)), np.nan)
+            for sex in (0, 1):
+                mask = rows[:, columns["sex"]] == sex
+                values[sex, np.searchsorted(grid, grid_column[mask])] = rows[mask, columns[name]]
+            params[name] = values
+        if any(np.isnan(values).any() for values in params.values()):
+            raise ValueError(f"{path} must have a row for both sexes at every grid point")
+        return cls(grid, params["L"], params["M"], params["S"])
+
+    def lms(self, sex: np.ndarray, x: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Interpolated L, M and S for every (sex, x) pair"""
+        upper = np.clip(np.searchsorted(self.grid, x, side="right"), 1, len(self.grid) - 1)
+        lower = upper - 1
+        weight = (x - self.grid[lower]) / (self.grid[upper] - self.grid[lower])
+        in_range = (x >= self.grid[0]) & (x <= self.grid[-1]) & (sex >= 0) & (sex <= 1)
+        sex = np.where(in_range, sex, 0).astype(np.intp)
+
+        def interpolate(table: np.ndarray) -> np.ndarray:
+            values = table[sex, lower] + weight * (table[sex, upper] - table[sex, lower])
+            return np.where(in_range, values, np.nan)
+
+        return interpolate(self.L), interpolate(self.M), interpolate(self.S)
+
+
+def _value_at(z: float, L: np.ndarray, M: np.ndarray, S: np.ndarray) -> np.ndarray:
+    """Measurement that sits at z standard deviations"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(L == 0, M * np.exp(S * z), M * (1 + L * S * z) ** (1 / L))
+
+
+def lms_zscore(x: np.ndarray, L: np.ndarray, M: np.ndarray, S: np.ndarray,
+               restricted: bool = False) -> np.ndarray:
+    """
+    z-score of each measurement from its LMS parameters
+
+    Args:
+        restricted: Apply WHO's correction beyond +/-3 SD, which the weight
+            indicators use so the skewed tail does not inflate extreme scores
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = np.where(L == 0, np.log(x / M) / S, ((x / M) ** L - 1) / (L * S))
+    if not restricted:
+        return z
+
+    sd3 = _value_at(3, L, M, S)
+    sd3_neg = _value_at(-3, L, M, S)
+    z = np.where(z > 3, 3 + (x - sd3) / (sd3 - _value_at(2, L, M, S)), z)
+    z = np.where(z < -3, -3 + (x - sd3_neg) / (_value_at(-2, L, M, S) - sd3_neg), z)
+    return z
+
+
+class GrowthReference:
+    """WHO growth standard tables, loaded once and scored in bulk"""
+
+    def __init__(self, tables: Dict[str, GrowthTable]):
+        self.tables = tables
+
+    @classmethod
+    def load(cls, directory: str = WHO_GROWTH_DIR) -> "GrowthReference":
+        return cls({name: GrowthTable.from_csv(os.path.join(directory, f"{name}.csv")) for name in TABLE_NAMES})
+
+    def compute(self, sex, age_months, height_cm, weight_kg) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Height-for-age, weight-for-height and weight-for-age z-scores
+
+        All arguments broadcast against each other, so one call scores a whole
+        batch. Sex is 0 (Female) or 1 (Male); a z-score is NaN where the child
+        falls outside the reference (e.g. older than 60 months).
+
+        Returns:
+            Tuple of (height_for_age_z, weight_for_height_z, weight_for_age_z) arrays
+        """
+        sex, age, height, weight = np.broadcast_arrays(
+            np.asarray(sex, dtype=np.float64), np.asarray(age_months, dtype=np.float64),
+            np.asarray(height_cm, dtype=np.float64), np.asarray(weight_kg, dtype=np.float64)
+        )
+        standing = age >= STANDING_AGE_MONTHS
+
+        def pick(lying: str, standing_table: str, x: np.ndarray):
+            lying_lms = self.tables[lying].lms(sex, x)
+            standing_lms = self.tables[standing_table].lms(sex, x)
+            return tuple(np.where(standing, s, l) for l, s in zip(lying_lms, standing_lms))
+
+        height_for_age = lms_zscore(height, *pick("length_for_age", "height_for_age", age))
+        weight_for_height = lms_zscore(
+            weight, *pick("weight_for_length", "weight_for_height", height), restricted=True
+        )
+        weight_for_age = lms_zscore(weight, *self.tables["weight_for_age"].lms(sex, age), restricted=True)
+        return height_for_age, weight_for_height, weight_for_age
+
+
+# Singleton instance
+reference_instance = None
+_reference_lock = threading.Lock()
+
+def get_growth_reference() -> GrowthReference:
+    """Get or load the WHO reference tables"""
+    global reference_instance
+    if reference_instance is None:
+        with _reference_lock:
+            if reference_instance is None:
+                reference_instance = GrowthReference.load()
+    return reference_instance
+
+def age_in_months(age_years) -> np.ndarray:
+    """
+    The app's age, in completed years as the model was trained on, in the months the WHO tables use.
+    Each child is placed at the start of their year, so 5-year-olds stay on the reference.
+    """
+    return np.asarray(age_years, dtype=np.float64) * MONTHS_PER_YEAR
+
+def compute_zscores(sex, age_years, height_cm, weight_kg) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Vectorized z-scores for many children, with age in years; see GrowthReference.compute"""
+    return get_growth_reference().compute(sex, age_in_months(age_years), height_cm, weight_kg)
+
+def compute_child_zscores(sex: int, age_years: float, height_cm: float,
+                          weight_kg: float) -> Tuple[Optional[float], Optional[float], Optional[float]]:
+    """
+    z-scores for one child, with age in years
+
+    Returns:
+        Tuple of (height_for_age_z, weight_for_height_z, weight_for_age_z),
+        with None for any score outside the reference range
+    """
+    scores = compute_zscores(sex, age_years, height_cm, weight_kg)
+    return tuple(None if np.isnan(score) else float(score) for score in scores)
@@ -1,10 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
-from app.database.database import SessionLocal
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Iterator, List, Optional
+from app.database.database import ReadSessionLocal, get_async_db
 from app.models.child_health_record import ChildHealthRecord
-from app.schemas.child_response import ChildHealthResponse
-import base64
+from app.schemas.child_response import ChildListItem
+from app.utils.photo_store import read_photo_base64
+import csv
+import datetime
+import io
+import json
 import logging
 
 router = APIRouter()
@@ -12,55 +19,195 @@ router = APIRouter()
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 
-# Dependency to get the database session
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-        
-@router.get("/children", response_model=List[ChildHealthResponse])
-async def get_all_children(db: Session = Depends(get_db)):
+# Columns a listing can return; photos are never loaded unless asked for
+LISTING_COLUMNS = {
+    column: getattr(ChildHealthRecord, column)
+    for column in (
+        "id", "name", "sex", "age", "height", "weight", "height_for_age_z",
+        "weight_for_height_z", "weight_for_age_z", "height_m", "bmi", "whr",
+        "created_at", "predicted_class", "confidence", "class_probabilities"
+    )
+}
+# Fields computed from the photo hash rather than read from a column
+PHOTO_FIELDS = ("photo_url", "photo_data")
+DEFAULT_FIELDS = tuple(LISTING_COLUMNS) + ("photo_url",)
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Rows fetched per round trip and sent per chunk when exporting
+EXPORT_BATCH_SIZE = 1000
+EXPORT_FIELDS = tuple(LISTING_COLUMNS)
+
+def _name_pattern(term: str) -> str:
+    """ILIKE pattern matching term anywhere in the name, with its own wildcards taken literally"""
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+def _apply_filters(query, predicted_class: Optional[List[str]] = None, min_age: Optional[int] = None,
+                   max_age: Optional[int] = None, created_from: Optional[datetime.datetime] = None,
+                   created_to: Optional[datetime.datetime] = None, name: Optional[str] = None):
+    """
+    Adds the listing filters to the WHERE clause.
+    The class, date and name filters are backed by indexes (see ChildHealthRecord.__table_args__).
     """
-    Retrieves all children from the database.
+    if name:
+        query = query.filter(ChildHealthRecord.name.ilike(_name_pattern(name), escape="\\"))
+    if predicted_class:
+        query = query.filter(ChildHealthRecord.predicted_class.in_(predicted_class))
+    if min_age is not None:
+        query = query.filter(ChildHealthRecord.age >= min_age)
+    if max_age is not None:
+        query = query.filter(ChildHealthRecord.age <= max_age)
+    if created_from is not None:
+        query = query.filter(ChildHealthRecord.created_at >= created_from)
+    if created_to is not None:
+        query = query.filter(ChildHealthRecord.created_at <= created_to)
+    return query
+
+def build_listing_query(columns, cursor: Optional[int], limit: int, **filters):
+    """
+    One page of the listing: newest id first, starting below cursor.
+    One extra row is selected to tell whether there is a next page. With a class
+    filter this walks the (predicted_class, id) index and stops after limit + 1 rows.
+    """
+    query = select(*columns)
+    if cursor is not None:
+        query = query.filter(ChildHealthRecord.id < cursor)
+    query = _apply_filters(query, **filters)
+    return query.order_by(ChildHealthRecord.id.desc()).limit(limit + 1)
+
+def _parse_fields(fields: Optional[str]) -> List[str]:
+    if not fields:
+        return list(DEFAULT_FIELDS)
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in LISTING_COLUMNS and field not in PHOTO_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {unknown}")
+    # The id is always returned because it is the pagination cursor
+    return ["id"] + [field for field in requested if field != "id"]
+
+@router.get("/children", response_model=List[ChildListItem], response_model_exclude_unset=True)
+async def get_all_children(
+    request: Request,
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+    cursor: Optional[int] = Query(None, description="Value of X-Next-Cursor from the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return; photo_data must be asked for"),
+    predicted_class: Optional[List[str]] = Query(None, description="Only these classes"),
+    min_age: Optional[int] = Query(None, ge=0),
+    max_age: Optional[int] = Query(None, ge=0),
+    created_from: Optional[datetime.datetime] = Query(None),
+    created_to: Optional[datetime.datetime] = Query(None),
+    name: Optional[str] = Query(None, min_length=1, description="Only children whose name contains this, ignoring case"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Lists children newest first, one page at a time.
+    Only the requested columns are selected and all filters run in SQL. Photos are
+    returned as a photo_url link unless photo_data is listed in fields.
     """
     try:
-        children = db.query(ChildHealthRecord).all()
-        if not children:
-            return []
-
-        # Convert each record to include properly formatted photo_data
-        formatted_children = []
-        for child in children:
-            # Convert photo_data to base64 string if it exists
-            photo_data = child.photo_data
-            if isinstance(photo_data, (bytes, memoryview)):
-                # Add the data URL prefix for images
-                photo_data = f"data:image/jpeg;base64,{base64.b64encode(bytes(photo_data)).decode('utf-8')}"
-
-            formatted_child = ChildHealthResponse(
-                id=child.id,
-                name=child.name,
-                sex=child.sex,
-                age=child.age,
-                height=child.height,
-                weight=child.weight,
-                height_for_age_z=child.height_for_age_z,
-                weight_for_height_z=child.weight_for_height_z,
-                weight_for_age_z=child.weight_for_age_z,
-                height_m=child.height_m,
-                bmi=child.bmi,
-                whr=child.whr,
-                photo_data=photo_data,  # Now it's always a string
-                created_at=child.created_at,
-                predicted_class=child.predicted_class,
-                confidence=child.confidence,
-                class_probabilities=child.class_probabilities
-            )
-            formatted_children.append(formatted_child)
-
-        return formatted_children
+        selected = _parse_fields(fields)
+        columns = [LISTING_COLUMNS[field] for field in selected if field in LISTING_COLUMNS]
+        wants_photo = any(field in PHOTO_FIELDS for field in selected)
+        if wants_photo:
+            columns.append(ChildHealthRecord.photo_hash)
+
+        # Keyset pagination on the primary key
+        query = build_listing_query(
+            columns, cursor, limit, predicted_class=predicted_class, min_age=min_age, max_age=max_age,
+            created_from=created_from, created_to=created_to, name=name
+        )
+        rows = (await db.execute(query)).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        children = []
+        for row in rows:
+            child = {field: getattr(row, field) for field in selected if field in LISTING_COLUMNS}
+            if "photo_url" in selected:
+                # Card-sized thumbnail; the full photo is one query parameter away
+                child["photo_url"] = (
+                    str(request.url_for("get_image", child_id=row.id).include_query_params(size=256))
+                    if row.photo_hash else None
+                )
+            if "photo_data" in selected:
+                child["photo_data"] = await run_in_threadpool(read_photo_base64, row.photo_hash)
+            children.append(child)
+
+        if has_more:
+            next_cursor = str(rows[-1].id)
+            response.headers["X-Next-Cursor"] = next_cursor
+            response.headers["Link"] = f'<{request.url.include_query_params(cursor=next_cursor)}>; rel="next"'
+
+        return children
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Error retrieving children: {str(e)}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"Error retrieving children: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error retrieving children: {str(e)}")
+
+def _export_rows(export_format: str, filters: dict) -> Iterator[str]:
+    """
+    Streams the export one chunk at a time from a server-side cursor.
+    The session is opened here because the request's session is closed before streaming starts.
+    """
+    db = ReadSessionLocal()
+    try:
+        query = _apply_filters(db.query(*LISTING_COLUMNS.values()), **filters)
+        rows = query.order_by(ChildHealthRecord.id).yield_per(EXPORT_BATCH_SIZE)
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if export_format == "csv":
+            writer.writerow(EXPORT_FIELDS)
+
+        for count, row in enumerate(rows, start=1):
+            values = {field: getattr(row, field) for field in EXPORT_FIELDS}
+            values["created_at"] = values["created_at"].isoformat() if values["created_at"] else None
+            if export_format == "csv":
+                values["class_probabilities"] = json.dumps(values["class_probabilities"])
+                writer.writerow(values.values())
+            else:
+                buffer.write(json.dumps(values) + "\n")
+
+            # Hand each batch to the client and start a new buffer
+            if count % EXPORT_BATCH_SIZE == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+
+        if buffer.tell():
+            yield buffer.getvalue()
+    finally:
+        db.close()
+
+@router.get("/children/export")
+async def export_children(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$", description="ndjson or csv"),
+    predicted_class: Optional[List[str]] = Query(None, description="Only these classes"),
+    min_age: Optional[int] = Query(None, ge=0),
+    max_age: Optional[int] = Query(None, ge=0),
+    created_from: Optional[datetime.datetime] = Query(None),
+    created_to: Optional[datetime.datetime] = Query(None),
+    name: Optional[str] = Query(None, min_length=1, description="Only children whose name contains this, ignoring case")
+):
+    """
+    Streams every child record (without photos) as NDJSON or CSV.
+    Memory use stays flat however large the table is.
+    """
+    filters = {
+        "predicted_class": predicted_class,
+        "min_age": min_age,
+        "max_age": max_age,
+        "created_from": created_from,
+        "created_to": created_to,
+        "name": name
+    }
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        _export_rows(format, filters),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="children.{format}"'}
+    )
@@ -2,7 +2,7 @@ from fastapi import APIRouter, HTTPException, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
 from typing import Optional
-from app.database.database import SessionLocal
+from app.database.database import get_db
 from sqlalchemy.orm import Session 
 import logging
 from ..auth.auth_handler import auth_handler
@@ -14,13 +14,6 @@ router = APIRouter()
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 # Authentication models
 class UserLogin(BaseModel):
     username: str
@@ -50,8 +43,8 @@ async def register_user(user: UserRegistration, db: Session = Depends(get_db)):
     if existing_email:
         raise HTTPException(status_code=400, detail="Email already exists")
 
-    # Hash the password
-    hashed_password = auth_handler.get_password_hash(user.password)
+    # Hash the password off the event loop
+    hashed_password = await auth_handler.hash_password(user.password)
 
     # Create new user
     new_user = User(
@@ -78,14 +71,33 @@ async def login(user: UserLogin, db: Session = Depends(get_db)):
     if not db_user:
         raise HTTPException(status_code=401, detail="Invalid username or password")
 
-    # Verify password
-    if not auth_handler.verify_password(user.password, db_user.password):
+    # Verify password off the event loop
+    is_valid, new_hash = await auth_handler.verify_and_update_password(user.password, db_user.password)
+    if not is_valid:
         raise HTTPException(status_code=401, detail="Invalid username or password")
 
+    # The stored hash was made with a different bcrypt cost; replace it while we have the password
+    if new_hash is not None:
+        db_user.password = new_hash
+        db.commit()
+
     # Generate tokens
     tokens = auth_handler.encode_token(str(db_user.id), db_user.role)
     return tokens
 
+class LogoutRequest(BaseModel):
+    refresh_token: Optional[str] = None
+
+@router.post("/logout")
+async def logout(body: Optional[LogoutRequest] = None,
+                 credentials: HTTPAuthorizationCredentials = Depends(HTTPBearer())):
+    """Revoke the access token, and the refresh token if one is sent"""
+    auth_handler.decode_token(credentials.credentials)
+    auth_handler.revoke_token(credentials.credentials)
+    if body is not None and body.refresh_token:
+        auth_handler.revoke_token(body.refresh_token)
+    return {"detail": "Logged out"}
+
 @router.post("/refresh")
 async def refresh_token(credentials: HTTPAuthorizationCredentials = Depends(HTTPBearer())):
     """Refresh an access token"""
@@ -93,6 +105,8 @@ async def refresh_token(credentials: HTTPAuthorizationCredentials = Depends(HTTP
         refresh_token = credentials.credentials
         new_token = auth_handler.refresh_access_token(refresh_token)
         return new_token
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error refreshing token: {str(e)}")
 
@@ -106,6 +120,5 @@ async def get_current_user_info(user=Depends(auth_handler.get_current_user), db:
     return UserResponse(
         username=db_user.username,
         email=db_user.email,
-        full_name=db_user.full_name,
         role=db_user.role
     )
\ No newline at end of file
@@ -1,32 +1,43 @@
-from fastapi import APIRouter, HTTPException, Depends, File, Form, UploadFile
+from fastapi import APIRouter, HTTPException, Depends, File, Form, Header, Query, Request, Response, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.database.database import SessionLocal
+from app.config import IMAGE_CACHE_MAX_AGE, MAX_BATCH_SIZE
+from app.database.database import get_async_db, get_db
 from app.models.child_health_record import ChildHealthRecord
-from app.models.ml_model import predict_malnutrition
+from app.models.ml_model import predict_malnutrition_batch
+from app.models.zscores import compute_child_zscores, compute_zscores
 from app.schemas.child_response import ChildHealthResponse
+from app.utils.batching import inference_batcher
+from app.utils.executor import InferenceQueueFull, inference_executor
+from app.utils.idempotency import (
+    MAX_KEY_LENGTH, IdempotencyClaim, IdempotencyKeyInProgress, IdempotencyKeyReused, claim_idempotency_key,
+    complete_idempotency_key, forget_idempotency_key, release_idempotency_key, request_fingerprint
+)
+from app.utils.photo_store import (
+    PhotoStore, detect_content_type, encode_photo_base64, get_photo_store, read_photo_base64
+)
+from app.utils.record_stats import add_to_record_stats
+from app.utils.thumbnails import THUMBNAIL_CONTENT_TYPE, ensure_thumbnail
+import csv
 import datetime
-from typing import List
+import email.utils
+from typing import Any, Dict, List, Optional
 from pydantic import BaseModel, Field, ValidationError
 import logging
 import os
 import shutil
-import base64
-from fastapi.responses import Response
+from fastapi.responses import FileResponse, StreamingResponse
 from io import BytesIO
+import numpy as np
+from PIL import UnidentifiedImageError
 
 router = APIRouter()
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 
-# Dependency to get the database session
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 # Pydantic model for input validation (without photoUrl)
 class ChildCreate(BaseModel):
     name: str = Field(..., min_length=1, description="Child's name is required")
@@ -34,59 +45,201 @@ class ChildCreate(BaseModel):
     age: int = Field(..., ge=0, description="Age should be a positive integer")
     height: float = Field(..., gt=0, description="Height should be a positive number")
     weight: float = Field(..., gt=0, description="Weight should be a positive number")
-    height_for_age_z: float
-    weight_for_height_z: float
-    weight_for_age_z: float
+    # Computed from the WHO growth standards when omitted
+    height_for_age_z: Optional[float] = None
+    weight_for_height_z: Optional[float] = None
+    weight_for_age_z: Optional[float] = None
     whr: float = Field(..., ge=0, description="WHR should be non-negative")
 
+ZSCORE_FIELDS = ("height_for_age_z", "weight_for_height_z", "weight_for_age_z")
+
+def fill_zscores(children: List[ChildCreate]) -> List[Dict[str, Any]]:
+    """
+    Computes the missing z-scores of many children in one vectorized pass.
+    Returns an {"index", "error"} entry for every child whose scores are outside the reference.
+    """
+    missing = [
+        index for index, child in enumerate(children)
+        if any(getattr(child, field) is None for field in ZSCORE_FIELDS)
+    ]
+    if not missing:
+        return []
+
+    scores = compute_zscores(
+        [children[index].sex for index in missing],
+        [children[index].age for index in missing],
+        [children[index].height for index in missing],
+        [children[index].weight for index in missing]
+    )
+    errors = []
+    for row, index in enumerate(missing):
+        child = children[index]
+        for field, values in zip(ZSCORE_FIELDS, scores):
+            if getattr(child, field) is None and not np.isnan(values[row]):
+                setattr(child, field, float(values[row]))
+        unknown = [field for field in ZSCORE_FIELDS if getattr(child, field) is None]
+        if unknown:
+            errors.append({
+                "index": index,
+                "error": f"Outside the WHO growth reference range; send {', '.join(unknown)} explicitly"
+            })
+    return errors
+
+def build_features(sex: int, age: int, height: float, weight: float, height_for_age_z: float,
+                   weight_for_height_z: float, weight_for_age_z: float, whr: float) -> List[float]:
+    """
+    Builds the model feature list for one child, deriving height in meters and BMI.
+    """
+    height_in_meters = height / 100  # Convert height to meters
+    bmi = weight / (height_in_meters ** 2)  # BMI formula
+    sex_numeric = 1 if sex == 1 else 0
+    return [
+        sex_numeric,
+        age,
+        height,
+        weight,
+        height_for_age_z,
+        weight_for_height_z,
+        weight_for_age_z,
+        height_in_meters,
+        bmi,
+        whr
+    ]
+
+def _save_record(db: Session, record: ChildHealthRecord, claim: Optional[IdempotencyClaim] = None):
+    """
+    Inserts one record and reloads it with its generated id.
+    A claimed idempotency key and the dashboard statistics are updated in the same transaction.
+    """
+    db.add(record)
+    db.flush()
+    if claim is not None:
+        complete_idempotency_key(db, claim, record.id)
+    add_to_record_stats(db, [record])
+    db.commit()
+    db.refresh(record)
+
+def _store_new_photo(image_bytes: bytes) -> Optional[str]:
+    """
+    Stores a photo and returns its hash if this call wrote it, or None if it was already stored.
+    """
+    store = get_photo_store()
+    if store.exists(PhotoStore.hash_bytes(image_bytes)):
+        return None
+    return store.put(image_bytes)
+
+def _discard_unreferenced_photo(db: Session, photo_hash: str):
+    """
+    Removes a photo stored by a request that then failed, unless a record refers to it after all.
+    """
+    db.rollback()
+    referenced = db.query(ChildHealthRecord.id).filter(ChildHealthRecord.photo_hash == photo_hash).first()
+    if referenced is None:
+        get_photo_store().delete(photo_hash)
+
+def _record_response(record: ChildHealthRecord, photo_data: Optional[str]) -> Dict[str, Any]:
+    """
+    The /predict response for a stored record, with the photo as base64.
+    """
+    return {
+        "id": record.id,
+        "name": record.name,
+        "sex": record.sex,
+        "age": record.age,
+        "height": record.height,
+        "weight": record.weight,
+        "height_for_age_z": record.height_for_age_z,
+        "weight_for_height_z": record.weight_for_height_z,
+        "weight_for_age_z": record.weight_for_age_z,
+        "height_m": record.height_m,
+        "bmi": record.bmi,
+        "whr": record.whr,
+        "photo_data": photo_data,  # Send base64 string in response
+        "created_at": record.created_at,
+        "predicted_class": record.predicted_class,
+        "confidence": record.confidence,
+        "class_probabilities": record.class_probabilities
+    }
+
 @router.post("/predict")
 async def create_and_train_child_record(
+    response: Response,
     name: str = Form(...),
     sex: int = Form(...),
     age: int = Form(...),
     height: float = Form(...),
     weight: float = Form(...),
-    height_for_age_z: float = Form(...),
-    weight_for_height_z: float = Form(...),
-    weight_for_age_z: float = Form(...),
+    height_for_age_z: Optional[float] = Form(None),
+    weight_for_height_z: Optional[float] = Form(None),
+    weight_for_age_z: Optional[float] = Form(None),
     whr: float = Form(...),
     photo_data: UploadFile = File(...),
+    idempotency_key: Optional[str] = Header(None, max_length=MAX_KEY_LENGTH),
     db: Session = Depends(get_db)
 ):
     """
     Stores child health data in the database, trains the model with the data, and saves the prediction results.
+
+    Clients that retry should send an Idempotency-Key header: a repeat of a
+    request that already succeeded gets the original response back
+    (with Idempotent-Replayed: true) without re-running the model or adding a record.
     """
+    claim = None
+    new_photo_hash = None
     try:
         # Convert sex from numeric (0/1) to string (Female/Male) for database storage
         sex_str = "Male" if sex == 1 else "Female"
 
-        # Calculate BMI
-        height_in_meters = height / 100  # Convert height to meters
-        bmi = weight / (height_in_meters ** 2)  # BMI formula
-
-        # Read and convert image to base64
+        # Read the image; convert memoryview to bytes before hashing
         image_content = await photo_data.read()
-        # Convert memoryview to bytes before base64 encoding
         image_bytes = bytes(image_content)
-        base64_image = base64.b64encode(image_bytes).decode('utf-8')
-        
-        # Prepare data for ML model
-        sex_numeric = 1 if sex == 1 else 0
-        features = [
-            sex_numeric,
-            age,
-            height,
-            weight,
-            height_for_age_z,
-            weight_for_height_z,
-            weight_for_age_z,
-            height_in_meters,
-            bmi,
-            whr
-        ]
+        base64_image = encode_photo_base64(image_bytes)
+        photo_hash = PhotoStore.hash_bytes(image_bytes)
+
+        if idempotency_key is not None:
+            fields = {
+                "name": name, "sex": sex, "age": age, "height": height, "weight": weight,
+                "height_for_age_z": height_for_age_z, "weight_for_height_z": weight_for_height_z,
+                "weight_for_age_z": weight_for_age_z, "whr": whr
+            }
+            request_hash = request_fingerprint(fields, photo_hash)
+            while True:
+                claim, replay_id = await run_in_threadpool(claim_idempotency_key, db, idempotency_key, request_hash)
+                if claim is not None:
+                    break
+                record = await run_in_threadpool(db.get, ChildHealthRecord, replay_id)
+                if record is not None:
+                    response.headers["Idempotent-Replayed"] = "true"
+                    return _record_response(record, base64_image)
+                # The record was deleted since; there is nothing to replay, so process the request again
+                await run_in_threadpool(forget_idempotency_key, db, idempotency_key, replay_id)
+
+        # Compute any z-score the client left out from the WHO growth standards
+        if None in (height_for_age_z, weight_for_height_z, weight_for_age_z):
+            computed_hfa, computed_wfh, computed_wfa = compute_child_zscores(sex, age, height, weight)
+            if height_for_age_z is None:
+                height_for_age_z = computed_hfa
+            if weight_for_height_z is None:
+                weight_for_height_z = computed_wfh
+            if weight_for_age_z is None:
+                weight_for_age_z = computed_wfa
+            scores = (height_for_age_z, weight_for_height_z, weight_for_age_z)
+            unknown = [field for field, score in zip(ZSCORE_FIELDS, scores) if score is None]
+            if unknown:
+                raise ValueError(f"Outside the WHO growth reference range; send {', '.join(unknown)} explicitly")
+
+        # Prepare data for ML model (height in meters and BMI are derived here)
+        features = build_features(
+            sex, age, height, weight, height_for_age_z, weight_for_height_z, weight_for_age_z, whr
+        )
+        height_in_meters, bmi = features[7], features[8]
+
+        # Get prediction from ML model; concurrent requests are scored together on the inference pool
+        predicted_class, confidence, class_probabilities = await inference_batcher.predict(features)
 
-        # Get prediction from ML model
-        predicted_class, confidence, class_probabilities = predict_malnutrition(features)
+        # Store the image by content hash once the prediction succeeded; identical photos are kept once
+        new_photo_hash = await run_in_threadpool(_store_new_photo, image_bytes)
+        photo_content_type = detect_content_type(image_bytes, photo_data.content_type)
 
         # Create a new child health record
         new_record = ChildHealthRecord(
@@ -102,40 +255,26 @@ async def create_and_train_child_record(
             bmi=bmi,
             whr=whr,
             created_at=datetime.datetime.utcnow(),
-            photo_data=base64_image,  # Store base64 string
+            photo_hash=photo_hash,
+            photo_content_type=photo_content_type,
             predicted_class=predicted_class,
             confidence=confidence,
             class_probabilities=class_probabilities
         )
         
-        # Add to database and commit
-        db.add(new_record)
-        db.commit()
-        db.refresh(new_record)
+        # Add to database and commit on a worker thread; the sync driver would block the loop
+        await run_in_threadpool(_save_record, db, new_record, claim)
+        claim = new_photo_hash = None
 
         # Create response with base64 image data
-        response_data = {
-            "id": new_record.id,
-            "name": new_record.name,
-            "sex": new_record.sex,
-            "age": new_record.age,
-            "height": new_record.height,
-            "weight": new_record.weight,
-            "height_for_age_z": new_record.height_for_age_z,
-            "weight_for_height_z": new_record.weight_for_height_z,
-            "weight_for_age_z": new_record.weight_for_age_z,
-            "height_m": new_record.height_m,
-            "bmi": new_record.bmi,
-            "whr": new_record.whr,
-            "photo_data": base64_image,  # Send base64 string in response
-            "created_at": new_record.created_at,
-            "predicted_class": new_record.predicted_class,
-            "confidence": new_record.confidence,
-            "class_probabilities": new_record.class_probabilities
-        }
-
-        return response_data
+        return _record_response(new_record, base64_image)
 
+    except IdempotencyKeyInProgress as e:
+        raise HTTPException(status_code=409, detail=str(e), headers={"Retry-After": "1"})
+    except IdempotencyKeyReused as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except InferenceQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
     except ValidationError as e:
         raise HTTPException(status_code=422, detail=f"Validation error: {str(e)}")
     except ValueError as e:
@@ -143,15 +282,161 @@ async def create_and_train_child_record(
     except Exception as e:
         logging.error(f"Error: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="An error occurred. Please try again.")
+    finally:
+        # The request failed after claiming its key; free it so the client can retry
+        if claim is not None:
+            await run_in_threadpool(release_idempotency_key, db, claim)
+        # Nor should it leave behind a photo that no record refers to
+        if new_photo_hash is not None:
+            await run_in_threadpool(_discard_unreferenced_photo, db, new_photo_hash)
+
+def _save_batch(db: Session, records: List[ChildHealthRecord]) -> List[Dict[str, Any]]:
+    """
+    Inserts many records with a single flush and returns their summaries.
+    """
+    # Single flush: the ORM batches these into one multi-row INSERT.
+    # Results are read before commit so the expired rows are not re-selected.
+    db.add_all(records)
+    db.flush()
+    add_to_record_stats(db, records)
+
+    results = [
+        {
+            "index": index,
+            "id": record.id,
+            "name": record.name,
+            "predicted_class": record.predicted_class,
+            "confidence": record.confidence,
+            "class_probabilities": record.class_probabilities
+        }
+        for index, record in enumerate(records)
+    ]
+    db.commit()
+    return results
+
+def _read_csv_rows(text: str) -> List[Dict[str, Any]]:
+    """
+    Parses CSV batch rows. An empty z-score cell means "compute it", like leaving the field out of JSON.
+    """
+    rows = list(csv.DictReader(text.splitlines()))
+    for row in rows:
+        for field in ZSCORE_FIELDS:
+            if isinstance(row.get(field), str) and not row[field].strip():
+                row[field] = None
+    return rows
+
+async def _read_batch_rows(request: Request) -> List[Dict[str, Any]]:
+    """
+    Reads batch rows from a JSON body or from an uploaded CSV file.
+    """
+    content_type = request.headers.get("content-type", "")
+
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        upload = form.get("file")
+        if upload is None or isinstance(upload, str):
+            raise ValueError("Multipart batch uploads must include a CSV 'file' field")
+        text = (await upload.read()).decode("utf-8-sig")
+        return _read_csv_rows(text)
+
+    if content_type.startswith("text/csv"):
+        text = (await request.body()).decode("utf-8-sig")
+        return _read_csv_rows(text)
+
+    payload = await request.json()
+    if isinstance(payload, dict):
+        payload = payload.get("children")
+    if not isinstance(payload, list):
+        raise ValueError("JSON batch body must be a list of children or {\"children\": [...]}")
+    return payload
+
+@router.post("/predict/batch")
+async def create_child_records_batch(request: Request, db: Session = Depends(get_db)):
+    """
+    Scores many children with a single model call and stores all records in one bulk insert.
+    Accepts a JSON list of children or a CSV upload with the same columns as ChildCreate.
+    """
+    try:
+        rows = await _read_batch_rows(request)
+        if len(rows) > MAX_BATCH_SIZE:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Batch too large: {len(rows)} rows (maximum is {MAX_BATCH_SIZE})"
+            )
+
+        # Validate every row before touching the model
+        children = []
+        errors = []
+        for index, row in enumerate(rows):
+            try:
+                children.append(ChildCreate(**row))
+            except (ValidationError, TypeError) as e:
+                errors.append({"index": index, "error": str(e)})
+        if errors:
+            raise HTTPException(status_code=422, detail={"invalid_rows": errors})
+
+        # Missing z-scores for the whole batch are computed in one pass
+        errors = fill_zscores(children)
+        if errors:
+            raise HTTPException(status_code=422, detail={"invalid_rows": errors})
+
+        features = [
+            build_features(
+                child.sex, child.age, child.height, child.weight, child.height_for_age_z,
+                child.weight_for_height_z, child.weight_for_age_z, child.whr
+            )
+            for child in children
+        ]
+
+        # One model evaluation for the whole batch, on the inference pool
+        predictions = await inference_executor.run(predict_malnutrition_batch, features)
+
+        created_at = datetime.datetime.utcnow()
+        new_records = [
+            ChildHealthRecord(
+                name=child.name,
+                sex="Male" if child.sex == 1 else "Female",
+                age=child.age,
+                height=child.height,
+                weight=child.weight,
+                height_for_age_z=child.height_for_age_z,
+                weight_for_height_z=child.weight_for_height_z,
+                weight_for_age_z=child.weight_for_age_z,
+                height_m=row_features[7],
+                bmi=row_features[8],
+                whr=child.whr,
+                created_at=created_at,
+                predicted_class=predicted_class,
+                confidence=confidence,
+                class_probabilities=class_probabilities
+            )
+            for child, row_features, (predicted_class, confidence, class_probabilities)
+            in zip(children, features, predictions)
+        ]
+
+        results = await run_in_threadpool(_save_batch, db, new_records)
+        return {"count": len(results), "results": results}
+
+    except HTTPException:
+        raise
+    except InferenceQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        db.rollback()
+        logging.error(f"Batch prediction error: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="An error occurred. Please try again.")
 
 @router.get("/child/{child_id}", response_model=List[ChildHealthResponse])
-async def get_child_predictions(child_id: int, db: Session = Depends(get_db)):
+async def get_child_predictions(child_id: int, db: AsyncSession = Depends(get_async_db)):
     """
     Retrieves all health records for a specific child and their prediction classes.
     """
     try:
         # Fetch all health records for the specified child_id
-        records = db.query(ChildHealthRecord).filter(ChildHealthRecord.id == child_id).all()
+        result = await db.execute(select(ChildHealthRecord).filter(ChildHealthRecord.id == child_id))
+        records = result.scalars().all()
         
         if not records:
             raise HTTPException(status_code=404, detail="Child health records not found")
@@ -159,10 +444,8 @@ async def get_child_predictions(child_id: int, db: Session = Depends(get_db)):
         predictions = []
 
         for record in records:
-            # Convert photo_data to base64 string if it exists
-            photo_data = record.photo_data
-            if isinstance(photo_data, (bytes, memoryview)):
-                photo_data = base64.b64encode(bytes(photo_data)).decode('utf-8')
+            # Load the photo from the photo store as a base64 string if it exists
+            photo_data = await run_in_threadpool(read_photo_base64, record.photo_hash)
 
             prediction = ChildHealthResponse(
                 id=record.id,
@@ -188,6 +471,8 @@ async def get_child_predictions(child_id: int, db: Session = Depends(get_db)):
 
         return predictions
 
+    except HTTPException:
+        raise
     except ValidationError as e:
         raise HTTPException(status_code=422, detail=f"Validation error: {str(e)}")
     except ValueError as e:
@@ -196,23 +481,92 @@ async def get_child_predictions(child_id: int, db: Session = Depends(get_db)):
         logging.error(f"Prediction error: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="Prediction error")
 
+def _http_date(value: datetime.datetime) -> str:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=datetime.timezone.utc)
+    return email.utils.format_datetime(value.astimezone(datetime.timezone.utc), usegmt=True)
+
+
+def _not_modified(request: Request, etag: str, last_modified: Optional[datetime.datetime]) -> bool:
+    """Whether the client's cached copy, described by its conditional headers, is still current"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-Modified-Since is ignored when If-None-Match is present (RFC 9110 13.1.3)
+        candidates = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in candidates or any(tag[2:] == etag if tag.startswith("W/") else tag == etag for tag in candidates)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        since = email.utils.parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=datetime.timezone.utc)
+    if last_modified.tzinfo is None:
+        last_modified = last_modified.replace(tzinfo=datetime.timezone.utc)
+    # HTTP dates have one-second resolution
+    return last_modified.replace(microsecond=0) <= since
+
+
 @router.get("/image/{child_id}")
-async def get_image(child_id: int, db: Session = Depends(get_db)):
+async def get_image(
+    child_id: int,
+    request: Request,
+    size: str = Query("full", pattern="^(64|256|full)$"),
+    db: AsyncSession = Depends(get_async_db)
+):
     """
     Retrieves and serves the image for a specific child record.
+
+    size=64 or size=256 serves a JPEG thumbnail whose longest edge is that many
+    pixels; thumbnails are generated on first request and kept in the photo store.
+    Responses carry an ETag and Last-Modified so browsers can revalidate with a 304.
     """
     try:
-        # Get the child record from the database
-        child_record = db.query(ChildHealthRecord).filter(ChildHealthRecord.id == child_id).first()
-        
-        if not child_record or not child_record.photo_data:
+        # Only the photo key is needed, not the whole record
+        result = await db.execute(
+            select(
+                ChildHealthRecord.photo_hash,
+                ChildHealthRecord.photo_content_type,
+                ChildHealthRecord.created_at
+            )
+            .filter(ChildHealthRecord.id == child_id)
+        )
+        child_record = result.first()
+
+        store = get_photo_store()
+        if not child_record or not child_record.photo_hash or not store.exists(child_record.photo_hash):
             raise HTTPException(status_code=404, detail="Image not found")
-        
-        # Convert base64 back to image data
-        image_data = base64.b64decode(child_record.photo_data)
-        
-        # Return the image with appropriate content type
-        return Response(content=image_data, media_type="image/jpeg")
+
+        # The photo is content-addressed, so its hash and the size identify the bytes exactly
+        etag = f'"{child_record.photo_hash}-{size}"'
+        headers = {"ETag": etag, "Cache-Control": f"private, max-age={IMAGE_CACHE_MAX_AGE}"}
+        if child_record.created_at is not None:
+            headers["Last-Modified"] = _http_date(child_record.created_at)
+        if _not_modified(request, etag, child_record.created_at):
+            return Response(status_code=304, headers=headers)
+
+        variant = None
+        media_type = child_record.photo_content_type or "image/jpeg"
+        if size != "full":
+            try:
+                variant = await run_in_threadpool(ensure_thumbnail, store, child_record.photo_hash, int(size))
+                media_type = THUMBNAIL_CONTENT_TYPE
+            except UnidentifiedImageError:
+                # Not something Pillow can decode; serve the original rather than fail
+                logging.warning(f"Cannot make a thumbnail of the photo for child {child_id}")
+
+        # Stream the image straight from the store
+        path = store.local_path(child_record.photo_hash, variant)
+        if path is not None:
+            return FileResponse(path, media_type=media_type, headers=headers)
+        return StreamingResponse(
+            store.iter_chunks(child_record.photo_hash, variant), media_type=media_type, headers=headers
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Error retrieving image: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="Error retrieving image")
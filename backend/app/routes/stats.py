@@ -0,0 +1,37 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from app.database.database import get_async_db
+from app.models.child_record_stats import ChildRecordStats
+from app.utils.record_stats import summarize_record_stats, week_start
+import datetime
+import logging
+
+router = APIRouter()
+
+@router.get("/stats")
+async def get_stats(
+    created_from: Optional[datetime.date] = Query(None, description="Only weeks ending on or after this date"),
+    created_to: Optional[datetime.date] = Query(None, description="Only weeks starting on or before this date"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Dashboard statistics: record counts by predicted class, sex, age band and
+    week, and mean z-scores.
+
+    Served from the child_record_stats summary table, which every insert
+    updates, so the cost does not grow with the number of records. Date
+    filters select whole weeks (Monday to Sunday).
+    """
+    try:
+        query = select(ChildRecordStats)
+        if created_from is not None:
+            query = query.filter(ChildRecordStats.week_start >= week_start(created_from))
+        if created_to is not None:
+            query = query.filter(ChildRecordStats.week_start <= created_to)
+        rows = (await db.execute(query)).scalars().all()
+        return summarize_record_stats(rows)
+    except Exception as e:
+        logging.error(f"Error computing statistics: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Error computing statistics: {str(e)}")
@@ -0,0 +1,295 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from pydantic import Field, ValidationError, field_validator
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from starlette.datastructures import UploadFile
+from typing import Any, Dict, List, Optional, Tuple
+from app.config import SYNC_COMMIT_CHUNK_SIZE, SYNC_MAX_RECORDS
+from app.models.child_health_record import ChildHealthRecord
+from app.models.idempotency_key import IdempotencyKey
+from app.models.ml_model import predict_malnutrition_batch
+from app.database.database import get_db
+from app.routes.prediction import ChildCreate, build_features, fill_zscores
+from app.utils.executor import InferenceQueueFull, inference_executor
+from app.utils.idempotency import MAX_KEY_LENGTH, request_fingerprint
+from app.utils.photo_store import PhotoStore, detect_content_type, get_photo_store
+from app.utils.record_stats import add_to_record_stats
+import datetime
+import json
+import logging
+
+router = APIRouter()
+
+# Synced records share the idempotency table with /predict under their own prefix
+SYNC_KEY_PREFIX = "sync:"
+
+class SyncRecord(ChildCreate):
+    client_id: str = Field(
+        ..., min_length=1, max_length=MAX_KEY_LENGTH - len(SYNC_KEY_PREFIX),
+        description="Identifier the device gave the record; re-sent records with the same id are not stored twice"
+    )
+    photo: Optional[str] = Field(None, description="Filename of the record's photo among the uploaded files")
+    measured_at: Optional[datetime.datetime] = Field(None, description="When the child was measured on the device")
+
+    @field_validator("measured_at")
+    @classmethod
+    def to_naive_utc(cls, value: Optional[datetime.datetime]) -> Optional[datetime.datetime]:
+        """created_at holds naive UTC, so a device's offset is applied rather than dropped"""
+        if value is None or value.tzinfo is None:
+            return value
+        return value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+
+async def _read_sync_upload(request: Request) -> Tuple[List[Any], Dict[str, UploadFile]]:
+    """
+    Reads the records and photos of a sync upload.
+
+    Accepts multipart/form-data with a "records" JSON array and any number of
+    "photos" files, an NDJSON body (one record per line), or a JSON array /
+    {"records": [...]} body without photos.
+    """
+    content_type = request.headers.get("content-type", "")
+
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        records = form.get("records")
+        if records is None:
+            raise ValueError("Multipart sync uploads must include a 'records' field")
+        if not isinstance(records, str):
+            records = (await records.read()).decode("utf-8")
+        photos = {
+            upload.filename: upload for upload in form.getlist("photos")
+            if not isinstance(upload, str) and upload.filename
+        }
+        payload = json.loads(records)
+    elif content_type.startswith(("application/x-ndjson", "application/ndjson")):
+        # Parse line by line as the body arrives instead of buffering a single JSON document
+        payload = []
+        buffer = b""
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            payload.extend(json.loads(line) for line in lines if line.strip())
+        if buffer.strip():
+            payload.append(json.loads(buffer))
+        photos = {}
+    else:
+        payload = await request.json()
+        photos = {}
+
+    if isinstance(payload, dict):
+        payload = payload.get("records")
+    if not isinstance(payload, list):
+        raise ValueError("Sync uploads must contain a list of records")
+    return payload, photos
+
+def _existing_keys(db: Session, keys: List[str]) -> Dict[str, IdempotencyKey]:
+    """
+    Looks up which of the records' keys were already synced, in one query.
+    """
+    rows = db.query(IdempotencyKey).filter(IdempotencyKey.key.in_(keys)).all()
+    return {row.key: row for row in rows}
+
+def _insert_chunk(db: Session, records: List[Dict[str, Any]], keys: List[Dict[str, Any]]):
+    """
+    Inserts one chunk of records, their sync keys and their share of the
+    dashboard statistics in a single transaction.
+    """
+    # return_defaults fills in each mapping's generated id so the keys can point at it
+    db.bulk_insert_mappings(ChildHealthRecord, records, return_defaults=True)
+    for key, record in zip(keys, records):
+        key["record_id"] = record["id"]
+    db.bulk_insert_mappings(IdempotencyKey, keys)
+    add_to_record_stats(db, records)
+    db.commit()
+
+async def _ingest_chunk(db: Session, chunk: List[Tuple[int, SyncRecord]],
+                        photos: Dict[str, UploadFile], manifest: List[Optional[Dict[str, Any]]]):
+    """
+    Scores and stores one chunk of validated records, filling in their manifest entries.
+    """
+    photo_bytes = {}
+    for _, record in chunk:
+        if record.photo is not None and record.photo not in photo_bytes:
+            upload = photos[record.photo]
+            await upload.seek(0)
+            photo_bytes[record.photo] = bytes(await upload.read())
+
+    fingerprints = {
+        record.client_id: request_fingerprint(
+            record.model_dump(exclude={"photo"}),
+            PhotoStore.hash_bytes(photo_bytes[record.photo]) if record.photo is not None else None
+        )
+        for _, record in chunk
+    }
+
+    # A concurrent sync of the same records makes the key insert fail; look again and retry once
+    for attempt in range(2):
+        existing = await run_in_threadpool(
+            _existing_keys, db, [SYNC_KEY_PREFIX + record.client_id for _, record in chunk]
+        )
+        pending = []
+        for index, record in chunk:
+            previous = existing.get(SYNC_KEY_PREFIX + record.client_id)
+            if previous is None:
+                pending.append((index, record))
+            elif previous.request_hash != fingerprints[record.client_id]:
+                manifest[index] = {
+                    "index": index, "client_id": record.client_id, "status": "conflict",
+                    "id": previous.record_id, "error": "client_id was already synced with different data"
+                }
+            else:
+                manifest[index] = {
+                    "index": index, "client_id": record.client_id, "status": "duplicate", "id": previous.record_id
+                }
+        if not pending:
+            return
+
+        features = [
+            build_features(
+                record.sex, record.age, record.height, record.weight, record.height_for_age_z,
+                record.weight_for_height_z, record.weight_for_age_z, record.whr
+            )
+            for _, record in pending
+        ]
+        predictions = await inference_executor.run(predict_malnutrition_batch, features)
+
+        store = get_photo_store()
+        photo_hashes = await run_in_threadpool(
+            lambda: {name: store.put(data) for name, data in photo_bytes.items()}
+        )
+
+        now = datetime.datetime.utcnow()
+        records = []
+        keys = []
+        for (index, record), row_features, (predicted_class, confidence, class_probabilities) in zip(
+            pending, features, predictions
+        ):
+            records.append({
+                "name": record.name,
+                "sex": "Male" if record.sex == 1 else "Female",
+                "age": record.age,
+                "height": record.height,
+                "weight": record.weight,
+                "height_for_age_z": record.height_for_age_z,
+                "weight_for_height_z": record.weight_for_height_z,
+                "weight_for_age_z": record.weight_for_age_z,
+                "height_m": row_features[7],
+                "bmi": row_features[8],
+                "whr": record.whr,
+                "created_at": record.measured_at or now,
+                "photo_hash": photo_hashes.get(record.photo),
+                "photo_content_type": (
+                    detect_content_type(photo_bytes[record.photo]) if record.photo is not None else None
+                ),
+                "predicted_class": predicted_class,
+                "confidence": confidence,
+                "class_probabilities": class_probabilities
+            })
+            keys.append({
+                "key": SYNC_KEY_PREFIX + record.client_id,
+                "request_hash": fingerprints[record.client_id],
+                "created_at": now
+            })
+
+        try:
+            await run_in_threadpool(_insert_chunk, db, records, keys)
+        except IntegrityError:
+            await run_in_threadpool(db.rollback)
+            if attempt == 0:
+                continue
+            raise
+
+        for (index, record), stored in zip(pending, records):
+            manifest[index] = {
+                "index": index,
+                "client_id": record.client_id,
+                "status": "created",
+                "id": stored["id"],
+                "predicted_class": stored["predicted_class"],
+                "confidence": stored["confidence"]
+            }
+        return
+
+@router.post("/sync")
+async def sync_child_records(request: Request, db: Session = Depends(get_db)):
+    """
+    Bulk ingest for devices that collected records offline.
+
+    Every record is validated with the same rules as /predict, records are
+    scored in batches and committed SYNC_COMMIT_CHUNK_SIZE at a time. Records
+    whose client_id was synced before are reported as duplicates instead of
+    being stored again, so a device can safely re-send an interrupted upload.
+    The response lists the outcome of every record in upload order.
+    """
+    try:
+        rows, photos = await _read_sync_upload(request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if len(rows) > SYNC_MAX_RECORDS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many records: {len(rows)} (maximum is {SYNC_MAX_RECORDS})"
+        )
+
+    manifest: List[Optional[Dict[str, Any]]] = [None] * len(rows)
+    valid: List[Tuple[int, SyncRecord]] = []
+    first_index: Dict[str, int] = {}
+    for index, row in enumerate(rows):
+        client_id = row.get("client_id") if isinstance(row, dict) else None
+        try:
+            record = SyncRecord(**row)
+        except (ValidationError, TypeError) as e:
+            manifest[index] = {"index": index, "client_id": client_id, "status": "invalid", "error": str(e)}
+            continue
+        if record.photo is not None and record.photo not in photos:
+            manifest[index] = {
+                "index": index, "client_id": client_id, "status": "invalid",
+                "error": f"Photo {record.photo!r} was not uploaded"
+            }
+        elif record.client_id in first_index:
+            # Filled in from the first occurrence once that one is stored
+            continue
+        else:
+            first_index[record.client_id] = index
+            valid.append((index, record))
+
+    # Missing z-scores for every record are computed in one pass
+    zscore_errors = fill_zscores([record for _, record in valid])
+    rejected = set()
+    for error in zscore_errors:
+        index, record = valid[error["index"]]
+        manifest[index] = {"index": index, "client_id": record.client_id, "status": "invalid", "error": error["error"]}
+        rejected.add(index)
+    valid = [(index, record) for index, record in valid if index not in rejected]
+
+    for start in range(0, len(valid), SYNC_COMMIT_CHUNK_SIZE):
+        chunk = valid[start:start + SYNC_COMMIT_CHUNK_SIZE]
+        try:
+            await _ingest_chunk(db, chunk, photos, manifest)
+        except Exception as e:
+            # Earlier chunks stay committed; the device re-sends the failed ones
+            if not isinstance(e, InferenceQueueFull):
+                logging.error(f"Sync chunk failed: {str(e)}", exc_info=True)
+            await run_in_threadpool(db.rollback)
+            for index, record in chunk:
+                manifest[index] = {
+                    "index": index, "client_id": record.client_id, "status": "error",
+                    "error": "Could not be stored; sync this record again"
+                }
+
+    # Repeats of a client_id inside the upload report the first occurrence's outcome
+    for index, row in enumerate(rows):
+        if manifest[index] is None:
+            first = manifest[first_index[row["client_id"]]]
+            if first["status"] in ("created", "duplicate"):
+                manifest[index] = {
+                    "index": index, "client_id": row["client_id"], "status": "duplicate", "id": first["id"]
+                }
+            else:
+                manifest[index] = dict(first, index=index)
+
+    summary = {status: 0 for status in ("created", "duplicate", "conflict", "invalid", "error")}
+    for entry in manifest:
+        summary[entry["status"]] += 1
+    return {"received": len(rows), **summary, "records": manifest}
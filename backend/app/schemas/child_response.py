@@ -22,4 +22,25 @@ class ChildHealthResponse(BaseModel):
     class_probabilities: dict
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class ChildListItem(BaseModel):
+    """Row of the paginated children listing; only the requested fields are set"""
+    id: int
+    name: Optional[str] = None
+    sex: Optional[str] = None
+    age: Optional[int] = None
+    height: Optional[float] = None
+    weight: Optional[float] = None
+    height_for_age_z: Optional[float] = None
+    weight_for_height_z: Optional[float] = None
+    weight_for_age_z: Optional[float] = None
+    height_m: Optional[float] = None
+    bmi: Optional[float] = None
+    whr: Optional[float] = None
+    photo_url: Optional[str] = None  # Link to /api/image/{id}
+    photo_data: Optional[str] = None  # Base64 encoded string, only when asked for
+    created_at: Optional[datetime] = None
+    predicted_class: Optional[str] = None
+    confidence: Optional[float] = None
+    class_probabilities: Optional[dict] = None
@@ -0,0 +1,92 @@
+import asyncio
+from typing import Dict, List, Optional, Set, Tuple
+
+from app.config import INFERENCE_BATCH_WINDOW_MS, INFERENCE_MAX_BATCH_SIZE
+from app.models.ml_model import predict_malnutrition_batch
+from app.utils.executor import InferenceExecutor, inference_executor
+from app.utils.metrics import metrics
+
+BATCH_SIZE = metrics.histogram(
+    "nutriguard_inference_batch_size",
+    "Number of predictions scored together in one micro-batch",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256)
+)
+
+
+class InferenceBatcher:
+    """
+    Coalesces concurrent single predictions into one model call.
+
+    Each caller's features are queued and the caller awaits a future. The
+    queue is flushed when it reaches max_batch_size rows or window_ms after
+    the first row arrived, whichever comes first. The whole batch is scored
+    with one predict_proba call on the inference executor and the results are
+    handed back to the waiting coroutines.
+    """
+
+    def __init__(self, window_ms: float = INFERENCE_BATCH_WINDOW_MS,
+                 max_batch_size: int = INFERENCE_MAX_BATCH_SIZE,
+                 executor: InferenceExecutor = inference_executor):
+        self.window = window_ms / 1000.0
+        self.max_batch_size = max_batch_size
+        self.executor = executor
+        self._pending: List[Tuple[List, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # The loop only keeps weak references to tasks; without these an in-flight batch could be collected
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def predict(self, features: List) -> Tuple[str, float, Dict[str, float]]:
+        """
+        Queue one feature list for the next batch and wait for its prediction
+
+        Args:
+            features: Feature list in the order predict_malnutrition expects
+
+        Returns:
+            Tuple of predicted class, confidence and class probabilities
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((features, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._run_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def shutdown(self):
+        """Score whatever is still queued and wait for every in-flight batch to finish"""
+        self._flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _run_batch(self, batch: List[Tuple[List, asyncio.Future]]):
+        BATCH_SIZE.observe(len(batch))
+        try:
+            results = await self.executor.run(predict_malnutrition_batch, [features for features, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            # The caller may have gone away (client disconnect) while we were scoring
+            if not future.done():
+                future.set_result(result)
+
+
+# Create the shared batcher
+inference_batcher = InferenceBatcher()
@@ -0,0 +1,97 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+from app.utils.metrics import metrics
+
+CACHE_HITS = metrics.counter(
+    "nutriguard_cache_hits_total",
+    "Lookups answered from an in-process cache",
+    labelnames=("cache",)
+)
+CACHE_MISSES = metrics.counter(
+    "nutriguard_cache_misses_total",
+    "Lookups an in-process cache could not answer",
+    labelnames=("cache",)
+)
+CACHE_EVICTIONS = metrics.counter(
+    "nutriguard_cache_evictions_total",
+    "Entries dropped from an in-process cache, by reason (capacity, expired or cleared)",
+    labelnames=("cache", "reason")
+)
+CACHE_ENTRIES = metrics.gauge(
+    "nutriguard_cache_entries",
+    "Entries currently held by an in-process cache",
+    labelnames=("cache",)
+)
+
+_MISSING = object()
+
+
+class LRUCache:
+    """
+    Thread-safe least-recently-used cache with an optional time-to-live.
+
+    At most max_entries are kept; adding one more evicts the entry used least
+    recently. With ttl_seconds set, entries older than that are treated as
+    missing and dropped when next looked up. Hits, misses and evictions are
+    exported under the cache's name.
+    """
+
+    def __init__(self, name: str, max_entries: int, ttl_seconds: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        # key -> (stored_at, value), least recently used first
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for key, or default if it is missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is not _MISSING and self.ttl_seconds is not None \
+                    and self._clock() - entry[0] > self.ttl_seconds:
+                del self._entries[key]
+                CACHE_EVICTIONS.inc(cache=self.name, reason="expired")
+                CACHE_ENTRIES.set(len(self._entries), cache=self.name)
+                entry = _MISSING
+            if entry is _MISSING:
+                CACHE_MISSES.inc(cache=self.name)
+                return default
+            self._entries.move_to_end(key)
+        CACHE_HITS.inc(cache=self.name)
+        return entry[1]
+
+    def put(self, key: Hashable, value: Any):
+        """Store value under key, evicting the least recently used entry if the cache is full"""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (self._clock(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                CACHE_EVICTIONS.inc(cache=self.name, reason="capacity")
+            CACHE_ENTRIES.set(len(self._entries), cache=self.name)
+
+    def discard(self, key: Hashable):
+        """Drop one entry if it is cached"""
+        with self._lock:
+            if self._entries.pop(key, _MISSING) is not _MISSING:
+                CACHE_EVICTIONS.inc(cache=self.name, reason="cleared")
+                CACHE_ENTRIES.set(len(self._entries), cache=self.name)
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            if self._entries:
+                CACHE_EVICTIONS.inc(len(self._entries), cache=self.name, reason="cleared")
+            self._entries.clear()
+            CACHE_ENTRIES.set(0, cache=self.name)
@@ -0,0 +1,120 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from app.config import INFERENCE_QUEUE_SIZE, INFERENCE_WORKERS
+from app.utils.metrics import metrics
+
+INFERENCE_WAIT_SECONDS = metrics.histogram(
+    "nutriguard_inference_wait_seconds",
+    "Time inference jobs spend queued before a worker picks them up"
+)
+INFERENCE_RUN_SECONDS = metrics.histogram(
+    "nutriguard_inference_run_seconds",
+    "Time inference jobs spend running on a worker"
+)
+INFERENCE_REJECTED = metrics.counter(
+    "nutriguard_inference_rejected_total",
+    "Inference jobs rejected because the queue was full"
+)
+
+
+class InferenceQueueFull(RuntimeError):
+    """Raised when the inference queue has no room for another job"""
+
+
+class InferenceExecutor:
+    """
+    Bounded thread pool that keeps model inference off the asyncio event loop.
+
+    The trees release the GIL while scoring, so a thread pool gives real
+    parallelism and shares the one loaded model. At most max_workers jobs run
+    at once and at most max_queue wait behind them; beyond that jobs are
+    rejected with InferenceQueueFull instead of piling up.
+    """
+
+    def __init__(self, max_workers: int = INFERENCE_WORKERS, max_queue: int = INFERENCE_QUEUE_SIZE):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        self._counter_lock = threading.Lock()
+        self._submitted = 0
+        self._running = 0
+
+    @property
+    def queue_depth(self) -> int:
+        """Jobs submitted but not yet picked up by a worker"""
+        return self._submitted - self._running
+
+    @property
+    def running(self) -> int:
+        """Jobs currently running on a worker"""
+        return self._running
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="inference")
+            return self._pool
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run func(*args) on a worker thread and wait for the result
+
+        Raises:
+            InferenceQueueFull: If max_workers jobs are running and max_queue are waiting
+        """
+        with self._counter_lock:
+            if self._submitted >= self.max_workers + self.max_queue:
+                INFERENCE_REJECTED.inc()
+                raise InferenceQueueFull(
+                    f"Inference queue is full ({self.max_queue} waiting, {self.max_workers} running)"
+                )
+            self._submitted += 1
+        submitted_at = time.perf_counter()
+
+        def job():
+            started_at = time.perf_counter()
+            INFERENCE_WAIT_SECONDS.observe(started_at - submitted_at)
+            with self._counter_lock:
+                self._running += 1
+            try:
+                return func(*args)
+            finally:
+                INFERENCE_RUN_SECONDS.observe(time.perf_counter() - started_at)
+                with self._counter_lock:
+                    self._running -= 1
+                    self._submitted -= 1
+
+        future = self._get_pool().submit(job)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # Drop the job if it never started; a running job finishes on its own
+            if future.cancel():
+                with self._counter_lock:
+                    self._submitted -= 1
+            raise
+
+    def shutdown(self):
+        """Stop the worker threads; the pool is recreated on the next run()"""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True)
+                self._pool = None
+
+
+# Create the shared executor
+inference_executor = InferenceExecutor()
+
+metrics.gauge(
+    "nutriguard_inference_queue_depth",
+    "Inference jobs waiting for a worker"
+).set_function(lambda: inference_executor.queue_depth)
+metrics.gauge(
+    "nutriguard_inference_running",
+    "Inference jobs currently running"
+).set_function(lambda: inference_executor.running)
@@ -0,0 +1,144 @@
+import datetime
+import hashlib
+import json
+import threading
+import time
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.config import IDEMPOTENCY_KEY_TTL, IDEMPOTENCY_PENDING_TIMEOUT
+from app.models.idempotency_key import IdempotencyKey
+
+# Longest Idempotency-Key header accepted
+MAX_KEY_LENGTH = 255
+
+# Expired keys are purged at most this often per process (seconds)
+PURGE_INTERVAL = 60
+
+
+class IdempotencyKeyInProgress(RuntimeError):
+    """Raised when a request with the same key has not finished yet"""
+
+
+class IdempotencyKeyReused(ValueError):
+    """Raised when a key is sent again with a different request body"""
+
+
+class IdempotencyClaim(NamedTuple):
+    """
+    A request's hold on a key. A pending claim that outlives IDEMPOTENCY_PENDING_TIMEOUT
+    can be taken over by a retry, so completing or releasing it matches the exact row it created.
+    """
+    key: str
+    request_hash: str
+    created_at: datetime.datetime
+
+
+def request_fingerprint(fields: Dict[str, Any], photo_hash: Optional[str] = None) -> str:
+    """SHA-256 of the submitted fields and photo, to tell a retry from a different request"""
+    payload = json.dumps({"fields": fields, "photo_hash": photo_hash}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+_last_purge = 0.0
+_purge_lock = threading.Lock()
+
+def _purge_expired(db: Session, now: datetime.datetime):
+    global _last_purge
+    with _purge_lock:
+        if time.monotonic() - _last_purge < PURGE_INTERVAL:
+            return
+        _last_purge = time.monotonic()
+    db.query(IdempotencyKey).filter(
+        IdempotencyKey.created_at < now - datetime.timedelta(seconds=IDEMPOTENCY_KEY_TTL)
+    ).delete(synchronize_session=False)
+    db.commit()
+
+
+def _claimed_row(db: Session, claim: IdempotencyClaim):
+    return db.query(IdempotencyKey).filter(
+        IdempotencyKey.key == claim.key,
+        IdempotencyKey.request_hash == claim.request_hash,
+        IdempotencyKey.created_at == claim.created_at
+    )
+
+
+def claim_idempotency_key(
+    db: Session, key: str, request_hash: str
+) -> Tuple[Optional[IdempotencyClaim], Optional[int]]:
+    """
+    Reserve a key for this request, or find the record an earlier request with it created
+
+    The key's primary key makes the claim atomic: of several concurrent
+    requests with one key, exactly one inserts the row and goes on to do the work.
+
+    Returns:
+        (claim, None) if this request now owns the key, or (None, id of the record to replay)
+
+    Raises:
+        IdempotencyKeyInProgress: If another request holds the key and has not finished
+        IdempotencyKeyReused: If the key was used for a different request
+    """
+    now = datetime.datetime.utcnow()
+    _purge_expired(db, now)
+
+    while True:
+        try:
+            db.add(IdempotencyKey(key=key, request_hash=request_hash, created_at=now))
+            db.commit()
+            return IdempotencyClaim(key, request_hash, now), None
+        except IntegrityError:
+            db.rollback()
+
+        existing = db.query(IdempotencyKey).filter(IdempotencyKey.key == key).first()
+        if existing is None:
+            # Released or purged between our insert and select; try again
+            continue
+
+        age = (now - existing.created_at).total_seconds()
+        abandoned = existing.record_id is None and age > IDEMPOTENCY_PENDING_TIMEOUT
+        if age > IDEMPOTENCY_KEY_TTL or abandoned:
+            # Expired, or its request looks dead; the key is free again.
+            # If that request was only slow, its completion no longer matches the row and fails.
+            db.query(IdempotencyKey).filter(
+                IdempotencyKey.key == key, IdempotencyKey.created_at == existing.created_at
+            ).delete(synchronize_session=False)
+            db.commit()
+            continue
+
+        if existing.request_hash != request_hash:
+            raise IdempotencyKeyReused("Idempotency-Key was already used with a different request")
+        if existing.record_id is None:
+            raise IdempotencyKeyInProgress("A request with this Idempotency-Key is still being processed")
+        return None, existing.record_id
+
+
+def complete_idempotency_key(db: Session, claim: IdempotencyClaim, record_id: int):
+    """
+    Point the claimed key at its record; call before committing the record's transaction
+
+    Raises:
+        IdempotencyKeyInProgress: If a retry took the key over after this claim timed out
+    """
+    updated = _claimed_row(db, claim).filter(IdempotencyKey.record_id.is_(None)).update(
+        {IdempotencyKey.record_id: record_id}, synchronize_session=False
+    )
+    if updated == 0:
+        raise IdempotencyKeyInProgress("This request's Idempotency-Key was taken over by a retry")
+
+
+def forget_idempotency_key(db: Session, key: str, record_id: int):
+    """Drop a completed key whose record no longer exists, so the request can run again"""
+    db.query(IdempotencyKey).filter(
+        IdempotencyKey.key == key, IdempotencyKey.record_id == record_id
+    ).delete(synchronize_session=False)
+    db.commit()
+
+
+def release_idempotency_key(db: Session, claim: IdempotencyClaim):
+    """Give up a claimed key after the request failed, so a retry can run"""
+    db.rollback()
+    _claimed_row(db, claim).filter(IdempotencyKey.record_id.is_(None)).delete(synchronize_session=False)
+    db.commit()
@@ -0,0 +1,200 @@
+import base64
+import hashlib
+import importlib
+import os
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from typing import BinaryIO, Iterator, Optional
+
+from app.config import PHOTO_STORE_BACKEND, PHOTO_STORE_DIR
+from app.utils.metrics import metrics
+
+# Read photos back in chunks of this many bytes when streaming them
+CHUNK_SIZE = 64 * 1024
+
+IMAGE_ENCODE_SECONDS = metrics.histogram(
+    "nutriguard_image_encode_seconds",
+    "Time spent encoding photos, by operation (base64 for API responses, thumbnail for resizing)",
+    labelnames=("operation",)
+)
+
+# Magic numbers for the image formats the field tablets produce
+_IMAGE_SIGNATURES = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+)
+
+
+def detect_content_type(data: bytes, declared: Optional[str] = None) -> str:
+    """Pick the photo's content type from its leading bytes, falling back to the declared one"""
+    for signature, content_type in _IMAGE_SIGNATURES:
+        if data.startswith(signature):
+            return content_type
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    if declared and declared.startswith("image/"):
+        return declared
+    return "image/jpeg"
+
+
+class PhotoStore(ABC):
+    """
+    Content-addressed storage for child photos.
+
+    Photos are keyed by the SHA-256 of their bytes, so storing the same photo
+    twice keeps a single copy. Only the hash is kept in the database.
+    Derived copies such as thumbnails are stored as named variants of the
+    original's hash.
+    """
+
+    @staticmethod
+    def hash_bytes(data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
+
+    @abstractmethod
+    def put(self, data: bytes) -> str:
+        """Store the photo if it is not there yet and return its hash"""
+
+    @abstractmethod
+    def put_variant(self, photo_hash: str, variant: str, data: bytes):
+        """Store a derived copy (e.g. a thumbnail) of the photo with this hash"""
+
+    @abstractmethod
+    def open(self, photo_hash: str, variant: Optional[str] = None) -> BinaryIO:
+        """Open a stored photo, or one of its variants, for reading"""
+
+    @abstractmethod
+    def exists(self, photo_hash: str, variant: Optional[str] = None) -> bool:
+        """Whether a photo (or the given variant of it) is stored"""
+
+    @abstractmethod
+    def delete(self, photo_hash: str):
+        """Remove a stored photo"""
+
+    def get(self, photo_hash: str, variant: Optional[str] = None) -> bytes:
+        """Read a whole stored photo"""
+        with self.open(photo_hash, variant) as f:
+            return f.read()
+
+    def iter_chunks(self, photo_hash: str, variant: Optional[str] = None) -> Iterator[bytes]:
+        """Stream a stored photo in chunks"""
+        with self.open(photo_hash, variant) as f:
+            while True:
+                chunk = f.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+
+    def local_path(self, photo_hash: str, variant: Optional[str] = None) -> Optional[str]:
+        """Filesystem path of the photo when the backend has one, so it can be sent with sendfile"""
+        return None
+
+
+class LocalPhotoStore(PhotoStore):
+    """Photo store on the local filesystem, sharded by the first bytes of the hash"""
+
+    def __init__(self, root: str = PHOTO_STORE_DIR):
+        self.root = root
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, photo_hash: str, variant: Optional[str] = None) -> str:
+        if len(photo_hash) != 64 or not all(c in "0123456789abcdef" for c in photo_hash):
+            raise ValueError(f"Invalid photo hash: {photo_hash!r}")
+        if variant is None:
+            return os.path.join(self.root, photo_hash[:2], photo_hash[2:4], photo_hash)
+        if not variant.isalnum():
+            raise ValueError(f"Invalid photo variant: {variant!r}")
+        return os.path.join(self.root, "variants", variant, photo_hash[:2], photo_hash)
+
+    def _write(self, path: str, data: bytes):
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        # Write to a temporary file and rename so readers never see a partial photo
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def put(self, data: bytes) -> str:
+        photo_hash = self.hash_bytes(data)
+        path = self._path(photo_hash)
+        if not os.path.exists(path):
+            self._write(path, data)
+        return photo_hash
+
+    def put_variant(self, photo_hash: str, variant: str, data: bytes):
+        self._write(self._path(photo_hash, variant), data)
+
+    def open(self, photo_hash: str, variant: Optional[str] = None) -> BinaryIO:
+        return open(self._path(photo_hash, variant), "rb")
+
+    def exists(self, photo_hash: str, variant: Optional[str] = None) -> bool:
+        return os.path.exists(self._path(photo_hash, variant))
+
+    def delete(self, photo_hash: str):
+        paths = [self._path(photo_hash)]
+        variants_dir = os.path.join(self.root, "variants")
+        if os.path.isdir(variants_dir):
+            paths.extend(self._path(photo_hash, variant) for variant in os.listdir(variants_dir))
+        for path in paths:
+            if os.path.exists(path):
+                os.unlink(path)
+
+    def local_path(self, photo_hash: str, variant: Optional[str] = None) -> Optional[str]:
+        path = self._path(photo_hash, variant)
+        return path if os.path.exists(path) else None
+
+
+def create_photo_store(backend: str = PHOTO_STORE_BACKEND) -> PhotoStore:
+    """
+    Build the configured photo store
+
+    Args:
+        backend: "local", or "package.module:ClassName" for a custom PhotoStore subclass
+    """
+    if backend == "local":
+        return LocalPhotoStore()
+    module_name, _, class_name = backend.partition(":")
+    if not class_name:
+        raise ValueError(f"Unknown photo store backend: {backend}")
+    store_class = getattr(importlib.import_module(module_name), class_name)
+    if not issubclass(store_class, PhotoStore):
+        raise ValueError(f"{backend} is not a PhotoStore")
+    return store_class()
+
+
+def encode_photo_base64(data: bytes) -> str:
+    """Photo bytes as a base64 string, the format API responses use"""
+    started_at = time.perf_counter()
+    encoded = base64.b64encode(data).decode("utf-8")
+    IMAGE_ENCODE_SECONDS.observe(time.perf_counter() - started_at, operation="base64")
+    return encoded
+
+
+def read_photo_base64(photo_hash: Optional[str]) -> Optional[str]:
+    """Load a stored photo as a base64 string"""
+    if not photo_hash:
+        return None
+    store = get_photo_store()
+    if not store.exists(photo_hash):
+        return None
+    return encode_photo_base64(store.get(photo_hash))
+
+
+# Singleton instance
+photo_store_instance = None
+
+def get_photo_store() -> PhotoStore:
+    """Get or create the photo store singleton"""
+    global photo_store_instance
+    if photo_store_instance is None:
+        photo_store_instance = create_photo_store()
+    return photo_store_instance
@@ -0,0 +1,205 @@
+import collections
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional
+
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse, PlainTextResponse
+
+from app.auth.auth_handler import auth_handler
+from app.config import PROFILE_DIR, PROFILE_REQUEST_RATE, PROFILE_SAMPLE_INTERVAL_MS
+from app.utils.metrics import metrics
+
+PROFILED_REQUESTS = metrics.counter(
+    "nutriguard_profiled_requests_total",
+    "Requests profiled, by trigger (header or sampled)",
+    labelnames=("trigger",)
+)
+
+PROFILE_HEADER = "x-profile"
+# X-Profile values: return the profile instead of the response, or save it and respond as usual
+PROFILE_MODES = ("collapsed", "save")
+
+# Leaf frames of threads waiting for work; samples ending in these are dropped
+IDLE_FRAMES = (
+    ("threading.py", "wait"),
+    ("selectors.py", "select"),
+    (os.path.join("concurrent", "futures", "thread.py"), "_worker"),
+)
+
+
+def _frame_label(code) -> str:
+    # Samples are grouped by function rather than line, so a flame graph shows one box per function
+    path = os.path.join(*code.co_filename.split(os.sep)[-2:])
+    return f"{code.co_name} ({path}:{code.co_firstlineno})"
+
+
+def _is_idle(frame) -> bool:
+    filename = frame.f_code.co_filename
+    name = frame.f_code.co_name
+    return any(filename.endswith(suffix) and name == idle for suffix, idle in IDLE_FRAMES)
+
+
+class StackSampler:
+    """
+    Samples the Python stacks of every thread in the process from a background thread.
+
+    Unlike cProfile, which only sees the thread it was enabled on, this also
+    sees the inference, auth and threadpool workers that do most of a
+    request's work. The flip side is that work for other requests running at
+    the same time is sampled too.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.samples: Dict[str, int] = collections.Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _sample(self):
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == threading.get_ident() or _is_idle(frame):
+                continue
+            stack: List[str] = []
+            while frame is not None:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            stack.append(names.get(ident, f"thread-{ident}"))
+            self.samples[";".join(reversed(stack))] += 1
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        # A request shorter than one interval would otherwise have no samples at all
+        self._sample()
+
+    def collapsed(self) -> str:
+        """The samples in the collapsed-stack format flamegraph.pl and speedscope read"""
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(self.samples.items()))
+
+
+def _is_admin(headers: Headers) -> bool:
+    scheme, _, token = headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    try:
+        auth_handler.get_current_admin(HTTPAuthorizationCredentials(scheme=scheme, credentials=token))
+    except HTTPException:
+        return False
+    return True
+
+
+def _profile_name(method: str, path: str) -> str:
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", path).strip("_") or "root"
+    return f"{time.strftime('%Y%m%dT%H%M%S')}-{method}-{slug}-{uuid.uuid4().hex[:8]}.collapsed"
+
+
+def _save_profile(directory: str, name: str, collapsed: str):
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, name), "w") as profile_file:
+        profile_file.write(collapsed)
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware that profiles requests on demand.
+
+    An admin sends "X-Profile: collapsed" to get the profile back instead of
+    the response (its status goes in X-Profiled-Status), or "X-Profile: save"
+    to get the normal response with the profile saved under X-Profile-File.
+    A sample_rate fraction of all requests is profiled and saved as well.
+    One request is profiled at a time; others run unprofiled meanwhile.
+    """
+
+    def __init__(self, app, sample_rate: float = PROFILE_REQUEST_RATE,
+                 interval_ms: float = PROFILE_SAMPLE_INTERVAL_MS, directory: str = PROFILE_DIR):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.interval = interval_ms / 1000
+        self.directory = directory
+        self._busy = threading.Lock()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        mode = Headers(scope=scope).get(PROFILE_HEADER)
+        if mode is not None:
+            if mode not in PROFILE_MODES:
+                response = JSONResponse(
+                    {"detail": f"X-Profile must be one of: {', '.join(PROFILE_MODES)}"}, status_code=400
+                )
+                await response(scope, receive, send)
+                return
+            if not _is_admin(Headers(scope=scope)):
+                response = JSONResponse({"detail": "Profiling requires an admin token"}, status_code=403)
+                await response(scope, receive, send)
+                return
+            trigger = "header"
+        elif self.sample_rate > 0 and random.random() < self.sample_rate:
+            mode, trigger = "save", "sampled"
+        else:
+            await self.app(scope, receive, send)
+            return
+
+        if not self._busy.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+        try:
+            await self._profile(scope, receive, send, mode)
+        finally:
+            self._busy.release()
+        PROFILED_REQUESTS.inc(trigger=trigger)
+
+    async def _profile(self, scope, receive, send, mode: str):
+        name = _profile_name(scope["method"], scope["path"])
+        status = 500
+
+        async def send_profiled(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if mode == "save":
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-profile-file", name.encode("latin-1")))
+                    message = dict(message, headers=headers)
+            if mode == "save":
+                await send(message)
+
+        sampler = StackSampler(self.interval)
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_profiled)
+        finally:
+            # Joining the sampler waits up to one interval; do it off the event loop
+            await run_in_threadpool(sampler.stop)
+            if mode == "save":
+                await run_in_threadpool(_save_profile, self.directory, name, sampler.collapsed())
+
+        if mode == "collapsed":
+            response = PlainTextResponse(
+                sampler.collapsed(),
+                headers={
+                    "X-Profiled-Status": str(status),
+                    "Content-Disposition": f'attachment; filename="{name}"'
+                }
+            )
+            await response(scope, receive, send)
@@ -0,0 +1,204 @@
+import datetime
+from collections.abc import Mapping
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, delete, select, text, update
+from sqlalchemy.orm import Session
+
+from app.models.child_health_record import ChildHealthRecord
+from app.models.child_record_stats import ChildRecordStats
+from app.models.zscores import MONTHS_PER_YEAR
+
+# Age bands in months as in the WHO child growth reports, one per year of age since
+# records hold age in completed years (a 2-year-old is somewhere in 24-35 months)
+AGE_BANDS = ((0, 11), (12, 23), (24, 35), (36, 47), (48, 59))
+ZSCORE_FIELDS = ("height_for_age_z", "weight_for_height_z", "weight_for_age_z")
+UNKNOWN_CLASS = "Unknown"
+
+KEY_FIELDS = ("week_start", "predicted_class", "sex", "age_band")
+# Records are read this many at a time when the summary table is rebuilt
+REBUILD_BATCH_SIZE = 5000
+SUM_FIELDS = ("count",) + tuple(f"{field}_sum" for field in ZSCORE_FIELDS)
+
+
+def age_band(age_years: int) -> str:
+    """Label of the band an age in years falls in, e.g. "12-23" months for 1; "60+" from 5"""
+    age_months = age_years * MONTHS_PER_YEAR
+    for low, high in AGE_BANDS:
+        if age_months <= high:
+            return f"{low}-{high}"
+    return f"{AGE_BANDS[-1][1] + 1}+"
+
+
+def week_start(value: datetime.datetime) -> datetime.date:
+    """Monday of the week containing value"""
+    day = value.date() if isinstance(value, datetime.datetime) else value
+    return day - datetime.timedelta(days=day.weekday())
+
+
+def _field(record, name: str):
+    return record[name] if isinstance(record, Mapping) else getattr(record, name)
+
+
+def aggregate_records(records: Iterable[Any]) -> List[Dict[str, Any]]:
+    """
+    Summary rows for a set of child records
+
+    Args:
+        records: ChildHealthRecord objects or mappings of their columns, with created_at set
+
+    Returns:
+        One dict per (week, class, sex, age band) with the count and z-score sums,
+        sorted by key so concurrent writers lock the summary rows in the same order
+    """
+    groups: Dict[Tuple, Dict[str, Any]] = {}
+    for record in records:
+        key = (
+            week_start(_field(record, "created_at")),
+            _field(record, "predicted_class") or UNKNOWN_CLASS,
+            _field(record, "sex"),
+            age_band(_field(record, "age"))
+        )
+        row = groups.get(key)
+        if row is None:
+            row = groups[key] = dict(zip(KEY_FIELDS, key), **dict.fromkeys(SUM_FIELDS, 0))
+        row["count"] += 1
+        for field in ZSCORE_FIELDS:
+            row[f"{field}_sum"] += _field(record, field)
+    return [groups[key] for key in sorted(groups)]
+
+
+def add_to_record_stats(db: Session, records: Iterable[Any]):
+    """
+    Adds newly inserted records to the summary table, in the caller's transaction.
+
+    On PostgreSQL and SQLite each summary row is updated with a single upsert,
+    so concurrent inserts into the same week and group add up instead of
+    colliding on the primary key.
+    """
+    rows = aggregate_records(records)
+    if not rows:
+        return
+    table = ChildRecordStats.__table__
+    dialect = db.get_bind().dialect.name
+
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        statement = insert(table).values(rows)
+        statement = statement.on_conflict_do_update(
+            index_elements=list(KEY_FIELDS),
+            set_={field: table.c[field] + statement.excluded[field] for field in SUM_FIELDS}
+        )
+        db.execute(statement)
+        return
+
+    for row in rows:
+        result = db.execute(
+            update(table)
+            .where(and_(*(table.c[field] == row[field] for field in KEY_FIELDS)))
+            .values({field: table.c[field] + row[field] for field in SUM_FIELDS})
+        )
+        if result.rowcount == 0:
+            db.execute(table.insert().values(row))
+
+
+def _all_records(db: Session) -> Iterable[Dict[str, Any]]:
+    columns = [ChildHealthRecord.id, ChildHealthRecord.created_at, ChildHealthRecord.predicted_class,
+               ChildHealthRecord.sex, ChildHealthRecord.age]
+    columns += [getattr(ChildHealthRecord, field) for field in ZSCORE_FIELDS]
+    last_id = 0
+    while True:
+        rows = db.execute(
+            select(*columns).where(ChildHealthRecord.id > last_id)
+            .order_by(ChildHealthRecord.id).limit(REBUILD_BATCH_SIZE)
+        ).mappings().all()
+        if not rows:
+            return
+        for row in rows:
+            # Rows written before created_at had a default are counted in the current week, as the backfill did
+            if row["created_at"] is None:
+                row = dict(row, created_at=datetime.datetime.utcnow())
+            yield row
+        last_id = rows[-1]["id"]
+
+
+def rebuild_record_stats(db: Session) -> int:
+    """
+    Recomputes the summary table from every child record, in one transaction.
+
+    The table is only ever updated incrementally, so a record deleted by hand
+    or a write that failed halfway leaves it wrong until this runs. On
+    PostgreSQL the table is locked first: inserts wait at their summary update
+    and are added on top once the rebuild commits.
+
+    Returns:
+        The number of summary rows written
+    """
+    table = ChildRecordStats.__table__
+    try:
+        if db.get_bind().dialect.name == "postgresql":
+            db.execute(text(f"LOCK TABLE {table.name} IN EXCLUSIVE MODE"))
+        db.execute(delete(table))
+        rows = aggregate_records(_all_records(db))
+        if rows:
+            db.execute(table.insert(), rows)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return len(rows)
+
+
+def _zscore_means(totals: Dict[str, float]) -> Dict[str, Optional[float]]:
+    return {
+        field: totals[f"{field}_sum"] / totals["count"] if totals["count"] else None
+        for field in ZSCORE_FIELDS
+    }
+
+
+def summarize_record_stats(rows: Iterable[ChildRecordStats]) -> Dict[str, Any]:
+    """
+    The /api/stats response from summary rows: totals by class, sex, age band
+    and week, and mean z-scores overall and per week
+    """
+    totals = dict.fromkeys(SUM_FIELDS, 0)
+    by_class: Dict[str, int] = {}
+    by_sex: Dict[str, int] = {}
+    by_age_band: Dict[str, int] = {}
+    weeks: Dict[datetime.date, Dict[str, Any]] = {}
+
+    for row in rows:
+        for field in SUM_FIELDS:
+            totals[field] += getattr(row, field)
+        by_class[row.predicted_class] = by_class.get(row.predicted_class, 0) + row.count
+        by_sex[row.sex] = by_sex.get(row.sex, 0) + row.count
+        by_age_band[row.age_band] = by_age_band.get(row.age_band, 0) + row.count
+
+        week = weeks.get(row.week_start)
+        if week is None:
+            week = weeks[row.week_start] = {"totals": dict.fromkeys(SUM_FIELDS, 0), "by_class": {}}
+        for field in SUM_FIELDS:
+            week["totals"][field] += getattr(row, field)
+        week["by_class"][row.predicted_class] = week["by_class"].get(row.predicted_class, 0) + row.count
+
+    # Bands in age order, whatever order the summary rows come in
+    band_labels = [f"{low}-{high}" for low, high in AGE_BANDS] + [f"{AGE_BANDS[-1][1] + 1}+"]
+    return {
+        "total": totals["count"],
+        "by_class": by_class,
+        "by_sex": by_sex,
+        "by_age_band": {band: by_age_band[band] for band in band_labels if band in by_age_band},
+        "mean_zscores": _zscore_means(totals),
+        "by_week": [
+            {
+                "week_start": start.isoformat(),
+                "total": weeks[start]["totals"]["count"],
+                "by_class": weeks[start]["by_class"],
+                "mean_zscores": _zscore_means(weeks[start]["totals"])
+            }
+            for start in sorted(weeks)
+        ]
+    }
@@ -0,0 +1,81 @@
+import re
+import time
+from typing import Sequence
+
+from starlette.routing import BaseRoute, Match
+
+from app.utils.metrics import metrics
+
+HTTP_REQUESTS = metrics.counter(
+    "nutriguard_http_requests_total",
+    "Requests handled, by method, route template and status code",
+    labelnames=("method", "route", "status")
+)
+HTTP_REQUEST_SECONDS = metrics.histogram(
+    "nutriguard_http_request_duration_seconds",
+    "Time from receiving a request to sending the last byte of its response, by route template",
+    labelnames=("method", "route")
+)
+HTTP_REQUESTS_IN_FLIGHT = metrics.gauge(
+    "nutriguard_http_requests_in_flight",
+    "Requests currently being handled, by route template",
+    labelnames=("method", "route")
+)
+
+# Label for requests no API route matched, so stray paths do not each get their own series
+UNMATCHED_ROUTE = "unmatched"
+
+# The frontend fallback (/{full_path:path}) and the static mount at "/" match any path
+CATCH_ALL_TEMPLATE = re.compile(r"(/\{\w+:path\})?")
+
+
+def route_template(routes: Sequence[BaseRoute], scope) -> str:
+    """
+    The path template of the route that will handle the request, e.g. /api/image/{child_id}.
+    Requests that only the catch-all frontend routes match are labelled "unmatched",
+    so scans for missing paths stay apart from real traffic.
+    """
+    for route in routes:
+        match, _ = route.matches(scope)
+        if match is Match.FULL:
+            template = getattr(route, "path", "")
+            return UNMATCHED_ROUTE if CATCH_ALL_TEMPLATE.fullmatch(template) else template
+    return UNMATCHED_ROUTE
+
+
+class RequestMetricsMiddleware:
+    """
+    ASGI middleware that counts requests and times them per route template.
+
+    Labels use the template rather than the raw path so /api/child/1 and
+    /api/child/2 share one series.
+    """
+
+    def __init__(self, app, routes: Sequence[BaseRoute]):
+        self.app = app
+        # The application's live route list, so routes added at startup are matched too
+        self.routes = routes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = route_template(self.routes, scope)
+        status = 500
+        started_at = time.perf_counter()
+        HTTP_REQUESTS_IN_FLIGHT.inc(method=method, route=route)
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec(method=method, route=route)
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started_at, method=method, route=route)
+            HTTP_REQUESTS.inc(method=method, route=route, status=status)
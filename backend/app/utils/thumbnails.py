@@ -0,0 +1,48 @@
+import io
+import time
+
+from PIL import Image, ImageOps
+
+from app.utils.photo_store import IMAGE_ENCODE_SECONDS, PhotoStore
+
+# Longest edge, in pixels, of the thumbnails /api/image/{child_id} can serve
+THUMBNAIL_SIZES = (64, 256)
+THUMBNAIL_CONTENT_TYPE = "image/jpeg"
+
+
+def thumbnail_variant(size: int) -> str:
+    """Name under which a thumbnail is kept in the photo store"""
+    return f"thumb{size}"
+
+
+def make_thumbnail(data: bytes, size: int) -> bytes:
+    """
+    Shrink a photo so its longest edge is at most size pixels
+
+    Raises:
+        PIL.UnidentifiedImageError: If the bytes are not an image Pillow can read
+    """
+    started_at = time.perf_counter()
+    with Image.open(io.BytesIO(data)) as image:
+        # Phones store rotation in EXIF; bake it in before the metadata is dropped
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((size, size))
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        output = io.BytesIO()
+        image.save(output, format="JPEG", quality=85, optimize=True)
+    IMAGE_ENCODE_SECONDS.observe(time.perf_counter() - started_at, operation="thumbnail")
+    return output.getvalue()
+
+
+def ensure_thumbnail(store: PhotoStore, photo_hash: str, size: int) -> str:
+    """
+    Generate the thumbnail on first use and keep it in the store
+
+    Returns:
+        The variant name to read the thumbnail back with
+    """
+    variant = thumbnail_variant(size)
+    if not store.exists(photo_hash, variant):
+        store.put_variant(photo_hash, variant, make_thumbnail(store.get(photo_hash), size))
+    return variant
@@ -0,0 +1,378 @@
+import argparse
+import asyncio
+import base64
+import collections
+import datetime
+import io
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+import numpy as np
+import sqlalchemy as sa
+from PIL import Image
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from scripts.benchmark_inference import sample_features
+
+SCENARIOS = ("predict", "children", "image")
+# Metrics compared against a baseline run; throughput is the only one where higher is better
+COMPARED_METRICS = {"micro": ("median_ms",), "load": ("p50_ms", "p99_ms", "throughput_rps")}
+HIGHER_IS_BETTER = ("throughput_rps",)
+SEED_BATCH_SIZE = 5000
+
+
+def configure_environment(database_url, photo_dir):
+    """Point the app at the benchmark database and photo store; must run before app modules are imported"""
+    os.environ["DATABASE_URL"] = database_url
+    os.environ["PHOTO_STORE_DIR"] = photo_dir
+
+
+def sample_photo(size, seed=42):
+    """A JPEG about as large as a phone photo after the app's upload compression"""
+    rng = np.random.default_rng(seed)
+    width, height = size, size * 3 // 4
+    # Smooth gradients with some noise compress like a real photo rather than like pure noise
+    gradient = np.linspace(0, 255, width, dtype=np.float64)[None, :, None] * np.ones((height, 1, 3))
+    pixels = np.clip(gradient + rng.normal(0, 25, size=(height, width, 3)), 0, 255).astype(np.uint8)
+    output = io.BytesIO()
+    Image.fromarray(pixels).save(output, format="JPEG", quality=85)
+    return output.getvalue()
+
+
+def time_calls(func, inputs, rounds, setup=None):
+    """
+    Per-call wall time of func over every input, repeated for several rounds
+
+    Args:
+        func: Function called with each input
+        inputs: Inputs for one round
+        rounds: Number of rounds; the median round is reported
+        setup: Called before each round, outside the timing (e.g. to clear a cache)
+
+    Returns:
+        Dictionary with the call count and the median, min and max per-call time in milliseconds
+    """
+    per_call = []
+    for _ in range(rounds):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        for value in inputs:
+            func(value)
+        per_call.append((time.perf_counter() - start) / len(inputs))
+    return {
+        "calls": rounds * len(inputs),
+        "median_ms": float(np.median(per_call)) * 1e3,
+        "min_ms": min(per_call) * 1e3,
+        "max_ms": max(per_call) * 1e3
+    }
+
+
+def run_micro_benchmarks(n_samples, rounds, photo):
+    """
+    Time the model, the prediction cache and the photo base64 round trip
+
+    Args:
+        n_samples: Distinct feature rows per round
+        rounds: Rounds per benchmark
+        photo: JPEG bytes for the photo benchmarks
+
+    Returns:
+        Dictionary of benchmark name -> time_calls result
+    """
+    from app.models.ml_model import MalnutritionModel, predict_malnutrition, prediction_cache
+    from app.routes.prediction import build_features
+    from app.utils.photo_store import encode_photo_base64, get_photo_store, read_photo_base64
+
+    samples = sample_features(n_samples)
+    rows = [
+        build_features(f["Sex"], f["Age"], f["Height"], f["Weight"], f["height_for_age_z"],
+                       f["weight_for_height_z"], f["weight_for_age_z"], f["WHR"])
+        for f in samples
+    ]
+    native_model = MalnutritionModel(engine="native")
+    flat_model = MalnutritionModel(engine="flat")
+    photo_hash = get_photo_store().put(photo)
+
+    return {
+        "model.predict[native]": time_calls(native_model.predict, samples, rounds),
+        "model.predict[flat]": time_calls(flat_model.predict, samples, rounds),
+        "predict_malnutrition[uncached]": time_calls(predict_malnutrition, rows, rounds, setup=prediction_cache.clear),
+        "predict_malnutrition[cached]": time_calls(predict_malnutrition, rows, rounds),
+        "photo.base64_round_trip": time_calls(
+            lambda data: base64.b64decode(encode_photo_base64(data)), [photo] * n_samples, rounds
+        ),
+        "photo.read_photo_base64": time_calls(read_photo_base64, [photo_hash] * n_samples, rounds),
+    }
+
+
+def seed_records(engine, n_rows, photo):
+    """
+    Insert synthetic child records for the read scenarios
+
+    Every record points at the same stored photo, so /api/image serves real bytes.
+
+    Returns:
+        Ids of the inserted records
+    """
+    from app.models.child_health_record import ChildHealthRecord
+    from app.utils.photo_store import get_photo_store
+    from scripts.benchmark_queries import synthetic_rows
+
+    table = ChildHealthRecord.__table__
+    photo_hash = get_photo_store().put(photo)
+    batch = []
+    with engine.begin() as connection:
+        for row in synthetic_rows(n_rows):
+            batch.append(dict(row, photo_hash=photo_hash, photo_content_type="image/jpeg"))
+            if len(batch) == SEED_BATCH_SIZE:
+                connection.execute(table.insert(), batch)
+                batch = []
+        if batch:
+            connection.execute(table.insert(), batch)
+        return [row.id for row in connection.execute(sa.select(table.c.id))]
+
+
+def _percentiles_ms(latencies):
+    p50, p90, p99 = np.percentile(latencies, [50, 90, 99]) * 1e3
+    return {
+        "p50_ms": float(p50), "p90_ms": float(p90), "p99_ms": float(p99),
+        "mean_ms": float(np.mean(latencies)) * 1e3, "max_ms": float(np.max(latencies)) * 1e3
+    }
+
+
+def scenario_requests(scenario, count, photo, record_ids, seed=42):
+    """
+    Request keyword arguments for one scenario, each request distinct where the route allows
+
+    Returns:
+        List of dictionaries for httpx.AsyncClient.request
+    """
+    if scenario == "predict":
+        # Distinct children, so the prediction cache does not answer for the model
+        return [
+            {
+                "method": "POST", "url": "/api/predict",
+                "data": {
+                    "name": f"Benchmark {i}", "sex": str(f["Sex"]), "age": str(f["Age"]),
+                    "height": str(f["Height"]), "weight": str(f["Weight"]),
+                    "height_for_age_z": str(f["height_for_age_z"]),
+                    "weight_for_height_z": str(f["weight_for_height_z"]),
+                    "weight_for_age_z": str(f["weight_for_age_z"]), "whr": str(f["WHR"])
+                },
+                "files": {"photo_data": ("photo.jpg", photo, "image/jpeg")}
+            }
+            for i, f in enumerate(sample_features(count, seed=seed))
+        ]
+    if scenario == "children":
+        # The dashboard's listing views: newest page, one class, a name search
+        params = ({}, {"predicted_class": "Critical"}, {"name": "ki"})
+        return [{"method": "GET", "url": "/api/children", "params": params[i % len(params)]} for i in range(count)]
+    if scenario == "image":
+        if not record_ids:
+            raise ValueError("The image scenario needs seeded records; pass --seed-rows")
+        sizes = ("full", "256", "64")
+        return [
+            {"method": "GET", "url": f"/api/image/{record_ids[i % len(record_ids)]}",
+             "params": {"size": sizes[i % len(sizes)]}}
+            for i in range(count)
+        ]
+    raise ValueError(f"Unknown scenario: {scenario}")
+
+
+async def run_load(client, requests, concurrency):
+    """
+    Send requests from concurrency workers, each starting its next request as soon as the last one finishes
+
+    Returns:
+        Dictionary with throughput, latency percentiles and status code counts
+    """
+    latencies = []
+    statuses = collections.Counter()
+    pending = iter(requests)
+
+    async def worker():
+        for kwargs in pending:
+            start = time.perf_counter()
+            response = await client.request(**kwargs)
+            latencies.append(time.perf_counter() - start)
+            statuses[response.status_code] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    return dict(
+        requests=len(latencies),
+        concurrency=concurrency,
+        errors=sum(count for status, count in statuses.items() if status >= 400),
+        status_counts={str(status): count for status, count in sorted(statuses.items())},
+        throughput_rps=len(latencies) / elapsed,
+        **_percentiles_ms(latencies)
+    )
+
+
+async def run_load_tests(app, scenarios, concurrency, n_requests, warmup, photo, record_ids):
+    """
+    Drive the app in-process through httpx's ASGI transport, one scenario at a time
+
+    The client shares the event loop with the app, so the numbers include the
+    client's own overhead; they are for comparing runs, not for capacity planning.
+
+    Returns:
+        Dictionary of scenario -> run_load result
+    """
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        for scenario in scenarios:
+            requests = scenario_requests(scenario, warmup + n_requests, photo, record_ids)
+            if warmup:
+                await run_load(client, requests[:warmup], concurrency)
+            results[scenario] = await run_load(client, requests[warmup:], concurrency)
+    return results
+
+
+def compare_results(baseline, current, tolerance):
+    """
+    Metrics that got worse by more than tolerance (0.2 is 20%) since the baseline run
+
+    Returns:
+        List of (section, benchmark, metric, baseline value, current value)
+    """
+    regressions = []
+    for section, metric_names in COMPARED_METRICS.items():
+        for name, result in current.get(section, {}).items():
+            previous = baseline.get(section, {}).get(name)
+            if previous is None:
+                continue
+            for metric in metric_names:
+                before, after = previous[metric], result[metric]
+                if not before:
+                    continue
+                change = after / before - 1
+                worse = change < -tolerance if metric in HIGHER_IS_BETTER else change > tolerance
+                if worse:
+                    regressions.append((section, name, metric, before, after))
+    return regressions
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _print_results(results):
+    for name, result in results["micro"].items():
+        print(f"{name:<32} {result['median_ms']:>10.3f} ms/call")
+    for name, result in results["load"].items():
+        print(
+            f"{name:<10} {result['throughput_rps']:>8.1f} req/s  p50 {result['p50_ms']:>7.1f} ms  "
+            f"p99 {result['p99_ms']:>7.1f} ms  errors {result['errors']}"
+        )
+
+
+def run_benchmark(args):
+    """Run the micro-benchmarks and load scenarios and write the results as JSON"""
+    configure_environment(args.database_url, args.photo_dir)
+    # httpx logs every request at INFO, which would drown the results
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    from app.database.database import engine
+    from app.main import app
+    from app.models.child_health_record import ChildHealthRecord
+    from app.models.ml_model import get_model
+
+    if sa.inspect(engine).has_table(ChildHealthRecord.__tablename__):
+        if not args.drop_existing:
+            raise SystemExit(
+                f"{ChildHealthRecord.__tablename__} already exists in {engine.url!r}; "
+                "point --database-url at a scratch database or pass --drop-existing"
+            )
+        ChildHealthRecord.metadata.drop_all(engine)
+    ChildHealthRecord.metadata.create_all(engine)
+
+    photo = sample_photo(args.photo_size)
+    print(f"Seeding {args.seed_rows} rows into {engine.url.render_as_string(hide_password=True)}...")
+    record_ids = seed_records(engine, args.seed_rows, photo)
+
+    async def load():
+        await app.router.startup()
+        try:
+            return await run_load_tests(
+                app, args.scenarios, args.concurrency, args.requests, args.warmup, photo, record_ids
+            )
+        finally:
+            await app.router.shutdown()
+
+    results = {
+        "meta": {
+            "timestamp": datetime.datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "database": engine.dialect.name,
+            "model_version": get_model().version,
+            "args": {key: value for key, value in vars(args).items() if key not in ("output", "compare")}
+        },
+        "micro": run_micro_benchmarks(args.samples, args.rounds, photo),
+        "load": asyncio.run(load())
+    }
+    _print_results(results)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as output_file:
+        json.dump(results, output_file, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            regressions = compare_results(json.load(baseline_file), results, args.tolerance)
+        for section, name, metric, before, after in regressions:
+            print(f"REGRESSION {section} {name} {metric}: {before:.3f} -> {after:.3f}")
+        if regressions:
+            raise SystemExit(1)
+        print(f"No regressions beyond {args.tolerance:.0%} against {args.compare}")
+
+
+if __name__ == "__main__":
+    stamp = time.strftime("%Y%m%dT%H%M%S")
+    parser = argparse.ArgumentParser(description='Micro-benchmarks and an in-process load test of the API')
+    parser.add_argument(
+        '--database-url', default="sqlite:///" + os.path.join(tempfile.gettempdir(), "nutriguard_api_benchmark.db"),
+        help='Scratch database; the app tables are created there (a local PostgreSQL works too)'
+    )
+    parser.add_argument('--drop-existing', action='store_true', help='Replace existing app tables in the database')
+    parser.add_argument(
+        '--photo-dir', default=os.path.join(tempfile.gettempdir(), "nutriguard_api_benchmark_photos"),
+        help='Scratch photo store directory'
+    )
+    parser.add_argument('--seed-rows', type=int, default=10_000, help='Synthetic records inserted before the load test')
+    parser.add_argument('--photo-size', type=int, default=1280, help='Width in pixels of the sample photo')
+    parser.add_argument('--samples', type=int, default=200, help='Distinct inputs per micro-benchmark round')
+    parser.add_argument('--rounds', type=int, default=5, help='Rounds per micro-benchmark')
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=list(SCENARIOS), help='Load scenarios')
+    parser.add_argument('--concurrency', type=int, default=16, help='Requests in flight at once')
+    parser.add_argument('--requests', type=int, default=500, help='Measured requests per scenario')
+    parser.add_argument('--warmup', type=int, default=50, help='Unmeasured requests sent first per scenario')
+    parser.add_argument(
+        '--output', default=os.path.join(BACKEND_DIR, "benchmark_results", f"{stamp}.json"), help='JSON results file'
+    )
+    parser.add_argument('--compare', help='Earlier results file; exit with status 1 on regressions against it')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed slowdown before a metric is a regression')
+    args = parser.parse_args()
+
+    run_benchmark(args)
@@ -0,0 +1,123 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.ml_model import FIELD_MAPPING, MalnutritionModel
+
+
+def legacy_predict(model, features):
+    """
+    The original DataFrame-based prediction path, kept as a reference
+
+    Args:
+        model: Loaded MalnutritionModel
+        features: Dictionary containing feature values
+
+    Returns:
+        Dictionary with prediction results
+    """
+    processed_features = features.copy()
+    for new_key, old_key in FIELD_MAPPING.items():
+        if new_key in processed_features:
+            processed_features[old_key] = processed_features.pop(new_key)
+
+    input_df = pd.DataFrame([processed_features])
+    input_df = input_df[model.feature_names]
+
+    prediction_idx = model.model.predict(input_df)[0]
+    probabilities = model.model.predict_proba(input_df)[0]
+    return {
+        "predicted_class": model.class_names[prediction_idx],
+        "confidence": float(max(probabilities)),
+        "class_probabilities": {
+            model.class_names[i]: float(prob)
+            for i, prob in enumerate(probabilities)
+        }
+    }
+
+
+def sample_features(n, seed=42):
+    """
+    Generate plausible feature dictionaries for children under 5
+
+    Args:
+        n: Number of samples
+        seed: Random seed so runs are comparable
+
+    Returns:
+        List of feature dictionaries using the API field names
+    """
+    rng = np.random.default_rng(seed)
+    samples = []
+    for _ in range(n):
+        height = float(rng.uniform(45, 120))
+        weight = float(rng.uniform(2, 25))
+        height_m = height / 100
+        samples.append({
+            "Sex": int(rng.integers(0, 2)),
+            "Age": int(rng.integers(1, 6)),
+            "Height": height,
+            "Weight": weight,
+            "height_for_age_z": float(rng.normal(-1, 1.5)),
+            "weight_for_height_z": float(rng.normal(-0.5, 1.5)),
+            "weight_for_age_z": float(rng.normal(-0.8, 1.5)),
+            "Height_m": height_m,
+            "BMI": weight / height_m ** 2,
+            "WHR": float(rng.uniform(0.7, 1.1))
+        })
+    return samples
+
+
+def _time_per_call(func, samples, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for features in samples:
+            func(features)
+    return (time.perf_counter() - start) / (repeat * len(samples))
+
+
+def run_benchmark(n_samples, repeat):
+    """
+    Compare the legacy DataFrame path with MalnutritionModel.predict
+
+    Args:
+        n_samples: Number of distinct feature rows
+        repeat: How many times each row is scored per path
+    """
+    model = MalnutritionModel()
+    samples = sample_features(n_samples)
+
+    # Both paths must agree exactly before timings mean anything
+    for features in samples:
+        expected = legacy_predict(model, features)
+        actual = model.predict(features)
+        actual.pop("timestamp")
+        if actual != expected:
+            raise AssertionError(f"Prediction mismatch for {features}: {actual} != {expected}")
+
+    flat_model = MalnutritionModel(engine="flat")
+
+    legacy_time = _time_per_call(lambda f: legacy_predict(model, f), samples, repeat)
+    fast_time = _time_per_call(model.predict, samples, repeat)
+    flat_time = _time_per_call(flat_model.predict, samples, repeat)
+
+    print(f"Rows checked for identical outputs: {len(samples)}")
+    print(f"Legacy DataFrame path: {legacy_time * 1e3:.3f} ms/prediction")
+    print(f"NumPy fast path:       {fast_time * 1e3:.3f} ms/prediction")
+    print(f"Flat tree evaluator:   {flat_time * 1e3:.3f} ms/prediction")
+    print(f"Speedup:               {legacy_time / fast_time:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark single-row model inference paths')
+    parser.add_argument('--samples', type=int, default=200, help='Number of distinct feature rows')
+    parser.add_argument('--repeat', type=int, default=5, help='Times each row is scored per path')
+    args = parser.parse_args()
+
+    run_benchmark(args.samples, args.repeat)
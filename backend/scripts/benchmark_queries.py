@@ -0,0 +1,205 @@
+import argparse
+import datetime
+import importlib.util
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+import sqlalchemy as sa
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# The routes import the app's database module, which needs a URL; the benchmark uses its own engine
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from app.models.child_health_record import ChildHealthRecord
+from app.routes.allChildren import DEFAULT_PAGE_SIZE, LISTING_COLUMNS, build_listing_query
+
+MIGRATION_PATH = os.path.join(BACKEND_DIR, "alembic", "versions", "e4a91d2c6b07_add_child_record_listing_indexes.py")
+
+CLASSES = ("Low", "Moderate", "High", "Critical")
+CLASS_WEIGHTS = (0.7, 0.15, 0.1, 0.05)
+SYLLABLES = ("a", "ba", "ki", "mu", "na", "ro", "sa", "te", "wi", "zu", "lo", "me", "ji", "da", "ny")
+FIRST_CREATED_AT = datetime.datetime(2024, 1, 1)
+SEED_BATCH_SIZE = 5000
+
+
+def load_migration():
+    """The index migration, applied and reverted directly to time the table with and without it"""
+    spec = importlib.util.spec_from_file_location("listing_indexes_migration", MIGRATION_PATH)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+    return migration
+
+
+def synthetic_rows(n, seed=42):
+    """
+    Generate child records shaped like the field data
+
+    Args:
+        n: Number of rows
+        seed: Random seed so runs are comparable
+
+    Returns:
+        Iterator of column dictionaries, oldest first
+    """
+    rng = np.random.default_rng(seed)
+    classes = rng.choice(len(CLASSES), size=n, p=CLASS_WEIGHTS)
+    # About two years of records, in insertion order like the live table
+    offsets = np.sort(rng.uniform(0, 730 * 24 * 3600, size=n))
+    for i in range(n):
+        height = float(rng.uniform(45, 120))
+        weight = float(rng.uniform(2, 25))
+        name = "".join(rng.choice(SYLLABLES, size=int(rng.integers(2, 5)))).capitalize()
+        yield {
+            "name": f"{name} {i}",
+            "sex": "Male" if rng.integers(0, 2) else "Female",
+            "age": int(rng.integers(1, 6)),
+            "height": height,
+            "weight": weight,
+            "height_for_age_z": float(rng.normal(-1, 1.5)),
+            "weight_for_height_z": float(rng.normal(-0.5, 1.5)),
+            "weight_for_age_z": float(rng.normal(-0.8, 1.5)),
+            "height_m": height / 100,
+            "bmi": weight / (height / 100) ** 2,
+            "whr": float(rng.uniform(0.7, 1.1)),
+            "created_at": FIRST_CREATED_AT + datetime.timedelta(seconds=float(offsets[i])),
+            "predicted_class": CLASSES[classes[i]],
+            "confidence": float(rng.uniform(0.4, 1.0)),
+            "class_probabilities": None
+        }
+
+
+def seed_table(engine, n_rows):
+    """Create child_health_records and fill it with n_rows synthetic records"""
+    table = ChildHealthRecord.__table__
+    table.create(engine)
+    batch = []
+    with engine.begin() as connection:
+        for row in synthetic_rows(n_rows):
+            batch.append(row)
+            if len(batch) == SEED_BATCH_SIZE:
+                connection.execute(table.insert(), batch)
+                batch = []
+        if batch:
+            connection.execute(table.insert(), batch)
+
+
+def benchmark_queries(n_rows):
+    """
+    The listing queries the dashboards send, as built by the /children route
+
+    Returns:
+        List of (label, query) pairs
+    """
+    columns = list(LISTING_COLUMNS.values())
+
+    def days(n):
+        return FIRST_CREATED_AT + datetime.timedelta(days=n)
+
+    def page(cursor=None, **filters):
+        return build_listing_query(columns, cursor, DEFAULT_PAGE_SIZE, **filters)
+
+    return [
+        ("newest page", page()),
+        ("critical, newest page", page(predicted_class=["Critical"])),
+        ("critical, deep page", page(cursor=n_rows // 2, predicted_class=["Critical"])),
+        ("high, last month", page(predicted_class=["High"], created_from=days(700), created_to=days(730))),
+        ("high, month a year ago", page(predicted_class=["High"], created_from=days(335), created_to=days(365))),
+        ("all, last week", page(created_from=days(723), created_to=days(730))),
+        ("all, week a year ago", page(created_from=days(358), created_to=days(365))),
+        ("name contains 'kimu'", page(name="kimu")),
+        ("name contains 'zunyda'", page(name="zunyda")),
+    ]
+
+
+def time_queries(engine, queries, repeat):
+    """
+    Median wall time of each query
+
+    Args:
+        engine: Engine to run them on
+        queries: (label, query) pairs
+        repeat: Runs per query; the first extra run only warms caches
+
+    Returns:
+        Dictionary of label -> (median seconds, rows returned)
+    """
+    timings = {}
+    with engine.connect() as connection:
+        for label, query in queries:
+            rows = len(connection.execute(query).all())
+            samples = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                connection.execute(query).all()
+                samples.append(time.perf_counter() - start)
+            timings[label] = (statistics.median(samples), rows)
+    return timings
+
+
+def _apply(engine, migration_step):
+    with engine.begin() as connection:
+        with Operations.context(MigrationContext.configure(connection)):
+            migration_step()
+        # Fresh planner statistics for the indexes that were added or dropped
+        connection.execute(sa.text("ANALYZE"))
+
+
+def run_benchmark(database_url, n_rows, repeat, drop_existing):
+    """
+    Seed synthetic records and time the listing queries without and with the indexes
+
+    Args:
+        database_url: Scratch database; child_health_records is created there
+        n_rows: Number of synthetic records
+        repeat: Runs per query
+        drop_existing: Drop an existing child_health_records table first
+    """
+    engine = sa.create_engine(database_url)
+    if sa.inspect(engine).has_table(ChildHealthRecord.__tablename__):
+        if not drop_existing:
+            raise SystemExit(
+                f"{ChildHealthRecord.__tablename__} already exists in {engine.url!r}; "
+                "point --database-url at a scratch database or pass --drop-existing"
+            )
+        ChildHealthRecord.__table__.drop(engine)
+
+    migration = load_migration()
+    print(f"Seeding {n_rows} rows into {engine.url.render_as_string(hide_password=True)}...")
+    seed_table(engine, n_rows)
+    queries = benchmark_queries(n_rows)
+
+    _apply(engine, migration.downgrade)
+    before = time_queries(engine, queries, repeat)
+    _apply(engine, migration.upgrade)
+    after = time_queries(engine, queries, repeat)
+
+    print(f"{'query':<26} {'rows':>5} {'before ms':>10} {'after ms':>10} {'speedup':>8}")
+    for label, _ in queries:
+        before_time, rows = before[label]
+        after_time, _ = after[label]
+        print(
+            f"{label:<26} {rows:>5} {before_time * 1e3:>10.2f} {after_time * 1e3:>10.2f} "
+            f"{before_time / after_time:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark the child record listing queries with and without indexes')
+    parser.add_argument(
+        '--database-url', default="sqlite:///" + os.path.join(tempfile.gettempdir(), "nutriguard_query_benchmark.db"),
+        help='Scratch database to seed (a local PostgreSQL shows the trigram name index)'
+    )
+    parser.add_argument('--rows', type=int, default=100_000, help='Number of synthetic records')
+    parser.add_argument('--repeat', type=int, default=20, help='Runs per query')
+    parser.add_argument('--drop-existing', action='store_true', help='Replace an existing child_health_records table')
+    args = parser.parse_args()
+
+    run_benchmark(args.database_url, args.rows, args.repeat, args.drop_existing)
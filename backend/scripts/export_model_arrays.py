@@ -0,0 +1,42 @@
+import argparse
+import os
+import sys
+
+import joblib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import MODEL_ARRAYS_DIR, MODEL_FILES_DIR
+from app.models.ml_model import FlatTreeEnsemble, file_digest
+
+
+def export_model_arrays(model_path: str, output_dir: str) -> FlatTreeEnsemble:
+    """
+    Flatten the pickled classifier and write its node arrays for memory-mapping
+
+    Args:
+        model_path: Path to the joblib model file
+        output_dir: Directory the .npy arrays are written to
+
+    Returns:
+        The flattened ensemble that was written
+    """
+    flat_model = FlatTreeEnsemble.from_booster(joblib.load(model_path).get_booster())
+    flat_model.save(output_dir, source_digest=file_digest(model_path))
+    return flat_model
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the model's trees as memory-mappable arrays")
+    parser.add_argument("--model", default=os.path.join(MODEL_FILES_DIR, "malnutrition_rf_model.joblib"))
+    parser.add_argument("--output", default=MODEL_ARRAYS_DIR)
+    args = parser.parse_args()
+
+    flat_model = export_model_arrays(args.model, args.output)
+    size = sum(os.path.getsize(os.path.join(args.output, f)) for f in os.listdir(args.output))
+    print(f"Wrote {len(flat_model.value)} nodes in {len(flat_model.roots)} trees "
+          f"({size / 1024:.0f} KiB) to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database.database import SessionLocal
+from app.utils.record_stats import rebuild_record_stats
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Recompute the /api/stats summary table from the child records in DATABASE_URL"
+    )
+    parser.parse_args()
+
+    with SessionLocal() as db:
+        written = rebuild_record_stats(db)
+    print(f"Rebuilt child_record_stats: {written} summary rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,108 @@
 import sys
 import os
+import tempfile
 from pathlib import Path
 
+import pytest
+
 # Add the project root to the path
-sys.path.insert(0, str(Path(__file__).parent.parent))
\ No newline at end of file
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Point the app at a throwaway SQLite database instead of the one in .env
+os.environ["DATABASE_URL"] = os.getenv(
+    "TEST_DATABASE_URL",
+    "sqlite:///" + os.path.join(tempfile.gettempdir(), "nutriguard_test.db")
+)
+os.environ["PHOTO_STORE_DIR"] = tempfile.mkdtemp(prefix="nutriguard_photos_")
+
+
+@pytest.fixture(autouse=True)
+def clear_prediction_cache():
+    """Keep cached predictions from one test out of the next"""
+    from app.models.ml_model import prediction_cache
+    prediction_cache.clear()
+    yield
+
+
+_engine_models = {}
+
+@pytest.fixture(params=["native", "flat"])
+def inference_engine(request, monkeypatch):
+    """Serve predictions from each inference engine in turn; the Docker image runs the flat one"""
+    import app.models.ml_model as ml_model
+
+    if request.param not in _engine_models:
+        _engine_models[request.param] = ml_model.MalnutritionModel(engine=request.param)
+    monkeypatch.setattr(ml_model, "model_instance", _engine_models[request.param])
+    return request.param
+
+
+@pytest.fixture
+def db_engine():
+    """Create fresh tables for every test"""
+    from app.database.database import engine
+    from app.models.child_health_record import ChildHealthRecord
+
+    ChildHealthRecord.metadata.drop_all(engine)
+    ChildHealthRecord.metadata.create_all(engine)
+    yield engine
+    ChildHealthRecord.metadata.drop_all(engine)
+
+
+@pytest.fixture
+def client(db_engine):
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def child_payload():
+    return {
+        "name": "Jane",
+        "sex": 0,
+        "age": 2,
+        "height": 80.0,
+        "weight": 10.0,
+        "height_for_age_z": -1.5,
+        "weight_for_height_z": -1.0,
+        "weight_for_age_z": -1.2,
+        "whr": 0.9
+    }
+
+
+@pytest.fixture
+def make_child(db_engine):
+    """Insert a child record directly, bypassing the model"""
+    import datetime
+    from sqlalchemy.orm import Session
+    from app.models.child_health_record import ChildHealthRecord
+
+    def _make_child(**overrides):
+        values = {
+            "name": "Child",
+            "sex": "Female",
+            "age": 2,
+            "height": 80.0,
+            "weight": 10.0,
+            "height_for_age_z": -1.5,
+            "weight_for_height_z": -1.0,
+            "weight_for_age_z": -1.2,
+            "height_m": 0.8,
+            "bmi": 15.6,
+            "whr": 0.9,
+            "created_at": datetime.datetime(2025, 3, 1),
+            "predicted_class": "Low",
+            "confidence": 0.9,
+            "class_probabilities": {"Critical": 0.02, "High": 0.03, "Moderate": 0.05, "Low": 0.9}
+        }
+        values.update(overrides)
+        with Session(db_engine) as session:
+            record = ChildHealthRecord(**values)
+            session.add(record)
+            session.commit()
+            return record.id
+
+    return _make_child
@@ -0,0 +1,137 @@
+import threading
+
+import pytest
+from passlib.context import CryptContext
+from sqlalchemy.orm import Session
+
+from app.auth import auth_handler as auth_module
+from app.models.users import User
+
+
+def _context(rounds):
+    return CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds)
+
+
+@pytest.fixture
+def users(db_engine, monkeypatch):
+    # The lowest cost bcrypt allows keeps the tests fast
+    monkeypatch.setattr(auth_module, "pwd_context", _context(4))
+    User.metadata.drop_all(db_engine)
+    User.metadata.create_all(db_engine)
+    yield db_engine
+    User.metadata.drop_all(db_engine)
+
+
+def _stored_hash(engine, username):
+    with Session(engine) as session:
+        return session.query(User).filter(User.username == username).one().password
+
+
+def _register(client, username="nurse"):
+    response = client.post(
+        "/api/auth/register", json={"username": username, "email": f"{username}@clinic.org", "password": "s3cret"}
+    )
+    assert response.status_code == 200
+
+
+def test_passwords_are_hashed_and_verified_on_auth_workers(client, users, monkeypatch):
+    real_context = auth_module.pwd_context
+    threads = []
+
+    class RecordingContext:
+        def hash(self, password):
+            threads.append(threading.current_thread().name)
+            return real_context.hash(password)
+
+        def verify_and_update(self, password, hashed):
+            threads.append(threading.current_thread().name)
+            return real_context.verify_and_update(password, hashed)
+
+    monkeypatch.setattr(auth_module, "pwd_context", RecordingContext())
+    hashed = auth_module.PASSWORD_HASH_SECONDS.count(operation="hash")
+    verified = auth_module.PASSWORD_HASH_SECONDS.count(operation="verify")
+
+    _register(client)
+    assert client.post("/api/auth/login", json={"username": "nurse", "password": "s3cret"}).status_code == 200
+    assert client.post("/api/auth/login", json={"username": "nurse", "password": "wrong"}).status_code == 401
+
+    assert len(threads) == 3 and all(name.startswith("auth") for name in threads)
+    assert auth_module.PASSWORD_HASH_SECONDS.count(operation="hash") == hashed + 1
+    assert auth_module.PASSWORD_HASH_SECONDS.count(operation="verify") == verified + 2
+
+
+def test_login_rehashes_passwords_made_with_another_cost(client, users, monkeypatch):
+    _register(client)
+    assert _stored_hash(users, "nurse").startswith("$2b$04$")
+
+    monkeypatch.setattr(auth_module, "pwd_context", _context(5))
+    assert client.post("/api/auth/login", json={"username": "nurse", "password": "s3cret"}).status_code == 200
+    rehashed = _stored_hash(users, "nurse")
+    assert rehashed.startswith("$2b$05$")
+
+    # A failed login never touches the stored hash
+    assert client.post("/api/auth/login", json={"username": "nurse", "password": "wrong"}).status_code == 401
+    assert client.post("/api/auth/login", json={"username": "nurse", "password": "s3cret"}).status_code == 200
+    assert _stored_hash(users, "nurse") == rehashed
+
+
+@pytest.fixture
+def fresh_tokens():
+    # Tokens for the same user issued in the same second are identical, so keep revocations per test
+    auth_module.token_cache.clear()
+    auth_module.token_denylist.clear()
+    yield
+    auth_module.token_cache.clear()
+    auth_module.token_denylist.clear()
+
+
+def test_decoded_tokens_are_cached_until_they_expire(fresh_tokens):
+    from unittest.mock import patch
+
+    handler = auth_module.auth_handler
+    token = handler.encode_token("7", "admin")["access_token"]
+    digest = auth_module.token_digest(token)
+
+    with patch("app.auth.auth_handler.jwt.decode", wraps=auth_module.jwt.decode) as decode:
+        claims = handler.decode_token(token)
+        claims["role"] = "tampered"
+        assert handler.decode_token(token)["role"] == "admin"
+        assert decode.call_count == 1
+
+        # An entry past its exp is never served; the token is verified again
+        auth_module.token_cache.put(digest, dict(claims, exp=0))
+        assert handler.decode_token(token)["role"] == "admin"
+        assert decode.call_count == 2
+    assert auth_module.token_cache.get(digest)["exp"] > 0
+
+    with pytest.raises(auth_module.HTTPException) as error:
+        handler.decode_token(token[:-2] + "xx")
+    assert error.value.detail == "Invalid token"
+
+
+def test_logout_revokes_cached_tokens(client, users, fresh_tokens):
+    _register(client)
+    tokens = client.post("/api/auth/login", json={"username": "nurse", "password": "s3cret"}).json()
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+    assert client.get("/api/auth/me", headers=headers).status_code == 200
+
+    response = client.post("/api/auth/logout", headers=headers, json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 200
+
+    me = client.get("/api/auth/me", headers=headers)
+    assert (me.status_code, me.json()["detail"]) == (401, "Token has been revoked")
+    refresh = client.post("/api/auth/refresh", headers={"Authorization": f"Bearer {tokens['refresh_token']}"})
+    assert refresh.status_code == 401
+    assert client.post("/api/auth/logout", headers=headers).status_code == 401
+
+
+def test_denylist_forgets_tokens_once_they_expire():
+    now = [1000.0]
+    denylist = auth_module.TokenDenylist(clock=lambda: now[0])
+    denylist.add("a", 1500)
+    denylist.add("b", 900)
+    assert "a" in denylist and "b" not in denylist
+
+    now[0] = 2000.0
+    denylist.add("c", 2500)
+    assert len(denylist) == 1 and "c" in denylist
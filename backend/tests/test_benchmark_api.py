@@ -0,0 +1,45 @@
+import asyncio
+
+from sqlalchemy.orm import Session
+
+from app.models.child_health_record import ChildHealthRecord
+from scripts.benchmark_api import compare_results, run_load_tests, sample_photo, seed_records
+
+
+def test_load_scenarios_run_in_process(client, db_engine):
+    from app.main import app
+
+    photo = sample_photo(64)
+    record_ids = seed_records(db_engine, 20, photo)
+    assert len(record_ids) == 20
+
+    results = asyncio.run(run_load_tests(
+        app, ["predict", "children", "image"], concurrency=3, n_requests=6, warmup=2,
+        photo=photo, record_ids=record_ids
+    ))
+
+    for scenario, result in results.items():
+        assert result["requests"] == 6 and result["errors"] == 0, (scenario, result)
+        assert result["throughput_rps"] > 0
+        assert result["p50_ms"] <= result["p99_ms"] <= result["max_ms"]
+    # Warm-up requests are sent but not measured
+    with Session(db_engine) as session:
+        created = session.query(ChildHealthRecord).filter(ChildHealthRecord.name.like("Benchmark %")).count()
+    assert created == 8
+
+
+def test_compare_flags_only_regressions_beyond_tolerance():
+    baseline = {
+        "micro": {"model.predict[flat]": {"median_ms": 1.0}, "removed": {"median_ms": 1.0}},
+        "load": {"predict": {"p50_ms": 100.0, "p99_ms": 200.0, "throughput_rps": 50.0}}
+    }
+    current = {
+        "micro": {"model.predict[flat]": {"median_ms": 1.1}, "added": {"median_ms": 9.0}},
+        "load": {"predict": {"p50_ms": 130.0, "p99_ms": 150.0, "throughput_rps": 35.0}}
+    }
+
+    assert compare_results(baseline, current, tolerance=0.2) == [
+        ("load", "predict", "p50_ms", 100.0, 130.0),
+        ("load", "predict", "throughput_rps", 50.0, 35.0),
+    ]
+    assert compare_results(baseline, current, tolerance=0.5) == []
@@ -0,0 +1,66 @@
+import threading
+
+from app.utils.cache import CACHE_EVICTIONS, CACHE_HITS, CACHE_MISSES, LRUCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache("test_lru", max_entries=2)
+    evictions = CACHE_EVICTIONS.value(cache="test_lru", reason="capacity")
+
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert len(cache) == 2
+    assert CACHE_EVICTIONS.value(cache="test_lru", reason="capacity") == evictions + 1
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = LRUCache("test_ttl", max_entries=10, ttl_seconds=60, clock=clock)
+    hits, misses = CACHE_HITS.value(cache="test_ttl"), CACHE_MISSES.value(cache="test_ttl")
+
+    cache.put("key", "value")
+    clock.now = 59
+    assert cache.get("key") == "value"
+    clock.now = 61
+    assert cache.get("key", "default") == "default"
+
+    assert len(cache) == 0
+    assert CACHE_HITS.value(cache="test_ttl") == hits + 1
+    assert CACHE_MISSES.value(cache="test_ttl") == misses + 1
+    assert CACHE_EVICTIONS.value(cache="test_ttl", reason="expired") >= 1
+
+
+def test_concurrent_access_stays_bounded():
+    cache = LRUCache("test_threads", max_entries=50)
+
+    def worker(offset):
+        for i in range(2000):
+            cache.put((offset, i % 100), i)
+            cache.get((offset, (i * 7) % 100))
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(cache) == 50
+
+
+def test_zero_size_cache_stores_nothing():
+    cache = LRUCache("test_disabled", max_entries=0)
+    cache.put("a", 1)
+    assert cache.get("a") is None
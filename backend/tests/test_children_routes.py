@@ -0,0 +1,181 @@
+import datetime
+
+from app.utils.photo_store import get_photo_store
+
+
+def test_children_default_projection_links_photos_instead_of_embedding(client, make_child):
+    photo_hash = get_photo_store().put(b"\xff\xd8\xff photo")
+    child_id = make_child(name="Aline", photo_hash=photo_hash, photo_content_type="image/jpeg")
+    make_child(name="No Photo")
+
+    children = client.get("/api/children").json()
+
+    assert [child["name"] for child in children] == ["No Photo", "Aline"]
+    assert "photo_data" not in children[1]
+    assert children[1]["photo_url"].endswith(f"/api/image/{child_id}?size=256")
+    assert children[0]["photo_url"] is None
+    assert children[1]["class_probabilities"]["Low"] == 0.9
+
+
+def test_children_keyset_pagination(client, make_child):
+    ids = [make_child(name=f"Child {i}") for i in range(5)]
+
+    seen = []
+    cursor = None
+    pages = 0
+    while True:
+        params = {"limit": 2, "fields": "name"}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/api/children", params=params)
+        seen.extend(child["id"] for child in response.json())
+        pages += 1
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+        assert 'rel="next"' in response.headers["Link"]
+
+    assert pages == 3
+    assert seen == sorted(ids, reverse=True)
+
+
+def test_children_field_selection(client, make_child):
+    photo_hash = get_photo_store().put(b"\xff\xd8\xff another photo")
+    make_child(name="Aline", photo_hash=photo_hash)
+
+    children = client.get("/api/children", params={"fields": "name,predicted_class,photo_data"}).json()
+
+    assert set(children[0]) == {"id", "name", "predicted_class", "photo_data"}
+    assert children[0]["photo_data"]
+    assert client.get("/api/children", params={"fields": "name,password"}).status_code == 400
+
+
+def test_children_filters(client, make_child):
+    make_child(name="Old critical", age=5, predicted_class="Critical", created_at=datetime.datetime(2025, 1, 5))
+    make_child(name="Young critical", age=1, predicted_class="Critical", created_at=datetime.datetime(2025, 3, 5))
+    make_child(name="Young high", age=3, predicted_class="High", created_at=datetime.datetime(2025, 3, 6))
+    make_child(name="Young low", age=2, predicted_class="Low", created_at=datetime.datetime(2025, 3, 7))
+
+    def names(**params):
+        return [child["name"] for child in client.get("/api/children", params=params).json()]
+
+    assert names(predicted_class=["Critical", "High"]) == ["Young high", "Young critical", "Old critical"]
+    assert names(min_age=2, max_age=4) == ["Young low", "Young high"]
+    assert names(created_from="2025-03-01T00:00:00", created_to="2025-03-06T12:00:00") == ["Young high", "Young critical"]
+
+
+def test_children_name_search(client, make_child):
+    make_child(name="Amina Odhiambo")
+    make_child(name="Mina_2")
+    make_child(name="Baraka")
+
+    def names(term):
+        return [child["name"] for child in client.get("/api/children", params={"name": term}).json()]
+
+    assert names("MINA") == ["Mina_2", "Amina Odhiambo"]
+    # Wildcards in the search term match literally
+    assert names("a_2") == ["Mina_2"]
+    assert names("%") == []
+    assert client.get("/api/children", params={"name": ""}).status_code == 422
+
+
+def test_listing_indexes_migration(tmp_path):
+    import importlib.util
+    import os
+
+    import sqlalchemy as sa
+    from alembic.migration import MigrationContext
+    from alembic.operations import Operations
+
+    from app.models.child_health_record import ChildHealthRecord
+
+    path = os.path.join(
+        os.path.dirname(os.path.dirname(__file__)),
+        "alembic", "versions", "e4a91d2c6b07_add_child_record_listing_indexes.py"
+    )
+    spec = importlib.util.spec_from_file_location("listing_indexes_migration", path)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+
+    migration_indexes = {name for name, _ in migration.BTREE_INDEXES} | {migration.NAME_INDEX}
+    # The migration creates exactly the indexes the model declares
+    assert migration_indexes == {index.name for index in ChildHealthRecord.__table_args__}
+
+    engine = sa.create_engine(f"sqlite:///{tmp_path / 'migration.db'}")
+    with engine.begin() as connection:
+        ChildHealthRecord.__table__.create(connection)
+        with Operations.context(MigrationContext.configure(connection)):
+            migration.downgrade()
+        assert not {i["name"] for i in sa.inspect(connection).get_indexes("child_health_records")} & migration_indexes
+        with Operations.context(MigrationContext.configure(connection)):
+            migration.upgrade()
+        assert migration_indexes <= {i["name"] for i in sa.inspect(connection).get_indexes("child_health_records")}
+
+
+def test_export_ndjson_streams_every_record(client, make_child):
+    from unittest.mock import patch
+    import json
+
+    ids = [make_child(name=f"Child {i}", predicted_class="High" if i % 2 else "Low") for i in range(5)]
+
+    with patch("app.routes.allChildren.EXPORT_BATCH_SIZE", 2):
+        response = client.get("/api/children/export")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert [record["id"] for record in records] == ids
+    assert "photo_data" not in records[0]
+    assert records[0]["class_probabilities"]["Low"] == 0.9
+
+
+def test_export_csv_with_filters(client, make_child):
+    import csv
+    import io
+    import json
+
+    make_child(name="Aline", predicted_class="Critical")
+    make_child(name="Bosco", predicted_class="Low")
+
+    response = client.get("/api/children/export", params={"format": "csv", "predicted_class": "Critical"})
+
+    assert response.status_code == 200
+    assert 'filename="children.csv"' in response.headers["content-disposition"]
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["name"] for row in rows] == ["Aline"]
+    assert json.loads(rows[0]["class_probabilities"])["Critical"] == 0.02
+    assert client.get("/api/children/export", params={"format": "xml"}).status_code == 422
+
+
+def test_read_routes_use_the_async_engine(client, make_child):
+    import asyncio
+
+    import httpx
+
+    from app.database import database
+    from app.main import app
+
+    ids = [make_child(name=f"Child {i}") for i in range(3)]
+
+    async def fan_out():
+        # Dashboard-style parallel reads on one event loop
+        async with httpx.AsyncClient(app=app, base_url="http://test") as async_client:
+            return await asyncio.gather(
+                async_client.get("/api/children"),
+                *(async_client.get(f"/api/child/{child_id}") for child_id in ids),
+                async_client.get("/api/child/999999")
+            )
+
+    responses = asyncio.run(fan_out())
+
+    assert [r.status_code for r in responses] == [200, 200, 200, 200, 404]
+    assert len(responses[0].json()) == 3
+    assert [r.json()[0]["name"] for r in responses[1:4]] == ["Child 0", "Child 1", "Child 2"]
+    assert database.async_engine.url.drivername == "sqlite+aiosqlite"
+
+
+def test_async_database_url():
+    from app.database.database import async_database_url
+
+    assert async_database_url("postgresql://u:p@db/nutriguard") == "postgresql+asyncpg://u:p@db/nutriguard"
+    assert async_database_url("sqlite:///./test.db") == "sqlite+aiosqlite:///./test.db"
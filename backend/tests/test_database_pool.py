@@ -0,0 +1,62 @@
+import pytest
+import sqlalchemy as sa
+
+from app.database import database
+from app.database.pool import (
+    POOL_CHECKOUT_WAIT_SECONDS, POOL_INVALIDATIONS, POOL_TIMEOUTS, InstrumentedQueuePool, instrument_pool
+)
+from app.utils.metrics import metrics
+
+
+def test_engine_options_apply_pool_settings(monkeypatch):
+    monkeypatch.setattr(database, "DB_STATEMENT_TIMEOUT_MS", 5000)
+
+    postgres = database.engine_options("postgresql://user@db/nutriguard")
+    assert postgres["poolclass"] is InstrumentedQueuePool
+    assert postgres["pool_size"] == database.DB_POOL_SIZE
+    assert postgres["max_overflow"] == database.DB_MAX_OVERFLOW
+    assert postgres["pool_recycle"] == database.DB_POOL_RECYCLE
+    assert postgres["pool_timeout"] == database.DB_POOL_TIMEOUT
+    assert postgres["connect_args"] == {"options": "-c statement_timeout=5000"}
+
+    memory = database.engine_options("sqlite://")
+    assert "poolclass" not in memory
+
+
+def test_async_engine_has_its_own_pool_budget(monkeypatch):
+    monkeypatch.setattr(database, "DB_ASYNC_POOL_SIZE", 3)
+    monkeypatch.setattr(database, "DB_ASYNC_MAX_OVERFLOW", 4)
+
+    postgres = database.async_engine_options("postgresql://user@db/nutriguard")
+    assert (postgres["pool_size"], postgres["max_overflow"]) == (3, 4)
+    assert postgres["pool_timeout"] == database.DB_POOL_TIMEOUT
+    assert "pool_size" not in database.async_engine_options("sqlite:///nutriguard.db")
+
+
+def test_pool_timeouts_and_invalidations_are_counted(tmp_path):
+    engine = sa.create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}", poolclass=InstrumentedQueuePool,
+        pool_size=1, max_overflow=0, pool_timeout=0.05
+    )
+    instrument_pool(engine)
+    timeouts = POOL_TIMEOUTS.value()
+    waits = POOL_CHECKOUT_WAIT_SECONDS.count()
+    invalidations = POOL_INVALIDATIONS.value(kind="hard")
+
+    held = engine.connect()
+    with pytest.raises(sa.exc.TimeoutError):
+        engine.connect()
+    held.invalidate()
+    held.close()
+
+    assert POOL_TIMEOUTS.value() == timeouts + 1
+    assert POOL_CHECKOUT_WAIT_SECONDS.count() == waits + 2
+    assert POOL_INVALIDATIONS.value(kind="hard") == invalidations + 1
+
+
+def test_pool_occupancy_is_exported(client):
+    text = client.get("/metrics").text
+
+    assert "nutriguard_db_pool_checked_out 0" in text
+    assert "nutriguard_db_pool_size " + str(database.DB_POOL_SIZE) in text
+    assert "nutriguard_db_pool_checkout_wait_seconds_count" in text
@@ -0,0 +1,147 @@
+import asyncio
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from app.utils.executor import InferenceExecutor, InferenceQueueFull
+
+
+def test_executor_runs_jobs_on_worker_threads():
+    executor = InferenceExecutor(max_workers=2, max_queue=2)
+
+    async def main():
+        return await executor.run(lambda: threading.current_thread().name)
+
+    try:
+        assert asyncio.run(main()).startswith("inference")
+    finally:
+        executor.shutdown()
+
+
+def test_executor_bounds_queue_and_reports_depth():
+    executor = InferenceExecutor(max_workers=1, max_queue=1)
+    release = threading.Event()
+    started = threading.Event()
+
+    def blocking_job():
+        started.set()
+        release.wait(5)
+        return "done"
+
+    async def main():
+        first = asyncio.ensure_future(executor.run(blocking_job))
+        await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+        second = asyncio.ensure_future(executor.run(lambda: "queued"))
+        await asyncio.sleep(0)
+
+        assert executor.running == 1
+        assert executor.queue_depth == 1
+        with pytest.raises(InferenceQueueFull):
+            await executor.run(lambda: "rejected")
+
+        release.set()
+        return await asyncio.gather(first, second)
+
+    try:
+        assert asyncio.run(main()) == ["done", "queued"]
+        assert executor.queue_depth == 0
+        assert executor.running == 0
+    finally:
+        executor.shutdown()
+
+
+def _batcher(window_ms, max_batch_size):
+    from app.utils.batching import InferenceBatcher
+    return InferenceBatcher(window_ms=window_ms, max_batch_size=max_batch_size,
+                            executor=InferenceExecutor(max_workers=1, max_queue=8))
+
+
+def test_batcher_coalesces_concurrent_predictions():
+    from scripts.benchmark_inference import sample_features
+    from app.models.ml_model import predict_malnutrition, predict_malnutrition_batch
+
+    rows = [list(features.values()) for features in sample_features(5)]
+    batcher = _batcher(window_ms=50, max_batch_size=32)
+    calls = []
+
+    def recording_batch(features):
+        calls.append(len(features))
+        return predict_malnutrition_batch(features)
+
+    async def main():
+        return await asyncio.gather(*(batcher.predict(row) for row in rows))
+
+    with patch("app.utils.batching.predict_malnutrition_batch", recording_batch):
+        results = asyncio.run(main())
+
+    batcher.executor.shutdown()
+    assert calls == [5]
+    for row, (predicted_class, confidence, _) in zip(rows, results):
+        expected_class, expected_confidence, _ = predict_malnutrition(row)
+        assert predicted_class == expected_class
+        assert confidence == pytest.approx(expected_confidence, abs=1e-6)
+
+
+def test_batcher_flushes_when_batch_is_full():
+    batcher = _batcher(window_ms=10_000, max_batch_size=3)
+    calls = []
+
+    def fake_batch(features):
+        calls.append(len(features))
+        return [("Low", 1.0, {})] * len(features)
+
+    async def main():
+        return await asyncio.wait_for(asyncio.gather(*(batcher.predict([i]) for i in range(6))), 5)
+
+    with patch("app.utils.batching.predict_malnutrition_batch", fake_batch):
+        asyncio.run(main())
+
+    batcher.executor.shutdown()
+    assert calls == [3, 3]
+
+
+def test_batcher_propagates_errors_to_every_caller():
+    batcher = _batcher(window_ms=1, max_batch_size=8)
+
+    def failing_batch(features):
+        raise RuntimeError("model exploded")
+
+    async def main():
+        return await asyncio.gather(*(batcher.predict([i]) for i in range(3)), return_exceptions=True)
+
+    with patch("app.utils.batching.predict_malnutrition_batch", failing_batch):
+        results = asyncio.run(main())
+
+    batcher.executor.shutdown()
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_batcher_holds_in_flight_batches_until_shutdown():
+    import gc
+
+    batcher = _batcher(window_ms=10_000, max_batch_size=8)
+    release = threading.Event()
+
+    def slow_batch(features):
+        release.wait(5)
+        return [("Low", 1.0, {})] * len(features)
+
+    async def main():
+        waiting = [asyncio.ensure_future(batcher.predict([i])) for i in range(2)]
+        await asyncio.sleep(0)
+        # Nothing is full yet; shutdown flushes the queue and waits for the batch
+        shutdown = asyncio.ensure_future(batcher.shutdown())
+        await asyncio.sleep(0.05)
+        gc.collect()
+        assert len(batcher._tasks) == 1 and not shutdown.done()
+        release.set()
+        await asyncio.wait_for(shutdown, 5)
+        assert batcher._tasks == set()
+        return await asyncio.gather(*waiting)
+
+    with patch("app.utils.batching.predict_malnutrition_batch", slow_batch):
+        results = asyncio.run(main())
+
+    batcher.executor.shutdown()
+    assert results == [("Low", 1.0, {})] * 2
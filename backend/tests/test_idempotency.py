@@ -0,0 +1,174 @@
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from sqlalchemy.orm import Session
+
+import pytest
+
+from app.models.child_health_record import ChildHealthRecord
+from app.models.idempotency_key import IdempotencyKey
+from app.utils.idempotency import (
+    IdempotencyKeyInProgress, claim_idempotency_key, complete_idempotency_key, release_idempotency_key
+)
+from app.utils.photo_store import PhotoStore, get_photo_store
+
+PHOTO = ("photo.jpg", b"\xff\xd8\xff fake jpeg", "image/jpeg")
+
+
+def _post(client, child_payload, key, **overrides):
+    data = {k: str(v) for k, v in dict(child_payload, **overrides).items()}
+    return client.post("/api/predict", data=data, files={"photo_data": PHOTO}, headers={"Idempotency-Key": key})
+
+
+def _count(engine, model):
+    with Session(engine) as session:
+        return session.query(model).count()
+
+
+def test_replay_returns_stored_response_without_scoring(client, db_engine, child_payload):
+    first = _post(client, child_payload, "tablet-7-0001")
+    assert first.status_code == 200
+    assert "Idempotent-Replayed" not in first.headers
+
+    with patch("app.utils.batching.predict_malnutrition_batch") as predict:
+        replay = _post(client, child_payload, "tablet-7-0001")
+
+    assert replay.status_code == 200
+    assert replay.headers["Idempotent-Replayed"] == "true"
+    assert replay.json() == first.json()
+    predict.assert_not_called()
+    assert _count(db_engine, ChildHealthRecord) == 1
+
+
+def test_key_whose_record_was_deleted_is_processed_again(client, db_engine, child_payload):
+    first = _post(client, child_payload, "tablet-7-0002")
+    assert first.status_code == 200
+    # SQLite does not enforce the ON DELETE CASCADE, so the key outlives its record
+    with Session(db_engine) as session:
+        session.query(ChildHealthRecord).delete()
+        session.commit()
+
+    retry = _post(client, child_payload, "tablet-7-0002")
+
+    assert retry.status_code == 200
+    assert "Idempotent-Replayed" not in retry.headers
+    assert _count(db_engine, ChildHealthRecord) == 1
+    with Session(db_engine) as session:
+        (key,) = session.query(IdempotencyKey).all()
+    assert key.record_id == retry.json()["id"]
+    assert _post(client, child_payload, "tablet-7-0002").headers["Idempotent-Replayed"] == "true"
+
+
+def test_key_reused_for_a_different_request_is_rejected(client, db_engine, child_payload):
+    assert _post(client, child_payload, "tablet-7-0002").status_code == 200
+
+    response = _post(client, child_payload, "tablet-7-0002", weight=11.0)
+
+    assert response.status_code == 422
+    assert _count(db_engine, ChildHealthRecord) == 1
+
+
+def test_parallel_retries_create_one_record(client, db_engine, child_payload):
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        responses = list(pool.map(lambda _: _post(client, child_payload, "tablet-7-0003"), range(8)))
+
+    statuses = [response.status_code for response in responses]
+    assert set(statuses) <= {200, 409}
+    assert 200 in statuses
+    assert len({response.json()["id"] for response in responses if response.status_code == 200}) == 1
+    assert all(r.headers["Retry-After"] == "1" for r in responses if r.status_code == 409)
+    assert _count(db_engine, ChildHealthRecord) == 1
+    assert _count(db_engine, IdempotencyKey) == 1
+
+
+def test_failed_request_releases_its_key(client, db_engine, child_payload):
+    with patch("app.routes.prediction.inference_batcher.predict", side_effect=RuntimeError("boom")):
+        assert _post(client, child_payload, "tablet-7-0004").status_code == 500
+    assert _count(db_engine, IdempotencyKey) == 0
+
+    assert _post(client, child_payload, "tablet-7-0004").status_code == 200
+
+
+def test_failed_request_leaves_no_photo_behind(client, db_engine, child_payload):
+    photo = ("photo.jpg", b"\xff\xd8\xff photo of a failed request", "image/jpeg")
+    photo_hash = PhotoStore.hash_bytes(photo[1])
+    data = {k: str(v) for k, v in child_payload.items()}
+
+    with patch("app.routes.prediction.inference_batcher.predict", side_effect=RuntimeError("boom")):
+        assert client.post("/api/predict", data=data, files={"photo_data": photo}).status_code == 500
+    assert not get_photo_store().exists(photo_hash)
+
+    with patch("app.routes.prediction.add_to_record_stats", side_effect=RuntimeError("boom")):
+        assert client.post("/api/predict", data=data, files={"photo_data": photo}).status_code == 500
+    assert not get_photo_store().exists(photo_hash)
+    assert _count(db_engine, ChildHealthRecord) == 0
+
+
+def test_slow_request_cannot_complete_a_key_a_retry_took_over(db_engine):
+    with Session(db_engine) as first, Session(db_engine) as retry:
+        slow_claim, _ = claim_idempotency_key(first, "tablet-7-0006", "hash")
+        # The first request outlives the pending timeout, so a retry takes the key over
+        first.query(IdempotencyKey).update({IdempotencyKey.created_at: datetime.datetime(2020, 1, 1)})
+        first.commit()
+        slow_claim = slow_claim._replace(created_at=datetime.datetime(2020, 1, 1))
+        retry_claim, _ = claim_idempotency_key(retry, "tablet-7-0006", "hash")
+        assert retry_claim is not None
+
+        with pytest.raises(IdempotencyKeyInProgress):
+            complete_idempotency_key(first, slow_claim, 1)
+        release_idempotency_key(first, slow_claim)
+
+        # The retry's claim survives the slow request giving up, and completes normally
+        complete_idempotency_key(retry, retry_claim, 2)
+        retry.commit()
+        assert retry.query(IdempotencyKey.record_id).scalar() == 2
+
+
+def test_expired_key_is_processed_again(client, db_engine, child_payload):
+    assert _post(client, child_payload, "tablet-7-0005").status_code == 200
+    with Session(db_engine) as session:
+        session.query(IdempotencyKey).update({IdempotencyKey.created_at: datetime.datetime(2020, 1, 1)})
+        session.commit()
+
+    response = _post(client, child_payload, "tablet-7-0005")
+
+    assert response.status_code == 200
+    assert "Idempotent-Replayed" not in response.headers
+    assert _count(db_engine, ChildHealthRecord) == 2
+
+
+def test_requests_without_a_key_are_not_deduplicated(client, db_engine, child_payload):
+    data = {k: str(v) for k, v in child_payload.items()}
+    for _ in range(2):
+        assert client.post("/api/predict", data=data, files={"photo_data": PHOTO}).status_code == 200
+    assert _count(db_engine, ChildHealthRecord) == 2
+
+
+def test_migration_creates_and_drops_table(tmp_path):
+    import importlib.util
+    import os
+
+    import sqlalchemy as sa
+    from alembic.migration import MigrationContext
+    from alembic.operations import Operations
+
+    path = os.path.join(
+        os.path.dirname(os.path.dirname(__file__)),
+        "alembic", "versions", "c7e1f04a9b3d_add_idempotency_keys_table.py"
+    )
+    spec = importlib.util.spec_from_file_location("idempotency_migration", path)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+
+    engine = sa.create_engine(f"sqlite:///{tmp_path / 'migration.db'}")
+    with engine.begin() as connection:
+        connection.execute(sa.text("CREATE TABLE child_health_records (id INTEGER PRIMARY KEY)"))
+        with Operations.context(MigrationContext.configure(connection)):
+            migration.upgrade()
+        assert {c["name"] for c in sa.inspect(connection).get_columns("idempotency_keys")} == {
+            "key", "request_hash", "record_id", "created_at"
+        }
+        with Operations.context(MigrationContext.configure(connection)):
+            migration.downgrade()
+        assert "idempotency_keys" not in sa.inspect(connection).get_table_names()
@@ -1,37 +1,24 @@
-import sys
-import os
-from pathlib import Path
-import pytest
-
-# Find the project root directory
-project_root = Path(__file__).parent.parent
-sys.path.insert(0, str(project_root))
-
-from app.models.prediction_model import PredictionInput, PredictionOutput, IncomeLevel, Sex
-
-
-def test_prediction_input_model():
-    # Test valid input
-    valid_input = {
-        "age": 25,
-        "height": 165,
-        "weight": 60,
-        "income_level": "lower_middle",
-        "sex": "female"
-    }
-    input_model = PredictionInput(**valid_input)
-    assert input_model.age == 25
-    assert input_model.height == 165
-    assert input_model.weight == 60
-    assert input_model.income_level == IncomeLevel.lower_middle
-    assert input_model.sex == Sex.female
-
-    # Test invalid income_level
-    with pytest.raises(ValueError):
-        PredictionInput(
-            age=25,
-            height=165,
-            weight=60,
-            income_level="invalid_level",
-            sex="female"
-        )
\ No newline at end of file
+JPEG_BYTES = b"\xff\xd8\xff fake jpeg"
+
+
+def test_health_check(client):
+    response = client.get("/")
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "healthy"
+
+
+def test_predict_rejects_incomplete_forms(client, child_payload):
+    form = {k: str(v) for k, v in child_payload.items() if k != "whr"}
+    response = client.post("/api/predict", data=form, files={"photo_data": ("photo.jpg", JPEG_BYTES, "image/jpeg")})
+
+    assert response.status_code == 422
+    assert [error["loc"] for error in response.json()["detail"]] == [["body", "whr"]]
+
+
+def test_predict_rejects_non_numeric_measurements(client, child_payload):
+    form = dict({k: str(v) for k, v in child_payload.items()}, height="tall")
+    response = client.post("/api/predict", data=form, files={"photo_data": ("photo.jpg", JPEG_BYTES, "image/jpeg")})
+
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body", "height"]
@@ -0,0 +1,176 @@
+import os
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+import xgboost as xgb
+
+from app.config import APP_ROOT, MODEL_FILES_DIR
+from app.models.ml_model import MalnutritionModel, get_model
+from scripts.benchmark_inference import legacy_predict, sample_features
+
+DATASET_PATH = os.path.join(os.path.dirname(APP_ROOT), "datasets", "Malnutrition data.csv")
+
+
+@pytest.fixture(scope="module")
+def model():
+    return get_model()
+
+
+@pytest.fixture(scope="module")
+def flat_model():
+    return MalnutritionModel(engine="flat")
+
+
+@pytest.fixture(params=["native", "flat"])
+def engine_model(request, model, flat_model):
+    """The model under each inference engine; the Docker image runs the flat one"""
+    return flat_model if request.param == "flat" else model
+
+
+def _dataset_matrix(feature_names, fill_missing):
+    """Model features for every row of the raw dataset
+
+    The CSV only has Sex/Age/Height/Weight; Height_m and BMI are derived and the
+    z-scores and WHR are either left missing or filled with seeded values.
+    """
+    df = pd.read_csv(DATASET_PATH)
+    X = np.full((len(df), len(feature_names)), np.nan)
+    for column in ("Sex", "Age", "Height", "Weight"):
+        X[:, feature_names.index(column)] = df[column]
+    X[:, feature_names.index("Height_m")] = df["Height"] / 100
+    X[:, feature_names.index("BMI")] = df["Weight"] / (df["Height"] / 100) ** 2
+    if fill_missing:
+        rng = np.random.default_rng(0)
+        for index in (4, 5, 6):
+            X[:, index] = rng.normal(-1, 1.5, len(df))
+        X[:, feature_names.index("WHR")] = rng.uniform(0.7, 1.1, len(df))
+    return X
+
+
+def test_fast_path_matches_dataframe_path(model):
+    for features in sample_features(100):
+        result = model.predict(features)
+        assert "timestamp" in result
+        result.pop("timestamp")
+        assert result == legacy_predict(model, features)
+
+
+def test_fast_path_accepts_model_column_names(engine_model):
+    features = sample_features(1)[0]
+    renamed = {
+        "Height-for-age (Mean Z-score)" if k == "height_for_age_z" else k: v
+        for k, v in features.items()
+    }
+    assert engine_model.predict(renamed)["class_probabilities"] == engine_model.predict(features)["class_probabilities"]
+
+
+def test_fast_path_reports_missing_features(engine_model):
+    features = sample_features(1)[0]
+    del features["BMI"]
+    with pytest.raises(ValueError, match="BMI"):
+        engine_model.predict(features)
+
+
+def test_predict_batch_matches_single_rows(engine_model):
+    samples = sample_features(20)
+    matrix = np.array([list(features.values()) for features in samples])
+    batch = engine_model.predict_batch(matrix)
+    for features, result in zip(samples, batch):
+        single = engine_model.predict(features)
+        assert result["predicted_class"] == single["predicted_class"]
+        assert result["class_probabilities"] == pytest.approx(single["class_probabilities"], abs=1e-6)
+
+
+@pytest.mark.parametrize("fill_missing", [False, True])
+def test_flat_evaluator_matches_xgboost_on_dataset(model, flat_model, fill_missing):
+    X = _dataset_matrix(model.feature_names, fill_missing)
+    booster = model.model.get_booster()
+
+    expected_margin = booster.predict(xgb.DMatrix(X, feature_names=model.feature_names), output_margin=True)
+    np.testing.assert_array_equal(flat_model.flat_model.predict_margin(X), expected_margin)
+
+    # libm's expf may round a handful of values differently, never by more than one ulp
+    expected = model.model.predict_proba(X)
+    actual = flat_model.flat_model.predict_proba(X)
+    np.testing.assert_array_max_ulp(actual, expected, maxulp=1)
+    np.testing.assert_array_equal(actual.argmax(axis=1), expected.argmax(axis=1))
+
+
+def test_flat_engine_predict_matches_native(model, flat_model):
+    for features in sample_features(20):
+        native = model.predict(features)
+        flat = flat_model.predict(features)
+        assert flat["predicted_class"] == native["predicted_class"]
+        assert flat["class_probabilities"] == pytest.approx(native["class_probabilities"], rel=1e-6)
+
+
+def test_unknown_engine_is_rejected():
+    with pytest.raises(ValueError, match="Unknown inference engine"):
+        MalnutritionModel(engine="gpu")
+
+
+def test_flat_engine_memory_maps_exported_arrays(model, flat_model, tmp_path):
+    from scripts.export_model_arrays import export_model_arrays
+
+    arrays_dir = str(tmp_path / "flat_model")
+    export_model_arrays(os.path.join(MODEL_FILES_DIR, "malnutrition_rf_model.joblib"), arrays_dir)
+
+    mapped = MalnutritionModel(engine="flat", arrays_dir=arrays_dir)
+
+    # The pickled model is never loaded and the trees are views of the files
+    assert mapped.model is None
+    assert isinstance(mapped.flat_model.children, np.memmap)
+    assert isinstance(mapped.flat_model.split_feature, np.memmap)
+    X = _dataset_matrix(model.feature_names, fill_missing=True)
+    np.testing.assert_array_equal(mapped.flat_model.predict_proba(X), flat_model.flat_model.predict_proba(X))
+
+
+def test_flat_engine_ignores_arrays_from_another_model(flat_model, tmp_path):
+    arrays_dir = str(tmp_path / "flat_model")
+    flat_model.flat_model.save(arrays_dir, source_digest="0" * 64)
+
+    rebuilt = MalnutritionModel(engine="flat", arrays_dir=arrays_dir)
+
+    assert rebuilt.model is not None
+    assert not isinstance(rebuilt.flat_model.children, np.memmap)
+
+
+def test_repeat_predictions_are_served_from_cache(model):
+    from app.models.ml_model import predict_malnutrition, predict_malnutrition_batch, prediction_cache
+    from app.utils.cache import CACHE_HITS
+
+    features = [0, 24, 80.0, 10.0, -1.5, -1.0, -1.2, 0.8, 15.625, 0.9]
+    hits = CACHE_HITS.value(cache="prediction")
+
+    with patch.object(model.model, "predict_proba", wraps=model.model.predict_proba) as spy:
+        first = predict_malnutrition(features)
+        first[2]["Low"] = -1
+        second = predict_malnutrition(features)
+        # Rows that round to the same key are scored once, even inside one batch
+        batch = predict_malnutrition_batch([
+            features,
+            [0, 24, 80.00001] + features[3:],
+            features[:1] + [30] + features[2:]
+        ])
+
+    assert spy.call_count == 2
+    assert spy.call_args[0][0].shape == (1, 10)
+    assert second[2]["Low"] != -1
+    assert batch[0] == batch[1] == second
+    assert CACHE_HITS.value(cache="prediction") == hits + 2
+    assert len(prediction_cache) == 2
+
+
+def test_prediction_cache_is_dropped_when_the_model_changes(model, monkeypatch):
+    from app.models.ml_model import predict_malnutrition, prediction_cache
+
+    predict_malnutrition([1, 12, 75.0, 9.0, -0.5, 0.2, -0.1, 0.75, 16.0, 0.8])
+    assert len(prediction_cache) == 1
+
+    monkeypatch.setattr(model, "version", "retrained+000000000000")
+    predict_malnutrition([1, 12, 75.0, 9.0, -0.5, 0.2, -0.1, 0.75, 16.0, 0.8])
+
+    assert len(prediction_cache) == 1
+    assert next(iter(prediction_cache._entries))[0] == "retrained+000000000000"
@@ -1,35 +1,39 @@
-import sys
-import os
-from pathlib import Path
 import pytest
+from pydantic import ValidationError
 
-# Find the project root directory
-project_root = Path(__file__).parent.parent
-sys.path.insert(0, str(project_root))
-
-from app.models.prediction_model import PredictionInput, PredictionOutput, IncomeLevel, Sex
-def test_prediction_input_model():
-    # Test valid input
-    valid_input = {
-        "age": 25,
-        "height": 165,
-        "weight": 60,
-        "income_level": "lower_middle",
-        "sex": "female"
-    }
-    input_model = PredictionInput(**valid_input)
-    assert input_model.age == 25
-    assert input_model.height == 165
-    assert input_model.weight == 60
-    assert input_model.income_level == IncomeLevel.lower_middle
-    assert input_model.sex == Sex.female
-
-    # Test invalid income_level
-    with pytest.raises(ValueError):
-        PredictionInput(
-            age=25,
-            height=165,
-            weight=60,
-            income_level="invalid_level",
-            sex="female"
-        )
\ No newline at end of file
+from app.models.prediction_model import MalnutritionInput, MalnutritionOutput
+
+
+def test_malnutrition_input_derives_height_and_bmi():
+    data = MalnutritionInput(
+        Sex=0, Age=2, Height=80, Weight=10,
+        height_for_age_z=-1.5, weight_for_height_z=-1.0, weight_for_age_z=-1.2, WHR=0.9,
+        income_level="lower_middle"
+    )
+
+    assert data.Height_m == 0.8
+    assert data.BMI == 10 / 0.8 ** 2
+    assert (data.height_for_age_z, data.weight_for_height_z, data.weight_for_age_z) == (-1.5, -1.0, -1.2)
+    # Fields the model does not know are ignored
+    assert not hasattr(data, "income_level")
+
+
+def test_malnutrition_input_rejects_invalid_measurements():
+    with pytest.raises(ValidationError):
+        MalnutritionInput(Sex=2, Age=2, Height=80, Weight=10)
+    with pytest.raises(ValidationError):
+        MalnutritionInput(Sex=0, Age=2, Height=0, Weight=10)
+    with pytest.raises(ValidationError):
+        MalnutritionInput(Sex=0, Age=-1, Height=80, Weight=10)
+
+
+def test_malnutrition_output():
+    output = MalnutritionOutput(
+        predicted_class="Low",
+        confidence=0.9,
+        class_probabilities={"Low": 0.9, "Moderate": 0.05, "High": 0.03, "Critical": 0.02},
+        timestamp="2025-03-01T00:00:00"
+    )
+    assert output.model_dump()["class_probabilities"]["Low"] == 0.9
+    with pytest.raises(ValidationError):
+        MalnutritionOutput(predicted_class="Low", confidence=0.9, class_probabilities={})
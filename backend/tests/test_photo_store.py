@@ -0,0 +1,147 @@
+import base64
+import importlib.util
+import io
+import os
+
+import pytest
+import sqlalchemy as sa
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from PIL import Image
+
+from app.utils.photo_store import LocalPhotoStore, detect_content_type, get_photo_store
+
+JPEG_BYTES = b"\xff\xd8\xff\xe0" + b"fake jpeg body" * 10
+PNG_BYTES = b"\x89PNG\r\n\x1a\n" + b"fake png body"
+
+MIGRATION_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)),
+    "alembic", "versions", "534575455d99_move_child_photos_to_blob_store.py"
+)
+
+
+def test_local_store_dedupes_by_content_hash(tmp_path):
+    store = LocalPhotoStore(str(tmp_path))
+
+    first = store.put(JPEG_BYTES)
+    second = store.put(JPEG_BYTES)
+
+    assert first == second == LocalPhotoStore.hash_bytes(JPEG_BYTES)
+    assert store.get(first) == JPEG_BYTES
+    assert b"".join(store.iter_chunks(first)) == JPEG_BYTES
+    stored_files = [f for _, _, files in os.walk(tmp_path) for f in files]
+    assert stored_files == [first]
+
+
+def test_local_store_rejects_malformed_hashes(tmp_path):
+    store = LocalPhotoStore(str(tmp_path))
+    with pytest.raises(ValueError):
+        store.open("../../etc/passwd")
+
+
+def test_detect_content_type():
+    assert detect_content_type(JPEG_BYTES) == "image/jpeg"
+    assert detect_content_type(PNG_BYTES, "image/jpeg") == "image/png"
+    assert detect_content_type(b"unknown", "image/heic") == "image/heic"
+
+
+def test_predict_stores_photo_hash_and_image_is_served_from_store(client, child_payload):
+    response = client.post(
+        "/api/predict",
+        data={k: str(v) for k, v in child_payload.items()},
+        files={"photo_data": ("photo.png", PNG_BYTES, "image/png")}
+    )
+    assert response.status_code == 200
+    child_id = response.json()["id"]
+
+    image = client.get(f"/api/image/{child_id}")
+    assert image.status_code == 200
+    assert image.content == PNG_BYTES
+    assert image.headers["content-type"] == "image/png"
+
+    child = client.get(f"/api/child/{child_id}").json()[0]
+    assert base64.b64decode(child["photo_data"]) == PNG_BYTES
+
+
+def test_image_for_unknown_child_is_404(client):
+    assert client.get("/api/image/12345").status_code == 404
+
+
+def _real_png(width=640, height=480):
+    output = io.BytesIO()
+    Image.new("RGB", (width, height), (200, 120, 40)).save(output, format="PNG")
+    return output.getvalue()
+
+
+def test_image_thumbnail_is_generated_once_and_cached(client, make_child):
+    store = get_photo_store()
+    photo_hash = store.put(_real_png())
+    child_id = make_child(photo_hash=photo_hash, photo_content_type="image/png")
+
+    response = client.get(f"/api/image/{child_id}?size=64")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/jpeg"
+    with Image.open(io.BytesIO(response.content)) as thumbnail:
+        assert thumbnail.size == (64, 48)
+    assert store.exists(photo_hash, "thumb64")
+    assert client.get(f"/api/image/{child_id}?size=64").content == response.content
+    assert client.get(f"/api/image/{child_id}?size=128").status_code == 422
+
+
+def test_image_revalidation_returns_304(client, make_child):
+    photo_hash = get_photo_store().put(_real_png())
+    child_id = make_child(photo_hash=photo_hash, photo_content_type="image/png")
+
+    response = client.get(f"/api/image/{child_id}?size=256")
+    etag = response.headers["etag"]
+    assert etag == f'"{photo_hash}-256"'
+    assert response.headers["cache-control"].startswith("private, max-age=")
+    assert response.headers["last-modified"] == "Sat, 01 Mar 2025 00:00:00 GMT"
+
+    cached = client.get(f"/api/image/{child_id}?size=256", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["etag"] == etag
+
+    since = client.get(
+        f"/api/image/{child_id}", headers={"If-Modified-Since": response.headers["last-modified"]}
+    )
+    assert since.status_code == 304
+
+    stale = client.get(f"/api/image/{child_id}", headers={"If-None-Match": etag})
+    assert stale.status_code == 200
+
+
+def _run_migration(connection, direction):
+    spec = importlib.util.spec_from_file_location("photo_migration", MIGRATION_PATH)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+    with Operations.context(MigrationContext.configure(connection)):
+        getattr(migration, direction)()
+
+
+def test_migration_moves_base64_photos_into_store(tmp_path):
+    engine = sa.create_engine(f"sqlite:///{tmp_path / 'migration.db'}")
+    with engine.begin() as connection:
+        connection.execute(sa.text("CREATE TABLE child_health_records (id INTEGER PRIMARY KEY, photo_data TEXT)"))
+        connection.execute(
+            sa.text("INSERT INTO child_health_records (id, photo_data) VALUES (1, :a), (2, :a), (3, NULL)"),
+            {"a": base64.b64encode(JPEG_BYTES).decode()}
+        )
+
+        _run_migration(connection, "upgrade")
+
+        rows = connection.execute(sa.text(
+            "SELECT id, photo_hash, photo_content_type FROM child_health_records ORDER BY id"
+        )).fetchall()
+        photo_hash = LocalPhotoStore.hash_bytes(JPEG_BYTES)
+        assert [tuple(row) for row in rows] == [(1, photo_hash, "image/jpeg"), (2, photo_hash, "image/jpeg"), (3, None, None)]
+        assert get_photo_store().get(photo_hash) == JPEG_BYTES
+        columns = [c["name"] for c in sa.inspect(connection).get_columns("child_health_records")]
+        assert "photo_data" not in columns
+
+        _run_migration(connection, "downgrade")
+
+        restored = connection.execute(sa.text("SELECT photo_data FROM child_health_records WHERE id = 1")).scalar()
+        assert base64.b64decode(restored) == JPEG_BYTES
@@ -0,0 +1,173 @@
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from app.models.child_health_record import ChildHealthRecord
+from app.models.ml_model import get_model
+
+pytestmark = pytest.mark.usefixtures("inference_engine")
+
+
+def _count_records(engine):
+    from sqlalchemy.orm import Session
+    with Session(engine) as session:
+        return session.query(ChildHealthRecord).count()
+
+
+def test_batch_prediction_json(client, db_engine, child_payload):
+    children = [dict(child_payload, name=f"Child {i}", age=1 + i) for i in range(5)]
+
+    model = get_model()
+    with patch.object(model, "_predict_proba", wraps=model._predict_proba) as spy:
+        response = client.post("/api/predict/batch", json=children)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["count"] == 5
+    assert [result["name"] for result in body["results"]] == [c["name"] for c in children]
+    assert all(result["id"] is not None for result in body["results"])
+    # The whole batch is scored by one model call
+    assert spy.call_count == 1
+    assert spy.call_args[0][0].shape == (5, 10)
+    assert _count_records(db_engine) == 5
+
+
+def test_batch_prediction_matches_single_prediction(client, child_payload):
+    from app.models.ml_model import predict_malnutrition
+    from app.routes.prediction import build_features
+
+    response = client.post("/api/predict/batch", json={"children": [child_payload]})
+    result = response.json()["results"][0]
+
+    features = build_features(**{k: v for k, v in child_payload.items() if k != "name"})
+    predicted_class, confidence, class_probabilities = predict_malnutrition(features)
+    assert result["predicted_class"] == predicted_class
+    assert result["confidence"] == confidence
+    assert result["class_probabilities"] == class_probabilities
+
+
+def test_batch_prediction_csv_upload(client, db_engine, child_payload):
+    header = ",".join(child_payload)
+    rows = [",".join(str(v) for v in dict(child_payload, name=f"Kid {i}").values()) for i in range(3)]
+    csv_content = "\n".join([header] + rows).encode()
+
+    response = client.post(
+        "/api/predict/batch",
+        files={"file": ("screening.csv", csv_content, "text/csv")}
+    )
+
+    assert response.status_code == 200
+    assert response.json()["count"] == 3
+    assert _count_records(db_engine) == 3
+
+
+def test_batch_prediction_csv_computes_empty_zscore_cells(client, db_engine, child_payload):
+    from app.models.zscores import compute_child_zscores
+
+    header = ",".join(child_payload)
+    blank = dict(child_payload, height_for_age_z="", weight_for_height_z="", weight_for_age_z="")
+    rows = [
+        ",".join(str(v) for v in dict(blank, name="Blank").values()),
+        ",".join(str(v) for v in dict(blank, name="Given", weight_for_age_z=-2.5).values()),
+    ]
+    csv_content = "\n".join([header] + rows).encode()
+
+    response = client.post(
+        "/api/predict/batch",
+        files={"file": ("screening.csv", csv_content, "text/csv")}
+    )
+
+    assert response.status_code == 200, response.json()
+    from sqlalchemy.orm import Session
+    with Session(db_engine) as session:
+        blank_row, given_row = session.query(ChildHealthRecord).order_by(ChildHealthRecord.name).all()
+    hfa, wfh, wfa = compute_child_zscores(0, 2, 80.0, 10.0)
+    assert (blank_row.height_for_age_z, blank_row.weight_for_height_z, blank_row.weight_for_age_z) == (hfa, wfh, wfa)
+    assert (given_row.height_for_age_z, given_row.weight_for_age_z) == (hfa, -2.5)
+
+
+def test_batch_prediction_rejects_invalid_rows(client, db_engine, child_payload):
+    children = [child_payload, dict(child_payload, height=-1)]
+
+    response = client.post("/api/predict/batch", json=children)
+
+    assert response.status_code == 422
+    assert response.json()["detail"]["invalid_rows"][0]["index"] == 1
+    assert _count_records(db_engine) == 0
+
+
+def test_predict_runs_inference_off_the_event_loop(client, db_engine, child_payload):
+    from app.models.ml_model import predict_malnutrition_batch
+
+    threads = []
+
+    def recording_predict(features):
+        threads.append(threading.current_thread().name)
+        return predict_malnutrition_batch(features)
+
+    with patch("app.utils.batching.predict_malnutrition_batch", recording_predict):
+        response = client.post(
+            "/api/predict",
+            data={k: str(v) for k, v in child_payload.items()},
+            files={"photo_data": ("photo.jpg", b"\xff\xd8\xff fake jpeg", "image/jpeg")}
+        )
+
+    assert response.status_code == 200
+    assert response.json()["id"] is not None
+    assert threads and threads[0].startswith("inference")
+    assert _count_records(db_engine) == 1
+
+    metrics_text = client.get("/metrics").text
+    assert "nutriguard_inference_queue_depth 0" in metrics_text
+    assert "nutriguard_inference_wait_seconds_count" in metrics_text
+    assert "nutriguard_inference_batch_size_count" in metrics_text
+
+
+def test_predict_returns_503_when_inference_queue_is_full(client, child_payload):
+    from app.utils.executor import InferenceQueueFull
+
+    async def full(*args):
+        raise InferenceQueueFull("Inference queue is full")
+
+    with patch("app.utils.batching.inference_executor.run", full):
+        response = client.post(
+            "/api/predict",
+            data={k: str(v) for k, v in child_payload.items()},
+            files={"photo_data": ("photo.jpg", b"\xff\xd8\xff fake jpeg", "image/jpeg")}
+        )
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_predict_computes_missing_zscores_server_side(client, child_payload):
+    from app.models.zscores import compute_child_zscores
+
+    measurements = {k: v for k, v in child_payload.items() if not k.endswith("_z")}
+    response = client.post(
+        "/api/predict",
+        data={k: str(v) for k, v in measurements.items()},
+        files={"photo_data": ("photo.jpg", b"\xff\xd8\xff fake jpeg", "image/jpeg")}
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    hfa, wfh, wfa = compute_child_zscores(0, 2, 80.0, 10.0)
+    assert (body["height_for_age_z"], body["weight_for_height_z"], body["weight_for_age_z"]) == (hfa, wfh, wfa)
+
+
+def test_batch_prediction_computes_zscores_and_rejects_children_outside_reference(client, db_engine, child_payload):
+    measurements = {k: v for k, v in child_payload.items() if not k.endswith("_z")}
+    children = [measurements, dict(measurements, height_for_age_z=-2.0), dict(measurements, age=6)]
+
+    response = client.post("/api/predict/batch", json=children)
+
+    assert response.status_code == 422
+    invalid = response.json()["detail"]["invalid_rows"]
+    assert [row["index"] for row in invalid] == [2]
+    assert "height_for_age_z" in invalid[0]["error"]
+
+    response = client.post("/api/predict/batch", json=children[:2])
+    assert response.status_code == 200
+    assert _count_records(db_engine) == 2
@@ -0,0 +1,115 @@
+import os
+import re
+import threading
+import time
+from unittest.mock import patch
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.auth.auth_handler import auth_handler
+from app.utils.profiling import PROFILED_REQUESTS, ProfilingMiddleware, StackSampler
+
+
+def _busy_for(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def _profiled_client(tmp_path, sample_rate=0.0):
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware, sample_rate=sample_rate, interval_ms=1, directory=str(tmp_path))
+
+    # A sync route, so the work happens on a threadpool worker rather than the event loop
+    @app.get("/slow")
+    def slow():
+        _busy_for(0.05)
+        return {"done": True}
+
+    return TestClient(app)
+
+
+def _bearer(role):
+    return {"Authorization": f"Bearer {auth_handler.encode_token('1', role)['access_token']}"}
+
+
+def test_admins_get_the_collapsed_stacks_back(tmp_path):
+    client = _profiled_client(tmp_path)
+    before = PROFILED_REQUESTS.value(trigger="header")
+
+    response = client.get("/slow", headers=dict(_bearer("admin"), **{"X-Profile": "collapsed"}))
+
+    assert response.status_code == 200
+    assert response.headers["x-profiled-status"] == "200"
+    lines = response.text.splitlines()
+    stack, count = lines[0].rsplit(" ", 1)
+    assert int(count) >= 1 and ";" in stack
+    assert any("_busy_for (tests/test_profiling.py" in line for line in lines)
+    assert PROFILED_REQUESTS.value(trigger="header") == before + 1
+    assert os.listdir(tmp_path) == []
+
+
+def test_saved_profiles_keep_the_normal_response(tmp_path):
+    client = _profiled_client(tmp_path)
+
+    response = client.get("/slow", headers=dict(_bearer("admin"), **{"X-Profile": "save"}))
+
+    assert response.json() == {"done": True}
+    name = response.headers["x-profile-file"]
+    assert re.fullmatch(r"\d{8}T\d{6}-GET-slow-[0-9a-f]{8}\.collapsed", name)
+    with open(tmp_path / name) as profile_file:
+        assert "_busy_for" in profile_file.read()
+
+
+def test_only_admins_can_ask_for_a_profile(tmp_path):
+    client = _profiled_client(tmp_path)
+
+    assert client.get("/slow", headers={"X-Profile": "collapsed"}).status_code == 403
+    assert client.get("/slow", headers=dict(_bearer("user"), **{"X-Profile": "collapsed"})).status_code == 403
+    assert client.get("/slow", headers=dict(_bearer("admin"), **{"X-Profile": "pstats"})).status_code == 400
+    response = client.get("/slow")
+    assert response.json() == {"done": True} and "x-profile-file" not in response.headers
+
+
+def test_sampled_requests_are_saved(tmp_path):
+    client = _profiled_client(tmp_path, sample_rate=1.0)
+    before = PROFILED_REQUESTS.value(trigger="sampled")
+
+    client.get("/slow")
+    client.get("/slow")
+
+    assert len(os.listdir(tmp_path)) == 2
+    assert PROFILED_REQUESTS.value(trigger="sampled") == before + 2
+
+
+def test_sampler_is_stopped_off_the_event_loop(tmp_path):
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware, sample_rate=1.0, interval_ms=50, directory=str(tmp_path))
+    threads = {}
+
+    @app.get("/async")
+    async def on_the_loop():
+        threads["loop"] = threading.get_ident()
+        return {}
+
+    stop = StackSampler.stop
+
+    def recording_stop(sampler):
+        threads["stop"] = threading.get_ident()
+        stop(sampler)
+
+    with patch.object(StackSampler, "stop", recording_stop):
+        assert TestClient(app).get("/async").status_code == 200
+    assert threads["stop"] != threads["loop"]
+
+
+def test_idle_threads_are_not_sampled():
+    sampler = StackSampler(interval=0.001)
+    sampler.start()
+    _busy_for(0.02)
+    sampler.stop()
+    assert sampler.samples
+    leaves = [stack.rsplit(";", 1)[1] for stack in sampler.samples]
+    assert not any(leaf.startswith(("wait (threading.py", "select (selectors.py")) for leaf in leaves)
+    assert all(stack.split(";")[0] != "profiler" for stack in sampler.samples)
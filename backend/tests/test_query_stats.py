@@ -0,0 +1,65 @@
+import os
+import re
+import tempfile
+
+import sqlalchemy as sa
+from fastapi import Depends, FastAPI, Request
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.database import database
+from app.database.query_stats import QUERIES_PER_REQUEST, QueryStatsMiddleware, track_queries
+
+
+def _server_timing(response):
+    match = re.fullmatch(r'db;dur=([0-9.]+);desc="(\d+) queries"', response.headers["server-timing"])
+    assert match, response.headers["server-timing"]
+    return int(match.group(2)), float(match.group(1))
+
+
+def test_server_timing_counts_each_requests_queries(client, make_child, child_payload):
+    for i in range(3):
+        make_child(name=f"Child {i}")
+    observed = QUERIES_PER_REQUEST.count()
+
+    # Async session on the read routes
+    count, duration = _server_timing(client.get("/api/children"))
+    assert count == 1
+    assert duration >= 0
+    # Sync session on the write routes
+    response = client.post(
+        "/api/predict",
+        data={k: str(v) for k, v in child_payload.items()},
+        files={"photo_data": ("photo.jpg", b"\xff\xd8\xff fake jpeg", "image/jpeg")}
+    )
+    assert response.status_code == 200
+    count, _ = _server_timing(response)
+    assert count >= 1
+    # Routes that never touch the database report nothing
+    assert _server_timing(client.get("/api/model-info")) == (0, 0.0)
+
+    assert QUERIES_PER_REQUEST.count() == observed + 3
+
+
+def test_get_requests_read_from_the_replica(monkeypatch):
+    replica_url = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "replica.db")
+    replica = sa.create_engine(replica_url, **database.engine_options(replica_url))
+    track_queries(replica)
+    monkeypatch.setattr(database, "ReadSessionLocal", sessionmaker(bind=replica))
+
+    app = FastAPI()
+    app.add_middleware(QueryStatsMiddleware)
+
+    @app.api_route("/bind", methods=["GET", "POST"])
+    async def bind(request: Request, db: Session = Depends(database.get_db)):
+        db.execute(sa.text("SELECT 1"))
+        return {"replica": db.get_bind() is replica}
+
+    with TestClient(app) as test_client:
+        read = test_client.get("/bind")
+        write = test_client.post("/bind")
+
+    assert read.json() == {"replica": True}
+    assert write.json() == {"replica": False}
+    assert _server_timing(read)[0] == 1
+    assert _server_timing(write)[0] == 1
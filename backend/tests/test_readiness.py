@@ -0,0 +1,38 @@
+from unittest.mock import patch
+
+
+def test_ready_once_model_is_warm(client):
+    response = client.get("/ready")
+
+    assert response.status_code == 200
+    assert response.json() == {"ready": True, "checks": {"model": True, "database": True}}
+    assert "nutriguard_model_load_seconds " in client.get("/metrics").text
+
+
+def test_not_ready_until_model_is_loaded(client, monkeypatch):
+    import app.models.ml_model as ml_model
+
+    monkeypatch.setattr(ml_model, "model_instance", None)
+    response = client.get("/ready")
+
+    assert response.status_code == 503
+    assert response.json()["checks"]["model"] is False
+
+
+def test_not_ready_when_database_is_unreachable(client):
+    with patch("app.main.ping_database", return_value=False):
+        response = client.get("/ready")
+
+    assert response.status_code == 503
+    assert response.json()["checks"] == {"model": True, "database": False}
+
+
+def test_startup_warms_the_model(db_engine):
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with patch("app.main.warm_up_model") as warm_up:
+        with TestClient(app):
+            pass
+
+    warm_up.assert_called_once()
@@ -0,0 +1,90 @@
+import io
+
+from PIL import Image
+
+from app.database.query_stats import DB_COMMIT_SECONDS
+from app.models.ml_model import MODEL_INFERENCE_SECONDS, get_model
+from app.utils.photo_store import IMAGE_ENCODE_SECONDS
+from app.utils.request_metrics import HTTP_REQUEST_SECONDS, HTTP_REQUESTS, HTTP_REQUESTS_IN_FLIGHT
+from app.utils.thumbnails import make_thumbnail
+
+
+def _predict(client, payload):
+    return client.post(
+        "/api/predict",
+        data={k: str(v) for k, v in payload.items()},
+        files={"photo_data": ("photo.jpg", b"\xff\xd8\xff fake jpeg", "image/jpeg")}
+    )
+
+
+def test_requests_are_labelled_by_route_template(client, make_child):
+    first, second = make_child(name="Ana"), make_child(name="Ben")
+    route = "/api/child/{child_id}"
+    ok = HTTP_REQUESTS.value(method="GET", route=route, status="200")
+    missing = HTTP_REQUESTS.value(method="GET", route=route, status="404")
+    timed = HTTP_REQUEST_SECONDS.count(method="GET", route=route)
+
+    assert client.get(f"/api/child/{first}").status_code == 200
+    assert client.get(f"/api/child/{second}").status_code == 200
+    assert client.get("/api/child/999999").status_code == 404
+
+    assert HTTP_REQUESTS.value(method="GET", route=route, status="200") == ok + 2
+    assert HTTP_REQUESTS.value(method="GET", route=route, status="404") == missing + 1
+    assert HTTP_REQUEST_SECONDS.count(method="GET", route=route) == timed + 3
+    assert HTTP_REQUESTS_IN_FLIGHT.value(method="GET", route=route) == 0
+
+
+def test_unmatched_paths_share_one_series(client):
+    before = HTTP_REQUESTS.value(method="POST", route="unmatched", status="405")
+    assert client.post("/no/such/page").status_code == 405
+    assert client.post("/another/missing/page").status_code == 405
+    assert HTTP_REQUESTS.value(method="POST", route="unmatched", status="405") == before + 2
+
+
+def test_paths_only_the_frontend_fallback_matches_are_unmatched():
+    from fastapi.testclient import TestClient
+    from starlette.routing import Mount
+    from app.main import app
+    from app.utils.request_metrics import route_template
+
+    # GETs fall through to the frontend route, which would otherwise label every scanned path.
+    # There is no frontend build here, so those requests fail; only their labels matter.
+    client = TestClient(app, raise_server_exceptions=False)
+    gets = HTTP_REQUEST_SECONDS.count(method="GET", route="unmatched")
+    client.get("/wp-login.php")
+    client.get("/.env")
+    assert HTTP_REQUEST_SECONDS.count(method="GET", route="unmatched") == gets + 2
+    assert HTTP_REQUEST_SECONDS.count(method="GET", route="/{full_path:path}") == 0
+
+    scope = {"type": "http", "method": "GET", "path": "/.git/config", "root_path": ""}
+    assert route_template([Mount("/", app=lambda scope, receive, send: None)], scope) == "unmatched"
+    assert route_template(app.router.routes, dict(scope, path="/api/stats")) == "/api/stats"
+
+
+def test_metrics_endpoint_exports_the_timers(client, child_payload):
+    inferred = MODEL_INFERENCE_SECONDS.count(engine=get_model().engine)
+    encoded = IMAGE_ENCODE_SECONDS.count(operation="base64")
+    committed = DB_COMMIT_SECONDS.count()
+
+    assert _predict(client, child_payload).status_code == 200
+
+    assert MODEL_INFERENCE_SECONDS.count(engine=get_model().engine) == inferred + 1
+    assert IMAGE_ENCODE_SECONDS.count(operation="base64") == encoded + 1
+    assert DB_COMMIT_SECONDS.count() >= committed + 1
+
+    body = client.get("/metrics").text
+    for name in (
+        "nutriguard_http_requests_total", "nutriguard_http_request_duration_seconds_bucket",
+        "nutriguard_model_inference_seconds_bucket", "nutriguard_image_encode_seconds_bucket",
+        "nutriguard_db_commit_seconds_bucket"
+    ):
+        assert name in body
+    assert 'route="/api/predict",status="200"' in body
+
+
+def test_thumbnails_are_timed():
+    image = io.BytesIO()
+    Image.new("RGB", (400, 300), "green").save(image, format="PNG")
+    before = IMAGE_ENCODE_SECONDS.count(operation="thumbnail")
+    make_thumbnail(image.getvalue(), size=64)
+    assert IMAGE_ENCODE_SECONDS.count(operation="thumbnail") == before + 1
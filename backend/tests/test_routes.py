@@ -1,38 +1,36 @@
-from fastapi.testclient import TestClient
-from backend.app.main import app
-import pytest
+import base64
 from unittest.mock import patch
 
-client = TestClient(app)
-
-@pytest.fixture
-def valid_input_data():
-    return {
-        "age": 25,
-        "height": 165,
-        "weight": 60,
-        "income_level": "lower_middle",
-        "sex": "female"
-    }
-
-@patch('app.models.ml_model.MalnutritionModel.predict')
-def test_prediction_endpoint(mock_predict, valid_input_data):
-    # Mock the prediction method
-    mock_predict.return_value = ("normal", 0.85, {
-        'Age': 25,
-        'Height': 165,
-        'Weight': 60,
-        'Low Income': 0,
-        'Lower Middle Income': 1,
-        'Upper Middle Income': 0,
-        'Sex_1': 0
-    })
-    
-    # Test the endpoint
-    response = client.post("/api/v1/predict/", json=valid_input_data)
-    
+JPEG_BYTES = b"\xff\xd8\xff fake jpeg"
+
+
+def test_prediction_endpoint(client, child_payload):
+    # Mock the prediction so the response fields can be checked exactly
+    def mock_predict(features):
+        return [("Moderate", 0.85, {"Low": 0.05, "Moderate": 0.85, "High": 0.07, "Critical": 0.03})] * len(features)
+
+    with patch("app.utils.batching.predict_malnutrition_batch", mock_predict):
+        response = client.post(
+            "/api/predict",
+            data={k: str(v) for k, v in child_payload.items()},
+            files={"photo_data": ("photo.jpg", JPEG_BYTES, "image/jpeg")}
+        )
+
     assert response.status_code == 200
-    assert response.json()["prediction"] == "normal"
-    assert response.json()["probability"] == 0.85
-    assert "input_data" in response.json()
-    assert "features" in response.json()
\ No newline at end of file
+    body = response.json()
+    assert body["predicted_class"] == "Moderate"
+    assert body["confidence"] == 0.85
+    assert body["class_probabilities"]["Moderate"] == 0.85
+    assert (body["name"], body["sex"], body["age"]) == ("Jane", "Female", 2)
+    assert body["height_m"] == 0.8 and body["bmi"] == 10.0 / 0.8 ** 2
+    assert base64.b64decode(body["photo_data"]) == JPEG_BYTES
+
+    # The stored record and photo are served back by the read routes
+    child_id = body["id"]
+    assert client.get(f"/api/child/{child_id}").json()[0]["predicted_class"] == "Moderate"
+    assert client.get(f"/api/image/{child_id}").content == JPEG_BYTES
+
+
+def test_prediction_endpoint_requires_a_photo(client, child_payload):
+    response = client.post("/api/predict", data={k: str(v) for k, v in child_payload.items()})
+    assert response.status_code == 422
@@ -0,0 +1,135 @@
+import datetime
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.models.child_health_record import ChildHealthRecord
+from app.utils.record_stats import add_to_record_stats, age_band, rebuild_record_stats, week_start
+
+JPEG_BYTES = b"\xff\xd8\xff fake jpeg"
+
+
+def _predict(client, payload):
+    response = client.post(
+        "/api/predict",
+        data={k: str(v) for k, v in payload.items()},
+        files={"photo_data": ("photo.jpg", JPEG_BYTES, "image/jpeg")}
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_stats_follow_every_insert_path(client, db_engine, child_payload):
+    _predict(client, child_payload)
+    _predict(client, dict(child_payload, sex=1, age=1, height_for_age_z=0.5))
+    assert client.post("/api/predict/batch", json=[dict(child_payload, age=4)]).status_code == 200
+    synced = dict(child_payload, client_id="device-1/0", measured_at="2025-03-05T10:00:00")
+    assert client.post("/api/sync", json=[synced]).json()["created"] == 1
+
+    stats = client.get("/api/stats").json()
+
+    with Session(db_engine) as session:
+        records = session.query(ChildHealthRecord).all()
+    assert stats["total"] == len(records) == 4
+    by_class = {}
+    for record in records:
+        by_class[record.predicted_class] = by_class.get(record.predicted_class, 0) + 1
+    assert stats["by_class"] == by_class
+    assert stats["by_sex"] == {"Female": 3, "Male": 1}
+    assert stats["by_age_band"] == {"12-23": 1, "24-35": 2, "48-59": 1}
+    assert list(stats["by_age_band"]) == ["12-23", "24-35", "48-59"]
+    assert stats["mean_zscores"]["height_for_age_z"] == pytest.approx(
+        sum(record.height_for_age_z for record in records) / 4
+    )
+
+    # The synced record was measured in an earlier week
+    assert [week["week_start"] for week in stats["by_week"]] == [
+        "2025-03-03", week_start(datetime.datetime.utcnow()).isoformat()
+    ]
+    assert [week["total"] for week in stats["by_week"]] == [1, 3]
+
+    recent = client.get("/api/stats", params={"created_from": "2025-03-10"}).json()
+    assert recent["total"] == 3
+    # The filter selects whole weeks
+    assert client.get("/api/stats", params={"created_to": "2025-03-03"}).json()["total"] == 1
+
+
+def test_repeated_inserts_add_up_in_the_summary_row(db_engine):
+    from app.models.child_record_stats import ChildRecordStats
+
+    record = {
+        "created_at": datetime.datetime(2025, 3, 5), "predicted_class": None, "sex": "Male", "age": 5,
+        "height_for_age_z": -1.0, "weight_for_height_z": 0.5, "weight_for_age_z": 2.0
+    }
+    for _ in range(2):
+        with Session(db_engine) as session:
+            add_to_record_stats(session, [record, record])
+            session.commit()
+
+    with Session(db_engine) as session:
+        (row,) = session.query(ChildRecordStats).all()
+    assert (row.week_start, row.predicted_class, row.age_band) == (datetime.date(2025, 3, 3), "Unknown", "60+")
+    assert (row.count, row.height_for_age_z_sum, row.weight_for_age_z_sum) == (4, -4.0, 8.0)
+
+
+def test_rebuild_repairs_a_drifted_summary(client, db_engine, make_child):
+    make_child(age=1, created_at=datetime.datetime(2025, 3, 4))
+    make_child(age=3, created_at=datetime.datetime(2025, 3, 11), predicted_class="High")
+    # A record that was deleted by hand is still counted in the summary
+    with Session(db_engine) as session:
+        add_to_record_stats(session, [{
+            "created_at": datetime.datetime(2025, 3, 5), "predicted_class": "Low", "sex": "Male", "age": 2,
+            "height_for_age_z": -1.0, "weight_for_height_z": 0.5, "weight_for_age_z": 2.0
+        }])
+        session.commit()
+    assert client.get("/api/stats").json()["total"] == 1
+
+    with Session(db_engine) as session:
+        assert rebuild_record_stats(session) == 2
+
+    stats = client.get("/api/stats").json()
+    assert stats["total"] == 2
+    assert stats["by_class"] == {"Low": 1, "High": 1}
+    assert stats["by_sex"] == {"Female": 2}
+    assert list(stats["by_age_band"]) == ["12-23", "36-47"]
+
+
+def test_age_bands_hold_one_year_of_age_each():
+    assert [age_band(age) for age in (0, 1, 2, 3, 4, 5, 6)] == [
+        "0-11", "12-23", "24-35", "36-47", "48-59", "60+", "60+"
+    ]
+
+
+def test_stats_migration_backfills_existing_records(db_engine, make_child):
+    import importlib.util
+    import os
+
+    import sqlalchemy as sa
+    from alembic.migration import MigrationContext
+    from alembic.operations import Operations
+
+    make_child(age=1, created_at=datetime.datetime(2025, 3, 4))
+    make_child(age=1, created_at=datetime.datetime(2025, 3, 9), weight_for_age_z=-2.0)
+    make_child(age=3, created_at=datetime.datetime(2025, 3, 10), predicted_class="High")
+
+    path = os.path.join(
+        os.path.dirname(os.path.dirname(__file__)),
+        "alembic", "versions", "f2b86d0e5a13_add_child_record_stats_table.py"
+    )
+    spec = importlib.util.spec_from_file_location("stats_migration", path)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+
+    with db_engine.begin() as connection:
+        connection.execute(sa.text("DROP TABLE child_record_stats"))
+        with Operations.context(MigrationContext.configure(connection)):
+            migration.upgrade()
+        rows = connection.execute(sa.text(
+            "SELECT week_start, predicted_class, age_band, count, weight_for_age_z_sum "
+            "FROM child_record_stats ORDER BY week_start, predicted_class"
+        )).all()
+
+    assert [tuple(row) for row in rows] == [
+        ("2025-03-03", "Low", "12-23", 2, -3.2),
+        ("2025-03-10", "High", "36-47", 1, -1.2),
+    ]
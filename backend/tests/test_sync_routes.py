@@ -0,0 +1,115 @@
+import json
+from unittest.mock import patch
+
+from sqlalchemy.orm import Session
+
+from app.models.child_health_record import ChildHealthRecord
+from app.models.ml_model import predict_malnutrition_batch
+from app.routes import sync
+from app.utils.photo_store import get_photo_store
+
+JPEG_BYTES = b"\xff\xd8\xff\xe0 offline photo"
+
+
+def _records(child_payload, count, **overrides):
+    return [dict(child_payload, client_id=f"device-3/{i}", name=f"Child {i}", **overrides) for i in range(count)]
+
+
+def _stored(engine):
+    with Session(engine) as session:
+        return session.query(ChildHealthRecord).order_by(ChildHealthRecord.id).all()
+
+
+def test_sync_stores_records_and_photos_in_chunks(client, db_engine, child_payload):
+    records = _records(child_payload, 5)
+    records[0]["photo"] = "child-0.jpg"
+    records[1]["measured_at"] = "2026-10-01T09:30:00"
+
+    with patch("app.routes.sync.SYNC_COMMIT_CHUNK_SIZE", 2), \
+            patch("app.routes.sync._insert_chunk", wraps=sync._insert_chunk) as insert:
+        response = client.post(
+            "/api/sync",
+            data={"records": json.dumps(records)},
+            files=[("photos", ("child-0.jpg", JPEG_BYTES, "image/jpeg"))]
+        )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["received"], body["created"]) == (5, 5)
+    assert [entry["status"] for entry in body["records"]] == ["created"] * 5
+    assert insert.call_count == 3
+
+    stored = _stored(db_engine)
+    assert [record.id for record in stored] == [entry["id"] for entry in body["records"]]
+    assert get_photo_store().get(stored[0].photo_hash) == JPEG_BYTES
+    assert stored[1].created_at.isoformat() == "2026-10-01T09:30:00"
+    assert stored[2].predicted_class == body["records"][2]["predicted_class"]
+
+
+def test_measured_at_offsets_are_stored_as_utc(client, db_engine, child_payload):
+    # Early Monday in Nairobi is still Sunday in UTC, so the record belongs to the previous week
+    records = _records(child_payload, 1, measured_at="2025-03-10T01:00:00+03:00")
+    assert client.post("/api/sync", json=records).json()["created"] == 1
+
+    (stored,) = _stored(db_engine)
+    assert stored.created_at.isoformat() == "2025-03-09T22:00:00"
+    assert [week["week_start"] for week in client.get("/api/stats").json()["by_week"]] == ["2025-03-03"]
+
+    # The same moment written with another offset is the same record
+    resent = _records(child_payload, 1, measured_at="2025-03-09T22:00:00Z")
+    assert client.post("/api/sync", json=resent).json()["records"][0]["status"] == "duplicate"
+
+
+def test_resync_reports_duplicates_without_storing_again(client, db_engine, child_payload):
+    records = _records(child_payload, 3)
+    first = client.post("/api/sync", json={"records": records[:2]}).json()
+
+    with patch("app.routes.sync.predict_malnutrition_batch", wraps=predict_malnutrition_batch) as predict:
+        second = client.post("/api/sync", json=records + [records[2]]).json()
+
+    assert [entry["status"] for entry in second["records"]] == ["duplicate", "duplicate", "created", "duplicate"]
+    assert second["records"][0]["id"] == first["records"][0]["id"]
+    assert second["records"][3]["id"] == second["records"][2]["id"]
+    # Only the new record is scored
+    assert len(predict.call_args[0][0]) == 1
+    assert len(_stored(db_engine)) == 3
+
+
+def test_sync_manifest_reports_invalid_and_conflicting_records(client, db_engine, child_payload):
+    client.post("/api/sync", json=_records(child_payload, 1))
+
+    records = _records(child_payload, 3)
+    records[0]["weight"] = 11.5
+    records[1]["height"] = -1
+    records[2]["photo"] = "missing.jpg"
+    body = client.post("/api/sync", json=records).json()
+
+    assert [entry["status"] for entry in body["records"]] == ["conflict", "invalid", "invalid"]
+    assert "missing.jpg" in body["records"][2]["error"]
+    assert len(_stored(db_engine)) == 1
+
+
+def test_sync_accepts_ndjson(client, db_engine, child_payload):
+    lines = "\n".join(json.dumps(record) for record in _records(child_payload, 4))
+
+    response = client.post("/api/sync", content=lines, headers={"Content-Type": "application/x-ndjson"})
+
+    assert response.json()["created"] == 4
+    assert len(_stored(db_engine)) == 4
+
+
+def test_failed_chunk_is_reported_and_later_chunks_continue(client, db_engine, child_payload):
+    insert_chunk = sync._insert_chunk
+    calls = []
+
+    def flaky_insert(db, records, keys):
+        calls.append(len(records))
+        if len(calls) == 1:
+            raise RuntimeError("connection reset")
+        insert_chunk(db, records, keys)
+
+    with patch("app.routes.sync.SYNC_COMMIT_CHUNK_SIZE", 2), patch("app.routes.sync._insert_chunk", flaky_insert):
+        body = client.post("/api/sync", json=_records(child_payload, 3)).json()
+
+    assert [entry["status"] for entry in body["records"]] == ["error", "error", "created"]
+    assert len(_stored(db_engine)) == 1
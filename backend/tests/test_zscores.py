@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+from pydantic import ValidationError
+
+from app.models.prediction_model import MalnutritionInput
+from app.models.zscores import compute_child_zscores, compute_zscores, get_growth_reference, lms_zscore
+
+
+def test_median_child_scores_zero():
+    reference = get_growth_reference()
+    length_for_age = reference.tables["length_for_age"]
+    weight_for_age = reference.tables["weight_for_age"]
+    weight_for_length = reference.tables["weight_for_length"]
+
+    # A one-year-old girl exactly on the median length and weight for 12 months
+    length = length_for_age.M[0, 12]
+    weight = weight_for_age.M[0, 12]
+    hfa, _, wfa = compute_child_zscores(0, 1, length, weight)
+
+    assert hfa == pytest.approx(0, abs=1e-12)
+    assert wfa == pytest.approx(0, abs=1e-12)
+    _, wfh, _ = compute_child_zscores(0, 1, 70.0, weight_for_length.M[0, weight_for_length.grid == 70.0][0])
+    assert wfh == pytest.approx(0, abs=1e-12)
+
+
+def test_lms_zscore_round_trips_and_restricts_the_tail():
+    L, M, S = np.float64(-0.3521), np.float64(10.0), np.float64(0.08)
+    for z in (-2.5, -1, 0.5, 2.9):
+        x = M * (1 + L * S * z) ** (1 / L)
+        assert lms_zscore(x, L, M, S) == pytest.approx(z)
+
+    # Beyond +3 SD WHO scales by the 2-3 SD distance instead of following the skewed curve
+    sd2, sd3 = (M * (1 + L * S * z) ** (1 / L) for z in (2, 3))
+    x = sd3 + (sd3 - sd2)
+    assert lms_zscore(x, L, M, S, restricted=True) == pytest.approx(4)
+    assert lms_zscore(x, L, M, S) != pytest.approx(4)
+
+
+def test_ages_in_years_are_looked_up_in_months():
+    # A typical 3-year-old boy scores near the median, not the +14 SD a 3-month lookup gives
+    hfa, wfh, wfa = compute_child_zscores(1, 3, 90.0, 13.0)
+    assert -2 < hfa < 0 and -1 < wfh < 1 and -2 < wfa < 0
+    expected = get_growth_reference().compute(1, 36, 90.0, 13.0)
+    assert (hfa, wfh, wfa) == tuple(float(score) for score in expected)
+
+
+def test_batch_matches_single_rows_and_switches_to_height_at_two_years():
+    sex = np.array([0, 1, 1, 0, 1])
+    age = np.array([0, 1, 2, 4, 5])
+    height = np.array([55.0, 85.0, 85.0, 100.0, 108.0])
+    weight = np.array([4.5, 11.5, 11.5, 15.0, 18.0])
+
+    batch = compute_zscores(sex, age, height, weight)
+
+    for row in range(len(sex)):
+        single = compute_child_zscores(int(sex[row]), age[row], height[row], weight[row])
+        assert single == tuple(scores[row] for scores in batch)
+    assert not any(np.isnan(scores).any() for scores in batch)
+
+    # The same body at 23 and 24 months is scored against length, then standing height
+    reference = get_growth_reference()
+    lying, standing = (reference.compute(1, months, 85.0, 11.5) for months in (23, 24))
+    assert lying[1] != standing[1]
+    assert standing[1] == batch[1][2]
+
+
+def test_outside_reference_is_missing():
+    hfa, wfh, wfa = compute_child_zscores(1, 6, 110, 18)
+    assert hfa is None and wfa is None
+    assert wfh is not None
+    assert compute_child_zscores(0, 1, 40, 3)[1] is None
+
+
+def test_malnutrition_input_fills_missing_zscores():
+    data = MalnutritionInput(Sex=1, Age=2, Height=88, Weight=12, weight_for_age_z=-0.5)
+
+    hfa, wfh, _ = compute_child_zscores(1, 2, 88, 12)
+    assert data.height_for_age_z == hfa
+    assert data.weight_for_height_z == wfh
+    assert data.weight_for_age_z == -0.5
+
+
+def test_malnutrition_input_rejects_ages_past_the_reference():
+    assert MalnutritionInput(Sex=0, Age=5, Height=108, Weight=17).weight_for_age_z is not None
+    with pytest.raises(ValidationError):
+        MalnutritionInput(Sex=0, Age=6, Height=115, Weight=20)
@@ -17,6 +17,7 @@ interface ChildCardProps {
   date: string;
   predicted_class: MalnutritionClassification;
   photo_data?: string;
+  photo_url?: string;
 }
 
 const ChildCard = ({ 
@@ -28,7 +29,8 @@ const ChildCard = ({
   height, 
   date, 
   predicted_class,
-  photo_data 
+  photo_data,
+  photo_url
 }: ChildCardProps) => {
   console.log("ChildCard received predicted_class:", predicted_class);
 
@@ -82,7 +84,7 @@ const ChildCard = ({
           <div className="flex items-start gap-4">
             <Avatar className="h-16 w-16 border-2 border-primary">
               <AvatarImage 
-                src={photo_data ? `data:image/jpeg;base64,${photo_data}` : "/placeholder.svg"} 
+                src={photo_url || (photo_data ? `data:image/jpeg;base64,${photo_data}` : "/placeholder.svg")} 
                 alt={child_name} 
               />
               <AvatarFallback className="bg-primary/5">
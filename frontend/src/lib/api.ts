@@ -97,6 +97,7 @@ export interface ChildHealthRecord {
   bmi: number;
   whr: number;
   photo_data?: string;
+  photo_url?: string;
   created_at: string;
   predicted_class: MalnutritionClassification;
   confidence: number;
@@ -118,6 +119,7 @@ export interface ChildPrediction {
   predicted_class: MalnutritionClassification;
   timestamp: string;
   photo_data?: string;
+  photo_url?: string;
 }
 
 export interface ApiResponse<T> {
@@ -141,7 +143,8 @@ const transformChildData = (record: ChildHealthRecord): ChildPrediction => ({
   bmi: record.bmi,
   predicted_class: record.predicted_class,
   timestamp: record.created_at,
-  photo_data: record.photo_data ? record.photo_data.replace(/^data:image\/\w+;base64,/, '') : undefined
+  photo_data: record.photo_data ? record.photo_data.replace(/^data:image\/\w+;base64,/, '') : undefined,
+  photo_url: record.photo_url
 });
 
 // Helper function to convert string to Gender enum
@@ -153,8 +156,8 @@ export const stringToGender = (value: string): Gender => {
   throw new Error(`Invalid gender value: ${value}`);
 };
 
-// Centralized API request handler
-const fetchApi = async (endpoint: string, options: RequestInit) => {
+// Centralized API request handler; returns the parsed body and the response for its headers
+const fetchApiResponse = async (endpoint: string, options: RequestInit) => {
   try {
     console.log(`📡 [FETCH]: ${API_BASE_URL}${endpoint}`, options);
     const response = await fetch(`${API_BASE_URL}${endpoint}`, options);
@@ -169,16 +172,68 @@ const fetchApi = async (endpoint: string, options: RequestInit) => {
 
     const json = await response.json();
     console.log("✅ [RESPONSE]:", json);
-    return json;
+    return { json, response };
   } catch (error) {
     console.error("❌ [API Error]:", error);
     throw error;
   }
 };
 
-// Add the getAllChildren function
-export const getAllChildren = async (): Promise<ChildHealthRecord[]> => {
-  return fetchApi("/children", {
+const fetchApi = async (endpoint: string, options: RequestInit) => {
+  const { json } = await fetchApiResponse(endpoint, options);
+  return json;
+};
+
+// One page of the children listing, newest first; nextCursor is null on the last page
+export interface ChildrenPage {
+  children: ChildHealthRecord[];
+  nextCursor: string | null;
+}
+
+export const getChildrenPage = async (
+  options: { cursor?: string | null; name?: string } = {}
+): Promise<ChildrenPage> => {
+  const params = new URLSearchParams();
+  if (options.cursor) params.set("cursor", options.cursor);
+  // The name search runs on the server, so it covers every record rather than the loaded pages
+  if (options.name) params.set("name", options.name);
+  const query = params.toString();
+  const { json, response } = await fetchApiResponse(`/children${query ? `?${query}` : ""}`, {
+    method: "GET",
+    headers: { "Content-Type": "application/json" },
+  });
+  return { children: json, nextCursor: response.headers.get("X-Next-Cursor") };
+};
+
+// Every child, following X-Next-Cursor through all the pages
+export const getAllChildren = async (name?: string): Promise<ChildHealthRecord[]> => {
+  const children: ChildHealthRecord[] = [];
+  let cursor: string | null = null;
+  do {
+    const page = await getChildrenPage({ cursor, name });
+    children.push(...page.children);
+    cursor = page.nextCursor;
+  } while (cursor);
+  return children;
+};
+
+// Dashboard totals, served from the backend's summary table
+export interface DashboardStats {
+  total: number;
+  by_class: Record<string, number>;
+  by_sex: Record<string, number>;
+  by_age_band: Record<string, number>;
+  mean_zscores: Record<string, number | null>;
+  by_week: {
+    week_start: string;
+    total: number;
+    by_class: Record<string, number>;
+    mean_zscores: Record<string, number | null>;
+  }[];
+}
+
+export const getStats = async (): Promise<DashboardStats> => {
+  return fetchApi("/stats", {
     method: "GET",
     headers: { "Content-Type": "application/json" },
   });
@@ -216,13 +271,9 @@ export const api = {
     });
   },
 
-  getAllChildren: async () => {
-    const response = await fetchApi("/children", {
-      method: "GET",
-      headers: { "Content-Type": "application/json" },
-    });
-    return response;
-  },
+  getAllChildren,
+
+  getChildrenPage,
 
   getChildById: (childId: string) =>
     fetchApi(`/child/${childId}`, {
@@ -279,6 +330,8 @@ export const api = {
 
   getChildImage,
 
+  getStats,
+
   transformChildData: (record: ChildHealthRecord): ChildPrediction => ({
     id: record.id,
     child_name: record.name,
@@ -293,7 +346,8 @@ export const api = {
     bmi: record.bmi,
     predicted_class: record.predicted_class,
     timestamp: record.created_at,
-    photo_data: record.photo_data ? record.photo_data.replace(/^data:image\/\w+;base64,/, '') : undefined
+    photo_data: record.photo_data ? record.photo_data.replace(/^data:image\/\w+;base64,/, '') : undefined,
+    photo_url: record.photo_url
   }),
 
 };
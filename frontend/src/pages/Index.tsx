@@ -1,4 +1,4 @@
-import { useState, useEffect } from "react";
+import { useState, useEffect, useRef } from "react";
 import Header from "@/components/Header";
 import ChildCard from "@/components/ChildCard";
 import { Button } from "@/components/ui/button";
@@ -6,45 +6,75 @@ import { Search, PlusCircle, Info } from "lucide-react";
 import { Input } from "@/components/ui/input";
 import AlertBanner from "@/components/AlertBanner";
 import { Link } from "react-router-dom";
-import api, { ChildHealthRecord, ChildPrediction, MalnutritionClassification } from "@/lib/api";
+import api, { ChildPrediction, DashboardStats, MalnutritionClassification } from "@/lib/api";
+
+// Wait this long after the last keystroke before searching
+const SEARCH_DEBOUNCE_MS = 300;
 
 const Dashboard = () => {
   const [searchTerm, setSearchTerm] = useState("");
   const [children, setChildren] = useState<ChildPrediction[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [stats, setStats] = useState<DashboardStats | null>(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [error, setError] = useState<string | null>(null);
+  // The search the loaded pages belong to, so a late "load more" for an old search is dropped
+  const activeSearch = useRef("");
+
+  useEffect(() => {
+    api.getStats()
+      .then(setStats)
+      .catch((err) => setError(err instanceof Error ? err.message : 'An unknown error occurred'));
+  }, []);
 
+  // Load the first page again whenever the search changes; the name filter runs on the server
   useEffect(() => {
-    const fetchChildrenData = async () => {
+    const name = searchTerm.trim();
+    let cancelled = false;
+    const timer = setTimeout(async () => {
       try {
-        const response = await api.getAllChildren();
-        console.log("Raw API response:", response);
+        const page = await api.getChildrenPage({ name: name || undefined });
+        if (cancelled) return;
+        activeSearch.current = name;
         // Transform ChildHealthRecord[] to ChildPrediction[]
-        const transformedChildren = response.map(api.transformChildData);
-        console.log("Transformed children:", transformedChildren);
-        setChildren(transformedChildren);
+        setChildren(page.children.map(api.transformChildData));
+        setNextCursor(page.nextCursor);
       } catch (err) {
-        setError(err instanceof Error ? err.message : 'An unknown error occurred');
+        if (!cancelled) setError(err instanceof Error ? err.message : 'An unknown error occurred');
       } finally {
-        setLoading(false);
+        if (!cancelled) setLoading(false);
       }
-    };
+    }, name ? SEARCH_DEBOUNCE_MS : 0);
 
-    fetchChildrenData();
-  }, []);
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
+  }, [searchTerm]);
 
-  const filteredChildren = children.filter(child => 
-    child.child_name.toLowerCase().includes(searchTerm.toLowerCase())
-  );
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    const name = activeSearch.current;
+    setLoadingMore(true);
+    try {
+      const page = await api.getChildrenPage({ cursor: nextCursor, name: name || undefined });
+      if (activeSearch.current !== name) return;
+      setChildren((loaded) => [...loaded, ...page.children.map(api.transformChildData)]);
+      setNextCursor(page.nextCursor);
+    } catch (err) {
+      setError(err instanceof Error ? err.message : 'An unknown error occurred');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
   
-  const urgentCases = children.filter(child => 
-    child.predicted_class === MalnutritionClassification.Critical || 
-    child.predicted_class === MalnutritionClassification.High
-  ).length;
+  // Counted over every record, not just the page of children loaded above
+  const classCount = (predictedClass: MalnutritionClassification) => stats?.by_class[predictedClass] ?? 0;
+
+  const urgentCases = classCount(MalnutritionClassification.Critical) + classCount(MalnutritionClassification.High);
   
-  const warningCases = children.filter(child => 
-    child.predicted_class === MalnutritionClassification.Moderate
-  ).length;
+  const warningCases = classCount(MalnutritionClassification.Moderate);
 
   if (loading) return <div>Loading...</div>;
   if (error) return <div>Error: {error}</div>;
@@ -98,8 +128,8 @@ const Dashboard = () => {
         </div>
         
         <div className="grid grid-cols-1 sm:grid-cols-2 lg:grid-cols-3 xl:grid-cols-4 gap-6 mt-6">
-          {filteredChildren.length > 0 ? (
-            filteredChildren.map((child) => (
+          {children.length > 0 ? (
+            children.map((child) => (
               <ChildCard 
                 key={child.id} 
                 id={child.id.toString()}
@@ -111,6 +141,7 @@ const Dashboard = () => {
                 date={child.date}
                 predicted_class={child.predicted_class}
                 photo_data={child.photo_data}
+                photo_url={child.photo_url}
               />
             ))
           ) : (
@@ -133,6 +164,14 @@ const Dashboard = () => {
             </div>
           )}
         </div>
+
+        {nextCursor && (
+          <div className="mt-8 flex justify-center">
+            <Button variant="outline" onClick={loadMore} disabled={loadingMore}>
+              {loadingMore ? "Loading..." : "Load more"}
+            </Button>
+          </div>
+        )}
       </main>
     </div>
   );